@@ -8,7 +8,7 @@ db = SQLAlchemy()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 
-def create_app():
+def create_app(test_config=None):
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     app = Flask(
         __name__,
@@ -20,12 +20,33 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['TEMPLATES_AUTO_RELOAD'] = True
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+    # 出站 HTTP 按主机的连接池与超时，例如 {'api.siliconflow.cn': {'pool_maxsize': 4, 'timeout': [10, 120]}}
+    app.config['HTTP_HOSTS'] = {}
+    # 定时增量采集（采集源 config_json 的 schedule），TESTING 下不启动
+    app.config['CRAWL_SCHEDULER'] = True
+    app.config['CRAWL_SCHEDULER_TICK'] = 30
+    # 多进程部署时只有持有该文件锁的进程运行定时采集；None 为系统临时目录下按数据库区分的默认路径，空字符串不加锁
+    app.config['CRAWL_SCHEDULER_LOCK'] = None
+    # 采集任务队列在本进程内的工作线程数，0 表示由独立的 worker.py 进程执行
+    app.config['CRAWL_JOB_WORKERS'] = 4
+
+    # SQLite 并发配置：每个连接的 PRAGMA（可按键覆盖，见 storage.DEFAULT_PRAGMAS）、连接池参数与单一写线程
+    app.config['SQLITE_PRAGMAS'] = {}
+    app.config['SQLITE_WRITE_QUEUE'] = True
+
+    if test_config:
+        app.config.update(test_config)
+
+    from . import http_client, storage
+    http_client.configure(app.config.get('HTTP_HOSTS'))
+    storage.configure(app)
 
     db.init_app(app)
     login_manager.init_app(app)
 
     with app.app_context():
         from .models import User, Role, SystemSetting, AiEngine, CrawlerSource
+        storage.install(app, db.engine)
         db.create_all()
 
         try:
@@ -55,6 +76,90 @@ def create_app():
         except Exception:
             pass
         
+        try:
+            insp = inspect(db.engine)
+            cols_cr = [c['name'] if isinstance(c, dict) else c.get('name') for c in insp.get_columns('collection_records')]
+            added = False
+            with db.engine.begin() as conn:
+                for col in ['url_hash', 'title_hash']:
+                    if col not in cols_cr:
+                        conn.execute(text(f'ALTER TABLE collection_records ADD COLUMN {col} VARCHAR(40)'))
+                        added = True
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_collection_records_title_hash ON collection_records (title_hash)'))
+            if added:
+                from .dedup import backfill
+                backfill()
+        except Exception:
+            db.session.rollback()
+
+        try:
+            # url_hash 改为部分唯一索引（批量入库按其 upsert）：同一 URL 的较晚记录清空 url_hash，仍可按标题指纹去重
+            idx_names = [i.get('name') for i in inspect(db.engine).get_indexes('collection_records')]
+            if 'ux_collection_records_url_hash' not in idx_names:
+                with db.engine.begin() as conn:
+                    conn.execute(text('UPDATE collection_records SET url_hash = NULL WHERE url_hash IS NOT NULL AND id NOT IN '
+                                      '(SELECT MIN(id) FROM collection_records WHERE url_hash IS NOT NULL GROUP BY url_hash)'))
+                    conn.execute(text('DROP INDEX IF EXISTS ix_collection_records_url_hash'))
+                    conn.execute(text('CREATE UNIQUE INDEX ux_collection_records_url_hash ON collection_records (url_hash) WHERE url_hash IS NOT NULL'))
+        except Exception:
+            db.session.rollback()
+
+        try:
+            insp = inspect(db.engine)
+            cols_cr = [c['name'] if isinstance(c, dict) else c.get('name') for c in insp.get_columns('collection_records')]
+            added = False
+            with db.engine.begin() as conn:
+                if 'minhash' not in cols_cr:
+                    conn.execute(text('ALTER TABLE collection_records ADD COLUMN minhash BLOB'))
+                    added = True
+                if 'duplicate_of' not in cols_cr:
+                    conn.execute(text('ALTER TABLE collection_records ADD COLUMN duplicate_of INTEGER REFERENCES collection_records (id)'))
+                conn.execute(text('DROP INDEX IF EXISTS ix_collection_records_duplicate_of'))
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_collection_records_duplicate_target ON collection_records (duplicate_of) WHERE duplicate_of IS NOT NULL'))
+            if added:
+                from .near_dup import backfill as near_dup_backfill
+                near_dup_backfill()
+        except Exception:
+            db.session.rollback()
+
+        try:
+            # collection_records 的二级索引（与 models.CollectionRecord.__table_args__ 一致）
+            with db.engine.begin() as conn:
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_collection_records_created_at ON collection_records (created_at)'))
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_collection_records_source_created_at ON collection_records (source, created_at)'))
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_collection_records_keyword_created_at ON collection_records (keyword, created_at)'))
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_collection_records_latest ON collection_records (created_at) WHERE duplicate_of IS NULL'))
+        except Exception:
+            db.session.rollback()
+
+        try:
+            # crawl_job_items 的 (job_id, seq) 改为唯一索引：重复执行留下的同序号条目只保留最早一条
+            idx_names = [i.get('name') for i in inspect(db.engine).get_indexes('crawl_job_items')]
+            if 'ux_crawl_job_items_job_seq' not in idx_names:
+                with db.engine.begin() as conn:
+                    conn.execute(text('DELETE FROM crawl_job_items WHERE id NOT IN (SELECT MIN(id) FROM crawl_job_items GROUP BY job_id, seq)'))
+                    conn.execute(text('DROP INDEX IF EXISTS ix_crawl_job_items_job_seq'))
+                    conn.execute(text('CREATE UNIQUE INDEX ux_crawl_job_items_job_seq ON crawl_job_items (job_id, seq)'))
+        except Exception:
+            db.session.rollback()
+
+        try:
+            # 标题/摘要/正文全文索引（FTS5 trigram），首次创建时从现有记录重建
+            from .search import ensure as ensure_search
+            ensure_search()
+        except Exception:
+            db.session.rollback()
+
+        try:
+            insp = inspect(db.engine)
+            cols_rule = [c['name'] if isinstance(c, dict) else c.get('name') for c in insp.get_columns('collection_rules')]
+            if 'updated_at' not in cols_rule:
+                with db.engine.begin() as conn:
+                    conn.execute(text('ALTER TABLE collection_rules ADD COLUMN updated_at DATETIME'))
+                    conn.execute(text('UPDATE collection_rules SET updated_at = created_at'))
+        except Exception:
+            db.session.rollback()
+
         # 初始化基础数据
         if not Role.query.first():
             admin_role = Role(name='admin', description='管理员')
@@ -82,4 +187,10 @@ def create_app():
     from .admin import bp as admin_bp
     app.register_blueprint(admin_bp)
 
+    from . import scheduler
+    scheduler.init_app(app)
+
+    from . import jobs
+    jobs.init_app(app)
+
     return app
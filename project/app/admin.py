@@ -1,8 +1,9 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app, stream_with_context
 from flask_login import login_required, current_user
 from functools import wraps
 from .models import User, Role, SystemSetting, db, CollectionRecord, CollectionRule, AiEngine, CrawlerSource, AiAnalysisResult
-from .crawler import BaiduCrawler, XinhuaCrawler, create_crawler
+from .crawler import create_crawler
+from . import http_client, charset, dedup, near_dup, ratelimit, ingest, scheduler, jobs, rule_index, extractor, density, resolver, search, storage, pagination
 import re, json
 from urllib.parse import urlparse
 
@@ -158,7 +159,6 @@ def _llm_chat_json(messages, temperature=0, engine_id=None):
     eng = AiEngine.query.get(engine_id) if engine_id else _choose_ai_engine()
     if not eng:
         return {'error': '未配置AI引擎'}
-    import requests
     base = _normalize_api_base((eng.api_base or '').strip())
     url = base.rstrip('/') + '/chat/completions'
     headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
@@ -178,7 +178,7 @@ def _llm_chat_json(messages, temperature=0, engine_id=None):
         'max_tokens': 512
     }
     try:
-        r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 60))
+        r = http_client.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 60))
         if r.status_code != 200:
             return {'error': f'LLM错误: {r.status_code}', 'preview': (r.text or '')[:160]}
         data = r.json() or {}
@@ -197,7 +197,7 @@ def _llm_chat(messages, temperature=0, engine_id=None):
     eng = AiEngine.query.get(engine_id) if engine_id else _choose_ai_engine()
     if not eng:
         return {'error': '未配置AI引擎'}
-    import requests, time
+    import time
     candidates = [eng]
     try:
         backup = AiEngine.query.filter(AiEngine.id != eng.id).order_by(AiEngine.id.asc()).first()
@@ -228,7 +228,7 @@ def _llm_chat(messages, temperature=0, engine_id=None):
         last_code = 0
         for i in range(3):
             try:
-                r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 60))
+                r = http_client.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 60))
                 if r.status_code == 200:
                     data = r.json() or {}
                     content = (((data.get('choices') or [{}])[0]).get('message') or {}).get('content') or ''
@@ -265,11 +265,12 @@ def _ai_tools_defs():
             'type': 'function',
             'function': {
                 'name': 'select_collection_records',
-                'description': '查询collection_records，支持keyword模糊、最近days天与限制条数',
+                'description': '查询collection_records，支持keyword全文检索标题/摘要/正文（按相关度排序并返回命中片段）、collect_keyword按采集关键词精确匹配、最近days天与限制条数',
                 'parameters': {
                     'type': 'object',
                     'properties': {
                         'keyword': { 'type': 'string' },
+                        'collect_keyword': { 'type': 'string' },
                         'days': { 'type': 'integer' },
                         'limit': { 'type': 'integer' }
                     },
@@ -284,23 +285,31 @@ def _execute_tool_call(name, args):
         if name == 'get_table_schema':
             return {
                 'table': 'collection_records',
-                'columns': ['id','keyword','title','summary','source','original_url','cover','deep_collected','deep_content','created_at']
+                'columns': ['id','keyword','title','summary','source','original_url','cover','deep_collected','deep_content','created_at','duplicate_of'],
+                'note': '查询结果已折叠近似重复记录（duplicate_of 非空的转载稿）'
             }
         if name == 'select_collection_records':
             kw = (args or {}).get('keyword') or ''
             days = int((args or {}).get('days') or 0)
             limit = int((args or {}).get('limit') or 10)
-            base = CollectionRecord.query
-            if kw and kw.strip():
-                base = base.filter((CollectionRecord.title.ilike(f'%{kw}%')) | (CollectionRecord.summary.ilike(f'%{kw}%')))
+            collect_kw = ((args or {}).get('collect_keyword') or '').strip()
+            base = CollectionRecord.query.filter(CollectionRecord.duplicate_of.is_(None))
+            if collect_kw:
+                base = base.filter(CollectionRecord.keyword == collect_kw)
+            base, ranked = search.apply(base, kw)
             if days and days > 0:
                 from datetime import datetime, timedelta
                 since = datetime.utcnow() - timedelta(days=days)
                 base = base.filter(CollectionRecord.created_at >= since)
-            rows = base.order_by(CollectionRecord.created_at.desc()).limit(min(max(limit,1), 50)).all()
+            order = [CollectionRecord.created_at.desc()]
+            if ranked:
+                order.insert(0, search.order_by_rank())
+            rows = base.order_by(*order).limit(min(max(limit,1), 50)).all()
+            # 命中片段以【】标出，可能来自正文
+            snippets = search.snippets([r.id for r in rows], kw, html=False) if kw else {}
             items = []
             for r in rows:
-                items.append({
+                item = {
                     'id': r.id,
                     'keyword': r.keyword,
                     'title': r.title,
@@ -308,7 +317,10 @@ def _execute_tool_call(name, args):
                     'source': r.source,
                     'original_url': r.original_url,
                     'created_at': r.created_at.isoformat() if r.created_at else ''
-                })
+                }
+                if r.id in snippets:
+                    item['snippet'] = snippets[r.id]
+                items.append(item)
             return { 'items': items }
         return { 'error': f'未知工具: {name}' }
     except Exception as e:
@@ -318,7 +330,7 @@ def _llm_chat_with_tools(messages, temperature=0, engine_id=None, max_steps=3):
     eng = AiEngine.query.get(engine_id) if engine_id else _choose_ai_engine()
     if not eng:
         return {'error': '未配置AI引擎'}
-    import requests, time
+    import time
     tools = _ai_tools_defs()
     history = list(messages)
     candidates = [eng]
@@ -351,7 +363,7 @@ def _llm_chat_with_tools(messages, temperature=0, engine_id=None, max_steps=3):
             tried = False
             for i in range(3):
                 try:
-                    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 60))
+                    r = http_client.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 60))
                     if r.status_code == 200:
                         data = r.json() or {}
                         msg = ((data.get('choices') or [{}])[0]).get('message') or {}
@@ -518,7 +530,6 @@ def ai_engines_delete(id):
 @admin_required
 def ai_engines_test(id):
     eng = AiEngine.query.get_or_404(id)
-    import requests
     base = _normalize_api_base((eng.api_base or '').strip())
     url = base.rstrip('/') + '/chat/completions'
     headers = {'Accept': 'application/json'}
@@ -532,7 +543,7 @@ def ai_engines_test(id):
         'temperature': 0
     }
     try:
-        r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 30))
+        r = http_client.post(url, headers=headers, data=json.dumps(payload), timeout=(10, 30))
         ok = (r.status_code == 200)
         return jsonify({'status': 'ok' if ok else 'error', 'code': r.status_code, 'preview': (r.text or '')[:160]})
     except Exception as e:
@@ -620,6 +631,7 @@ def add_rule():
     rule = CollectionRule(site=site, site_name=site_name, title_xpath=title_xpath, content_xpath=content_xpath, headers_json=headers_json)
     db.session.add(rule)
     db.session.commit()
+    rule_index.invalidate()
     flash('规则已添加')
     return redirect(url_for('admin.rules'))
 
@@ -636,6 +648,7 @@ def edit_rule(id):
         headers_raw = request.form.get('headers_json') or ''
         rule.headers_json = normalize_headers_text(headers_raw)
         db.session.commit()
+        rule_index.invalidate()
         flash('规则已更新')
         return redirect(url_for('admin.rules'))
     headers_text = headers_pretty_text(rule.headers_json or '')
@@ -648,6 +661,7 @@ def delete_rule(id):
     rule = CollectionRule.query.get_or_404(id)
     db.session.delete(rule)
     db.session.commit()
+    rule_index.invalidate()
     flash('规则已删除')
     return redirect(url_for('admin.rules'))
 
@@ -737,7 +751,7 @@ def dashboard_heatmap():
 @admin_required
 def dashboard_latest():
     try:
-        rows = CollectionRecord.query.order_by(CollectionRecord.created_at.desc()).limit(20).all()
+        rows = CollectionRecord.query.filter(CollectionRecord.duplicate_of.is_(None)).order_by(CollectionRecord.created_at.desc()).limit(20).all()
     except Exception:
         rows = []
     items = []
@@ -797,7 +811,8 @@ def dashboard_ai_analyze():
             return jsonify({'error': '指令不能为空'}), 400
             
         # 获取最近数据供分析
-        rows = CollectionRecord.query.order_by(CollectionRecord.created_at.desc()).limit(50).all()
+        # 近似重复的转载稿只保留最早一条，避免重复占用提示词
+        rows = CollectionRecord.query.filter(CollectionRecord.duplicate_of.is_(None)).order_by(CollectionRecord.created_at.desc()).limit(50).all()
         data_summary = "\n".join([f"- [{r.source}] {r.title}" for r in rows])
         
         sys_prompt = """你是一个智能数据分析专家。请根据用户指令和提供的舆情数据摘要，进行深度分析。
@@ -912,47 +927,98 @@ def crawlers_test(id):
     except Exception as e:
         return jsonify({'status':'error','message':str(e)}), 500
 
-@bp.route('/collector')
-@login_required
-@admin_required
-def collector():
+def _enabled_sources():
     rows = CrawlerSource.query.filter_by(enabled=True).order_by(CrawlerSource.id.asc()).all()
     # ensure built-ins present
     keys = set([r.key for r in rows])
     extras = []
     if 'baidu' not in keys:
-        extras.append(type('T', (), {'key':'baidu','name':'百度新闻'})())
+        extras.append(type('T', (), {'key':'baidu','name':'百度新闻','config_json':''})())
     if 'xinhua' not in keys:
-        extras.append(type('T', (), {'key':'xinhua','name':'新华网'})())
-    sources = list(rows) + extras
+        extras.append(type('T', (), {'key':'xinhua','name':'新华网','config_json':''})())
+    return list(rows) + extras
+
+def _source_config(row):
+    if row and (row.config_json or '').strip():
+        try:
+            return json.loads(row.config_json)
+        except Exception:
+            return None
+    return None
+
+@bp.route('/collector')
+@login_required
+@admin_required
+def collector():
+    sources = _enabled_sources()
     return render_template('admin/collector.html', sources=sources)
 
 @bp.route('/collector/run', methods=['POST'])
 @login_required
 @admin_required
 def collector_run():
+    # 采集改为入队执行，立即返回任务 id；进度与结果通过 /collector/jobs/<id> 系列接口获取
     data = request.get_json() or {}
     keyword = data.get('keyword', '').strip()
     max_count = int(data.get('max_count') or 20)
     source_key = (data.get('source') or 'baidu').lower()
-    cfg = None
-    src = CrawlerSource.query.filter_by(key=source_key).first()
-    if src and (src.config_json or '').strip():
-        try:
-            cfg = json.loads(src.config_json)
-        except Exception:
-            cfg = None
-    crawler = create_crawler(source_key, config=cfg) or BaiduCrawler()
-    items = crawler.fetch_data(keyword, max_count=max_count)
-    formatted = crawler.to_display_schema(items)
-    for it in formatted:
-        it['deep_collected'] = False
+    dedup_mode = (data.get('dedup') or 'flag').lower()
+    job = jobs.enqueue(source_key, keyword, max_count, dedup_mode)
     return jsonify({
-        'progress': 100,
+        'job_id': job.id,
+        'status': job.status,
+        'progress': 0,
         'keyword': keyword,
-        'items': formatted,
-        'source': source_key
-    })
+        'source': source_key,
+        'status_url': url_for('admin.collector_job', id=job.id),
+        'result_url': url_for('admin.collector_job_result', id=job.id),
+        'stream_url': url_for('admin.collector_job_stream', id=job.id)
+    }), 202
+
+@bp.route('/collector/jobs', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def collector_jobs():
+    if request.method == 'POST':
+        return collector_run()
+    from .models import CrawlJob
+    try:
+        limit = int(request.args.get('limit') or 20)
+    except Exception:
+        limit = 20
+    limit = min(max(limit, 1), 200)
+    rows = CrawlJob.query.order_by(CrawlJob.id.desc()).limit(limit).all()
+    return jsonify({'jobs': [jobs.job_status(j) for j in rows]})
+
+@bp.route('/collector/jobs/<int:id>')
+@login_required
+@admin_required
+def collector_job(id):
+    from .models import CrawlJob
+    return jsonify(jobs.job_status(CrawlJob.query.get_or_404(id)))
+
+@bp.route('/collector/jobs/<int:id>/result')
+@login_required
+@admin_required
+def collector_job_result(id):
+    from .models import CrawlJob
+    job = CrawlJob.query.get_or_404(id)
+    items = [json.loads(r.data) for r in jobs.job_items(id)]
+    return jsonify(dict(jobs.job_status(job), items=items))
+
+@bp.route('/collector/jobs/<int:id>/cancel', methods=['POST'])
+@login_required
+@admin_required
+def collector_job_cancel(id):
+    return jsonify({'cancelled': jobs.cancel(id)})
+
+def _sse_headers():
+    return {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Connection': 'keep-alive'
+    }
 
 @bp.route('/collector/stream')
 @login_required
@@ -965,23 +1031,22 @@ def collector_stream():
     pace_ms = int(request.args.get('pace_ms') or 350)
     if pace_ms < 0:
         pace_ms = 0
-    cfg = None
-    src_row = CrawlerSource.query.filter_by(key=source_key).first()
-    if src_row and (src_row.config_json or '').strip():
-        try:
-            cfg = json.loads(src_row.config_json)
-        except Exception:
-            cfg = None
+    # 已入库条目的处理：flag 标记（默认）、drop 丢弃、off 不检查
+    dedup_mode = (request.args.get('dedup') or 'flag').lower()
+    if source_key == 'all':
+        return _collector_fanout_response(keyword, max_count, pace_ms, dedup_mode)
+    cfg = _source_config(CrawlerSource.query.filter_by(key=source_key).first())
     try:
         crawler = create_crawler(source_key, config=cfg)
     except Exception as e:
         def _err():
             yield f"event: error\ndata: {str(e)}\n\n"
-        return Response(_err(), headers={'Content-Type':'text/event-stream','Cache-Control':'no-cache','X-Accel-Buffering':'no','Connection':'keep-alive'})
+        return Response(_err(), headers=_sse_headers())
     def _gen():
         try:
             import time
             sent = 0
+            skipped = 0
             yield f"event: status\ndata: 正在采集...\n\n"
             # 优先使用迭代接口
             iter_fn = getattr(crawler, 'iter_data', None)
@@ -992,6 +1057,9 @@ def collector_stream():
                     except Exception:
                         formatted = it
                     formatted['deep_collected'] = False
+                    if not ingest.mark_known(formatted, dedup_mode):
+                        skipped += 1
+                        continue
                     msg = json.dumps(formatted, ensure_ascii=False)
                     yield f"event: status\ndata: 正在采集{formatted.get('title','')}\n\n"
                     yield f"event: item\ndata: {msg}\n\n"
@@ -1010,6 +1078,9 @@ def collector_stream():
                     except Exception:
                         formatted = it
                     formatted['deep_collected'] = False
+                    if not ingest.mark_known(formatted, dedup_mode):
+                        skipped += 1
+                        continue
                     msg = json.dumps(formatted, ensure_ascii=False)
                     yield f"event: status\ndata: 正在采集{formatted.get('title','')}\n\n"
                     yield f"event: item\ndata: {msg}\n\n"
@@ -1018,17 +1089,178 @@ def collector_stream():
                     yield f"event: progress\ndata: {pct}\n\n"
                     if pace_ms:
                         time.sleep(pace_ms/1000.0)
-            yield f"event: done\ndata: 已完成，共{sent}条\n\n"
+            tail = f"，跳过已入库{skipped}条" if skipped else ''
+            yield f"event: done\ndata: 已完成，共{sent}条{tail}\n\n"
         except Exception as e:
             err = str(e)
             yield f"event: error\ndata: {err}\n\n"
-    headers = {
-        'Content-Type': 'text/event-stream',
-        'Cache-Control': 'no-cache',
-        'X-Accel-Buffering': 'no',
-        'Connection': 'keep-alive'
-    }
-    return Response(_gen(), headers=headers)
+    return Response(stream_with_context(_gen()), headers=_sse_headers())
+
+@bp.route('/collector/jobs/<int:id>/stream')
+@login_required
+@admin_required
+def collector_job_stream(id):
+    # 接入（或断线重连到）一个采集任务：按序推送已写入的条目，直到任务结束；
+    # 事件与 /collector/stream 一致，并带 id 以便浏览器用 Last-Event-ID 续传
+    from flask import Response
+    from .models import CrawlJob
+    CrawlJob.query.get_or_404(id)
+    after = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+    pace_ms = max(0, int(request.args.get('pace_ms') or 0))
+    def _gen():
+        import time
+        last = after
+        last_status = None
+        idle_since = time.time()
+        yield f"event: status\ndata: 已接入采集任务 #{id}\n\n"
+        while True:
+            # 先读状态再读条目：状态已结束时，其所有条目都已提交
+            job = db.session.query(CrawlJob.status, CrawlJob.progress, CrawlJob.message, CrawlJob.error, CrawlJob.max_count) \
+                .filter(CrawlJob.id == id).first()
+            rows = jobs.job_items(id, after=last, limit=200)
+            db.session.rollback()
+            if job is None:
+                yield f"event: error\ndata: 任务不存在\n\n"
+                return
+            for r in rows:
+                last = r.seq
+                yield f"id: {r.seq}\nevent: item\ndata: {r.data}\n\n"
+                yield f"event: progress\ndata: {max(0, min(99, round(100*r.seq/max(job.max_count or 1, 1))))}\n\n"
+                if pace_ms:
+                    time.sleep(pace_ms/1000.0)
+            if rows:
+                idle_since = time.time()
+                continue
+            if job.status == 'done' or job.status == 'cancelled':
+                yield f"event: done\ndata: {job.message or '已完成'}\n\n"
+                return
+            if job.status == 'error':
+                yield f"event: error\ndata: {job.error or '采集出错'}\n\n"
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield f"event: status\ndata: {job.message or job.status}\n\n"
+            if time.time() - idle_since > 600:
+                yield f"event: error\ndata: 任务长时间无进展\n\n"
+                return
+            time.sleep(0.3)
+    return Response(stream_with_context(_gen()), headers=_sse_headers())
+
+# 多源并发流：无事件时发送心跳的间隔，以及单个来源无任何进展即判为失败的时长（秒）
+_FANOUT_KEEPALIVE = 15
+_FANOUT_IDLE_LIMIT = 600
+
+def _fanout_item_key(it):
+    url = (it.get('original_url') or '').strip().lower().rstrip('/')
+    title = (it.get('title') or '').strip().lower()
+    return url, title
+
+def _collector_fanout_response(keyword, max_count, pace_ms, dedup_mode='flag'):
+    # 多源并发采集：每个启用的来源一个线程，按到达顺序合并为同一条 SSE 流并跨源去重
+    from flask import Response
+    import threading, queue, time
+    crawlers = []
+    for row in _enabled_sources():
+        try:
+            crawlers.append((row.key, row.name or row.key, create_crawler(row.key, config=_source_config(row))))
+        except Exception:
+            continue
+    events = queue.Queue()
+    stop = threading.Event()
+
+    def _run(key, crawler):
+        count = 0
+        try:
+            iter_fn = getattr(crawler, 'iter_data', None)
+            items = iter_fn(keyword, max_count=max_count) if callable(iter_fn) else crawler.fetch_data(keyword, max_count=max_count)
+            for it in items:
+                if stop.is_set():
+                    break
+                events.put(('item', key, it))
+                count += 1
+                if count >= max_count:
+                    break
+            events.put(('done', key, count))
+        except Exception as e:
+            events.put(('error', key, str(e)))
+
+    def _gen():
+        total = max(1, max_count * len(crawlers))
+        progress = {key: {'source': key, 'name': name, 'count': 0, 'sent': 0, 'done': False} for key, name, _ in crawlers}
+        by_key = {key: crawler for key, _, crawler in crawlers}
+        seen_urls, seen_titles = set(), set()
+        sent = 0
+        pending = len(crawlers)
+        threads, active = {}, {}
+        try:
+            yield f"event: status\ndata: 正在并发采集{len(crawlers)}个来源...\n\n"
+            for key, name, crawler in crawlers:
+                threads[key] = threading.Thread(target=_run, args=(key, crawler), daemon=True)
+                threads[key].start()
+                active[key] = time.time()
+                yield f"event: source\ndata: {json.dumps(progress[key], ensure_ascii=False)}\n\n"
+            while pending:
+                try:
+                    kind, key, payload = events.get(timeout=_FANOUT_KEEPALIVE)
+                except queue.Empty:
+                    # 线程异常退出（未发出结束事件）或长时间无进展的来源按失败结束，避免连接一直挂起
+                    now = time.time()
+                    for k, v in progress.items():
+                        if v['done']:
+                            continue
+                        # 线程已退出时它发出的事件必然已在队列中，队列为空才说明未发出结束事件
+                        if not threads[k].is_alive() and events.empty():
+                            events.put(('error', k, '采集线程异常退出'))
+                        elif now - active[k] > _FANOUT_IDLE_LIMIT:
+                            events.put(('error', k, '来源长时间无进展'))
+                    if events.empty():
+                        yield ": keepalive\n\n"
+                    continue
+                st = progress[key]
+                if st['done']:
+                    # 已判为失败的来源随后到达的事件不再处理
+                    continue
+                active[key] = time.time()
+                if kind == 'item':
+                    st['count'] += 1
+                    try:
+                        formatted = by_key[key].to_display_schema([payload])[0]
+                    except Exception:
+                        formatted = payload
+                    url, title = _fanout_item_key(formatted)
+                    if (url and url in seen_urls) or (title and title in seen_titles):
+                        continue
+                    if url:
+                        seen_urls.add(url)
+                    if title:
+                        seen_titles.add(title)
+                    formatted['deep_collected'] = False
+                    formatted['source_key'] = key
+                    if not ingest.mark_known(formatted, dedup_mode):
+                        continue
+                    st['sent'] += 1
+                    sent += 1
+                    yield f"event: status\ndata: [{st['name']}] 正在采集{formatted.get('title','')}\n\n"
+                    yield f"event: item\ndata: {json.dumps(formatted, ensure_ascii=False)}\n\n"
+                else:
+                    pending -= 1
+                    st['done'] = True
+                    if kind == 'error':
+                        st['error'] = payload
+                # 已结束的来源按满额计入进度
+                done_units = sum(max_count if v['done'] else min(v['count'], max_count) for v in progress.values())
+                pct = max(0, min(99, round(100*done_units/total)))
+                yield f"event: source\ndata: {json.dumps(st, ensure_ascii=False)}\n\n"
+                yield f"event: progress\ndata: {pct}\n\n"
+                if kind == 'item' and pace_ms:
+                    time.sleep(pace_ms/1000.0)
+            yield f"event: done\ndata: 已完成，{len(crawlers)}个来源共{sent}条\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {str(e)}\n\n"
+        finally:
+            stop.set()
+
+    return Response(stream_with_context(_gen()), headers=_sse_headers())
 
 @bp.route('/collector/deep', methods=['POST'])
 @login_required
@@ -1038,92 +1270,64 @@ def collector_deep():
     item = data.get('item') or {}
     url = (item.get('original_url') or '').strip()
     deep_content = ''
+    truncated = ''
     try:
         if url.startswith('http://') or url.startswith('https://'):
-            import requests
-            from bs4 import BeautifulSoup
-            import re
-            r = requests.get(url, timeout=12, headers={
+            html, truncated = _fetch_html(url, {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0 Safari/537.36",
                 "Accept-Language": "zh-CN,zh;q=0.9"
-            })
-            if r.status_code == 200:
-                raw = r.content
-                # 优先从响应头、HTML meta 与 apparent_encoding 推断编码
-                enc = (r.encoding or '').lower()
-                if not enc:
-                    ct = r.headers.get('Content-Type') or ''
-                    m2 = re.search(r"charset=([a-zA-Z0-9_-]+)", ct, re.I)
-                    if m2:
-                        enc = (m2.group(1) or '').lower()
-                if not enc:
-                    m = re.search(rb'charset=([a-zA-Z0-9_-]+)', raw[:8192], re.I)
-                    if m:
-                        try:
-                            enc = m.group(1).decode('ascii', 'ignore').lower()
-                        except Exception:
-                            enc = ''
-                if not enc:
-                    try:
-                        enc = (getattr(r, 'apparent_encoding', '') or '').lower()
-                    except Exception:
-                        enc = ''
-                html = ''
-                try:
-                    from charset_normalizer import from_bytes
-                    res = from_bytes(raw).best()
-                    if res:
-                        html = str(res)
-                except Exception:
-                    html = ''
-                if not html:
-                    for e in [enc, 'utf-8', 'gb18030', 'gbk', 'gb2312', 'big5']:
-                        if not e:
-                            continue
-                        try:
-                            html = raw.decode(e, errors='ignore')
-                            break
-                        except Exception:
-                            continue
-                    if not html:
-                        html = raw.decode('utf-8', errors='ignore')
-                soup = BeautifulSoup(html, 'html.parser')
-                for t in soup(['script','style','noscript']):
-                    t.decompose()
-                candidates = []
-                selectors = [
-                    'article',
-                    'div[role="article"]',
-                    'div[id*="content"]',
-                    'div[class*="content"]',
-                    'div[id*="article"]',
-                    'div[class*="article"]',
-                    'div[id*="detail"]',
-                    'div[class*="detail"]'
-                ]
-                for sel in selectors:
-                    for el in soup.select(sel):
-                        txt = el.get_text(separator='\n', strip=True)
-                        if txt:
-                            candidates.append(txt)
-                if candidates:
-                    candidates.sort(key=lambda x: len(x), reverse=True)
-                    deep_content = candidates[0]
-                else:
-                    deep_content = soup.get_text(separator='\n', strip=True)
-                # 保留必要的换行，清理不可见字符与重复空白
-                deep_content = deep_content.replace('\u200b','').replace('\u200c','').replace('\u200d','')
-                deep_content = re.sub(r'[\t\r]', ' ', deep_content)
-                deep_content = re.sub(r'\n{3,}', '\n\n', deep_content)
-                deep_content = re.sub(r'\s{2,}', ' ', deep_content)
-                deep_content = deep_content.strip()[:15000]
-                deep_content = fix_mojibake(deep_content)
+            }, timeout=12)
+            if html:
+                # 文本密度正文抽取（单次遍历），见 density.py
+                deep_content = fix_mojibake(density.extract(html)['content'])
     except Exception:
         deep_content = ''
     item['deep_content'] = deep_content or ''
+    item['deep_truncated'] = truncated
     item['deep_collected'] = bool(item['deep_content'])
     return jsonify({'item': item})
 
+@bp.route('/collector/charset_stats')
+@login_required
+@admin_required
+def collector_charset_stats():
+    # 各解码路径（响应头/站点缓存/meta/探测器/兜底）的命中次数与已记忆的站点编码
+    return jsonify(charset.stats())
+
+@bp.route('/collector/rate_limits')
+@login_required
+@admin_required
+def collector_rate_limits():
+    # 各主机当前的限速速率、被限流次数与累计等待秒数
+    return jsonify(ratelimit.snapshot())
+
+@bp.route('/collector/schedules')
+@login_required
+@admin_required
+def collector_schedules():
+    entries = [{'source': k, 'keyword': kw, 'interval_minutes': interval, 'max_count': n}
+               for k, _, kw, interval, n in scheduler.schedule_entries()]
+    return jsonify({'entries': entries, 'watermarks': scheduler.watermark_status()})
+
+@bp.route('/collector/schedules/run', methods=['POST'])
+@login_required
+@admin_required
+def collector_schedules_run():
+    # 立即执行一次增量采集；未指定来源时运行所有到期的定时任务
+    data = request.get_json() or {}
+    source_key = (data.get('source') or '').strip().lower()
+    if not source_key:
+        sched = current_app.extensions.get('crawl_scheduler')
+        return jsonify({'results': sched.run_due() if sched else []})
+    keyword = (data.get('keyword') or '').strip()
+    max_count = int(data.get('max_count') or scheduler.DEFAULT_MAX_COUNT)
+    cfg = _source_config(CrawlerSource.query.filter_by(key=source_key).first())
+    try:
+        return jsonify({'results': [scheduler.crawl_incremental(source_key, keyword, config=cfg, max_count=max_count)]})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/collector/save', methods=['POST'])
 @login_required
 @admin_required
@@ -1131,42 +1335,49 @@ def collector_save():
     payload = request.get_json() or {}
     keyword = payload.get('keyword', '')
     items = payload.get('items') or []
-    saved_ids = []
-    for it in items:
-        rec = CollectionRecord(
-            keyword=keyword,
-            title=it.get('title') or '',
-            summary=it.get('summary') or '',
-            source=it.get('source') or '',
-            original_url=it.get('original_url') or '',
-            cover=it.get('cover') or '',
-            deep_collected=bool((it.get('deep_content') or '').strip()),
-            deep_content=(it.get('deep_content') or '')
-        )
-        db.session.add(rec)
-        db.session.commit()
-        saved_ids.append(rec.id)
-    return jsonify({'saved_ids': saved_ids})
+    # results 与 items 一一对应：saved 新增、updated 按 URL 命中已有记录并补全了内容、duplicate 已存在未改动
+    results = ingest.bulk_save(keyword, items)
+    return jsonify({
+        'results': results,
+        'saved_ids': [r['id'] for r in results if r['status'] == 'saved'],
+        'updated_ids': [r['id'] for r in results if r['status'] == 'updated'],
+        'duplicate_ids': [r['id'] for r in results if r['status'] == 'duplicate'],
+    })
 
 @bp.route('/data_warehouse')
 @login_required
 @admin_required
 def data_warehouse():
-    page = int(request.args.get('page') or 1)
-    per_page = int(request.args.get('per_page') or 10)
+    per_page = max(1, min(200, int(request.args.get('per_page') or 10)))
     q = (request.args.get('q') or '').strip()
     src = (request.args.get('source') or '').strip()
+    # collapse=1 时隐藏近似重复（duplicate_of 非空）的记录
+    collapse = (request.args.get('collapse') or '') == '1'
+    # cursor 为上一页/下一页链接中的不透明游标；count=1 时才计算总数（按条件缓存）
+    cursor = request.args.get('cursor') or ''
+    want_count = (request.args.get('count') or '') == '1'
     base_query = CollectionRecord.query
-    if q:
-        base_query = base_query.filter(
-            (CollectionRecord.title.ilike(f'%{q}%')) |
-            (CollectionRecord.summary.ilike(f'%{q}%'))
-        )
+    if collapse:
+        base_query = base_query.filter(CollectionRecord.duplicate_of.is_(None))
+    # 全文检索标题、摘要与正文，有检索词时按相关度排序
+    base_query, ranked = search.apply(base_query, q)
     if src:
         base_query = base_query.filter(CollectionRecord.source == src)
-    total = base_query.count()
-    records = base_query.order_by(CollectionRecord.id.asc()).offset((page-1)*per_page).limit(per_page).all()
-    return render_template('admin/data_warehouse.html', records=records, total=total, page=page, per_page=per_page, q=q, source=src)
+    scope = pagination.scope_key(str(db.engine.url), q, src, collapse, ranked)
+    total, total_cached = pagination.cached_count(base_query, scope) if want_count else (None, False)
+    if ranked:
+        rank = search.order_by_rank()
+        page = pagination.paginate(base_query.add_columns(rank), [rank, CollectionRecord.id],
+                                   lambda row: (row[1], row[0].id), per_page, cursor, scope)
+        records = [row[0] for row in page.items]
+    else:
+        # (created_at, id) 与 created_at / (source, created_at) 索引顺序一致，按游标直接在索引上定位
+        page = pagination.paginate(base_query, [CollectionRecord.created_at, CollectionRecord.id],
+                                   lambda r: (r.created_at, r.id), per_page, cursor, scope)
+        records = page.items
+    snippets = search.snippets([r.id for r in records], q) if q else {}
+    return render_template('admin/data_warehouse.html', records=records, page=page, total=total, total_cached=total_cached,
+                           per_page=per_page, q=q, source=src, collapse=collapse, snippets=snippets)
 
 @bp.route('/data_warehouse/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -1174,25 +1385,34 @@ def data_warehouse():
 def edit_record(id):
     record = CollectionRecord.query.get_or_404(id)
     if request.method == 'POST':
-        record.title = request.form.get('title') or ''
-        record.summary = request.form.get('summary') or ''
-        record.source = request.form.get('source') or ''
-        record.original_url = request.form.get('original_url') or ''
-        record.cover = request.form.get('cover') or ''
-        record.deep_content = request.form.get('deep_content') or ''
-        record.deep_collected = bool(request.form.get('deep_collected'))
-        db.session.commit()
+        fields = {k: request.form.get(k) or '' for k in ('title', 'summary', 'source', 'original_url', 'cover', 'deep_content')}
+        fields['deep_collected'] = bool(request.form.get('deep_collected'))
+        storage.write(_update_record, id, fields)
         flash('记录已更新')
         return redirect(url_for('admin.data_warehouse'))
     return render_template('admin/edit_record.html', record=record)
 
+def _update_record(id, fields):
+    record = CollectionRecord.query.get(id)
+    if record is None:
+        return
+    for k, v in fields.items():
+        setattr(record, k, v)
+    dedup.stamp(record)
+    near_dup.link(record)
+
+def _delete_record(id):
+    record = CollectionRecord.query.get(id)
+    if record is not None:
+        near_dup.unlink(id)
+        db.session.delete(record)
+
 @bp.route('/data_warehouse/delete/<int:id>')
 @login_required
 @admin_required
 def delete_record(id):
-    record = CollectionRecord.query.get_or_404(id)
-    db.session.delete(record)
-    db.session.commit()
+    CollectionRecord.query.get_or_404(id)
+    storage.write(_delete_record, id)
     flash('记录已删除')
     return redirect(url_for('admin.data_warehouse'))
 
@@ -1225,167 +1445,130 @@ def _parse_headers_dict(s):
     except Exception:
         return {}
 
+def _resolve_record_urls(recs):
+    # 把记录中的跳转链接换成最终地址（先查映射表，未命中的并发解析）并重算去重哈希；经写线程提交，
+    # 调用方会话中的记录随后过期，下次访问时重新读取
+    recs = [r for r in recs if r is not None and resolver.is_redirect_link(r.original_url)]
+    if not recs:
+        return 0
+    mapping = resolver.resolve_many([r.original_url for r in recs])
+    pairs = [(r.id, mapping.get(r.original_url)) for r in recs if (mapping.get(r.original_url) or r.original_url) != r.original_url]
+    if not pairs:
+        return 0
+    storage.write(_rewrite_urls, pairs)
+    for r in recs:
+        db.session.expire(r)
+    return len(pairs)
+
+def _rewrite_urls(pairs):
+    for rid, final in pairs:
+        rec = CollectionRecord.query.get(rid)
+        if rec is not None:
+            rec.original_url = final
+            dedup.stamp(rec)
+
 def _match_rule_for_record(record):
-    src = (record.source or '').strip().lower()
-    domain = urlparse(record.original_url or '').netloc.lower()
-    candidates = CollectionRule.query.all()
-    best = None
-    for r in candidates:
-        nm = (r.site_name or '').strip().lower()
-        st = (r.site or '').strip().lower()
-        if nm and nm in src:
-            best = r
-            break
-        if st and st and (st in domain or domain.endswith(st)):
-            best = r
-    if best and domain and best.site and best.site.lower() not in domain:
-        try:
-            best.site = domain
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-    return best
+    # 经进程内规则索引匹配（站点名称优先，其次域名最长后缀），返回规则的只读副本
+    return rule_index.match(record.source, record.original_url)
+
+def _fetch_html(url, headers, timeout=20):
+    # 有界流式下载：限制字节数、总时长与 Content-Type，收到足够的可见文本即停止读取；
+    # 返回 (html, 截断原因)，非 HTML 响应返回空文本与 content_type
+    resp = http_client.fetch(url, headers=headers, timeout=timeout, enough=density.TextMeter())
+    if resp.rejected:
+        return '', 'content_type'
+    if resp.status_code != 200:
+        return '', ''
+    return charset.decode_response(resp), resp.truncated
 
 def _extract_with_rule(url, rule):
-    import requests
     html_text = ''
+    truncated = ''
     headers = _parse_headers_dict(rule.headers_json or '')
     if 'User-Agent' not in headers:
         headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36'
     try:
-        resp = requests.get(url, headers=headers, timeout=20)
-        if resp.status_code == 200:
-            html_text = resp.text
+        html_text, truncated = _fetch_html(url, headers)
     except Exception:
         pass
     if not html_text:
-        return {'title': '', 'content': ''}
-    title_sel = rule.title_xpath or ''
-    content_sel = rule.content_xpath or ''
-    extracted = {'title': '', 'content': ''}
-    try:
-        from lxml import html as lxml_html
-        doc = lxml_html.fromstring(html_text)
-        if title_sel:
-            t_nodes = doc.xpath(title_sel)
-            if t_nodes:
-                t = t_nodes[0]
-                extracted['title'] = t.text_content().strip() if hasattr(t, 'text_content') else str(t).strip()
-        if content_sel:
-            c_nodes = doc.xpath(content_sel)
-            if c_nodes:
-                txts = []
-                for n in c_nodes:
-                    txts.append(n.text_content().strip() if hasattr(n, 'text_content') else str(n).strip())
-                extracted['content'] = '\n\n'.join([t for t in txts if t])
-    except Exception:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html_text, 'html.parser')
-        if not extracted['title']:
-            tt = soup.find('title')
-            extracted['title'] = (tt.get_text(strip=True) if tt else '')
-        if not extracted['content']:
-            art = soup.find('article') or soup.find(attrs={'id': re.compile('content|article|detail', re.I)}) or soup.find(attrs={'class': re.compile('content|article|detail', re.I)})
-            if art:
-                extracted['content'] = art.get_text('\n', strip=True)
-            else:
-                bod = soup.find('body')
-                extracted['content'] = bod.get_text('\n', strip=True) if bod else ''
-    extracted['title'] = re.sub(r"\s+", " ", extracted['title']).strip()
-    return extracted
+        return {'title': '', 'content': '', 'truncated': truncated}
+    ext = extractor.extract(html_text, rule)
+    ext['truncated'] = truncated
+    return ext
 
 def _generic_extract(url):
-    import requests, re
-    from bs4 import BeautifulSoup
     html = ''
+    truncated = ''
     try:
-        resp = requests.get(url, timeout=20, headers={
+        html, truncated = _fetch_html(url, {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36',
             'Accept-Language': 'zh-CN,zh;q=0.9'
         })
-        if resp.status_code == 200:
-            raw = resp.content
-            enc = (resp.encoding or '').lower()
-            if not enc:
-                ct = resp.headers.get('Content-Type') or ''
-                m2 = re.search(r"charset=([a-zA-Z0-9_-]+)", ct, re.I)
-                if m2:
-                    enc = (m2.group(1) or '').lower()
-            if not enc:
-                m = re.search(rb'charset=([a-zA-Z0-9_-]+)', raw[:8192], re.I)
-                if m:
-                    try:
-                        enc = m.group(1).decode('ascii', 'ignore').lower()
-                    except Exception:
-                        enc = ''
-            if not enc:
-                try:
-                    from charset_normalizer import from_bytes
-                    res = from_bytes(raw).best()
-                    if res:
-                        html = str(res)
-                except Exception:
-                    html = ''
-            if not html:
-                for e in [enc, 'utf-8', 'gb18030', 'gbk', 'gb2312', 'big5']:
-                    if not e:
-                        continue
-                    try:
-                        html = raw.decode(e, errors='ignore')
-                        break
-                    except Exception:
-                        continue
-                if not html:
-                    html = raw.decode('utf-8', errors='ignore')
     except Exception:
         html = ''
     if not html:
-        return {'title': '', 'content': ''}
-    soup = BeautifulSoup(html, 'html.parser')
-    for t in soup(['script','style','noscript']):
-        t.decompose()
-    candidates = []
-    selectors = [
-        'article',
-        'div[role="article"]',
-        'div[id*="content"]',
-        'div[class*="content"]',
-        'div[id*="article"]',
-        'div[class*="article"]',
-        'div[id*="detail"]',
-        'div[class*="detail"]'
-    ]
-    for sel in selectors:
-        for el in soup.select(sel):
-            txt = el.get_text(separator='\n', strip=True)
-            if txt:
-                candidates.append(txt)
-    if candidates:
-        candidates.sort(key=lambda x: len(x), reverse=True)
-        content = candidates[0]
-    else:
-        content = soup.get_text(separator='\n', strip=True)
-    content = content.replace('\u200b','').replace('\u200c','').replace('\u200d','')
-    content = re.sub(r'[\t\r]', ' ', content)
-    content = re.sub(r'\n{3,}', '\n\n', content)
-    content = re.sub(r'\s{2,}', ' ', content)
-    content = content.strip()[:15000]
-    tt = soup.find('title')
-    title = (tt.get_text(strip=True) if tt else '')
-    title = re.sub(r"\s+", " ", title).strip()
-    return {'title': title, 'content': content}
+        return {'title': '', 'content': '', 'truncated': truncated}
+    ext = density.extract(html)
+    ext['truncated'] = truncated
+    return ext
+
+_DEEP_UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36'
+
+def _deep_extract(url, rule):
+    # 返回 (抽取结果, 规则是否未抽到正文)；只做网络请求与解析，可在工作线程中执行
+    ext = None
+    rule_failed = False
+    if rule:
+        ext = _extract_with_rule(url, rule)
+        rule_failed = not ext.get('content')
+    if not ext or not ext.get('content'):
+        ext = _generic_extract(url)
+    return ext, rule_failed
+
+def _ensure_rule_user_agent(rule):
+    # 规则抽取失败时，为缺少 User-Agent 的规则补上默认值（不提交）；rule 可为索引中的只读副本
+    rule = CollectionRule.query.get(rule.id) if rule else None
+    if not rule:
+        return
+    hdrs = _parse_headers_dict(rule.headers_json or '')
+    if 'User-Agent' not in hdrs:
+        hdrs['User-Agent'] = _DEEP_UA
+        rule.headers_json = json.dumps(hdrs, ensure_ascii=False)
+        rule_index.invalidate()
+
+def _apply_deep_result(rec, ext):
+    rec.deep_content = ext.get('content') or ''
+    if ext.get('title'):
+        rec.title = ext.get('title')
+        dedup.stamp(rec)
+    rec.deep_collected = bool(rec.deep_content)
+    near_dup.link(rec)
+    return rec.deep_collected
+
+def _save_deep_results(rows):
+    # 经写线程提交：rows 为 [(记录 id, 抽取结果, 需补 User-Agent 的规则或 None)]
+    for rid, ext, rule in rows:
+        if rule is not None:
+            _ensure_rule_user_agent(rule)
+        rec = CollectionRecord.query.get(rid)
+        if rec is not None:
+            _apply_deep_result(rec, ext)
+
+def _parse_ids(ids):
+    if isinstance(ids, str):
+        try:
+            return [int(x) for x in ids.split(',') if x.strip()]
+        except Exception:
+            return []
+    return list(ids or [])
 
 @bp.route('/data_warehouse/deep_collect', methods=['POST'])
 @login_required
 @admin_required
 def data_warehouse_deep_collect():
     data = request.get_json(silent=True) or {}
-    ids = data.get('ids') or []
-    if isinstance(ids, str):
-        try:
-            ids = [int(x) for x in ids.split(',') if x.strip()]
-        except Exception:
-            ids = []
+    ids = _parse_ids(data.get('ids'))
     updated = []
     failed = []
     if not ids:
@@ -1396,34 +1579,139 @@ def data_warehouse_deep_collect():
             if not rec or not (rec.original_url or '').strip():
                 failed.append(rid)
                 continue
+            try:
+                _resolve_record_urls([rec])
+            except Exception:
+                pass
             rule = _match_rule_for_record(rec)
-            ext = None
-            if rule:
-                ext = _extract_with_rule(rec.original_url or '', rule)
-                if not ext.get('content'):
-                    try:
-                        hdrs = _parse_headers_dict(rule.headers_json or '')
-                        if 'User-Agent' not in hdrs:
-                            hdrs['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36'
-                            rule.headers_json = json.dumps(hdrs, ensure_ascii=False)
-                            db.session.commit()
-                    except Exception:
-                        db.session.rollback()
-            if not ext or not ext.get('content'):
-                ext = _generic_extract(rec.original_url or '')
-            rec.deep_content = ext.get('content') or ''
-            if ext.get('title'):
-                rec.title = ext.get('title')
-            rec.deep_collected = bool(rec.deep_content)
-            db.session.commit()
-            if rec.deep_collected:
+            ext, rule_failed = _deep_extract(rec.original_url or '', rule)
+            storage.write(_save_deep_results, [(rid, ext, rule if rule_failed else None)])
+            if ext.get('content'):
                 updated.append(rid)
             else:
                 failed.append(rid)
         except Exception:
-            try:
-                db.session.rollback()
-            except Exception:
-                pass
             failed.append(rid)
     return jsonify({'status': 'ok', 'updated': updated, 'failed': failed})
+
+@bp.route('/data_warehouse/resolve_links', methods=['POST'])
+@login_required
+@admin_required
+def data_warehouse_resolve_links():
+    # 批量解析已入库记录中的跳转链接：每次处理 limit 条，返回已替换条数、仍可解析的剩余条数，
+    # 以及解析失败、在重试冷却期内暂不处理的条数（不计入剩余，避免界面一直提示继续解析）
+    data = request.get_json(silent=True) or {}
+    limit = max(1, min(500, int(data.get('limit') or 200)))
+    conds = [CollectionRecord.original_url.like(f'%{domain}%{prefix}%')
+             for domain, prefixes in resolver.REDIRECT_LINKS.items() for prefix in prefixes]
+
+    def _pending():
+        # LIKE 只做粗筛，再按主机与路径精确判断
+        rows = [(rid, url) for rid, url in db.session.query(CollectionRecord.id, CollectionRecord.original_url)
+                .filter(db.or_(*conds)).order_by(CollectionRecord.id.desc()) if resolver.is_redirect_link(url)]
+        failed = resolver.failed_links([url for _, url in rows])
+        return [rid for rid, url in rows if url not in failed], sum(1 for _, url in rows if url in failed)
+    pending, _ = _pending()
+    recs = CollectionRecord.query.filter(CollectionRecord.id.in_(pending[:limit])).all() if pending else []
+    try:
+        changed = _resolve_record_urls(recs)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    pending, failed = _pending()
+    return jsonify({'status': 'ok', 'resolved': changed, 'remaining': len(pending), 'failed': failed})
+
+@bp.route('/data_warehouse/deep_collect/stream')
+@login_required
+@admin_required
+def data_warehouse_deep_collect_stream():
+    # 并行深度采集：抓取与抽取在有界线程池中执行（每个主机同时最多 per_host 个请求），
+    # 结果按 batch_size 条一批写回数据库，每完成一条即通过 SSE 推送 record 事件
+    from flask import Response
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    ids = _parse_ids(request.args.get('ids') or '')
+    concurrency = max(1, min(16, int(request.args.get('concurrency') or 6)))
+    per_host = max(1, min(8, int(request.args.get('per_host') or 2)))
+    batch_size = max(1, int(request.args.get('batch_size') or 20))
+    def _gen():
+        updated, failed = [], []
+        total = len(ids)
+        recs = {r.id: r for r in CollectionRecord.query.filter(CollectionRecord.id.in_(ids)).all()} if ids else {}
+        # 跳转链接先批量解析为最终地址，规则才能按域名匹配
+        try:
+            _resolve_record_urls(recs.values())
+        except Exception:
+            pass
+        tasks = []
+        for rid in ids:
+            rec = recs.get(rid)
+            if not rec or not (rec.original_url or '').strip():
+                failed.append(rid)
+                continue
+            tasks.append((rid, rec.original_url, _match_rule_for_record(rec)))
+        # 结束只读事务，等待网络结果期间不占用数据库
+        db.session.close()
+        yield f"event: status\ndata: 共{total}条，并发{concurrency}，单站点{per_host}\n\n"
+        for rid in failed:
+            yield f"event: record\ndata: {json.dumps({'id': rid, 'status': 'failed', 'error': '记录不存在或无原文链接'}, ensure_ascii=False)}\n\n"
+        slots = {}
+        slots_lock = threading.Lock()
+        def _run(url, rule):
+            host = (urlparse(url).hostname or '').lower()
+            with slots_lock:
+                sem = slots.setdefault(host, threading.BoundedSemaphore(per_host))
+            with sem:
+                return _deep_extract(url, rule)
+        batch = []
+        def _flush():
+            # 一批结果一个事务（经写线程提交）；失败时逐条重试，只有出错的记录计为失败
+            if not batch:
+                return []
+            lost = []
+            try:
+                storage.write(_save_deep_results, list(batch))
+            except Exception:
+                for rid, ext, rule in batch:
+                    try:
+                        storage.write(_save_deep_results, [(rid, ext, None)])
+                    except Exception:
+                        lost.append(rid)
+            del batch[:]
+            for rid in lost:
+                if rid in updated:
+                    updated.remove(rid)
+                    failed.append(rid)
+            return lost
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        futures = {pool.submit(_run, url, rule): (rid, rule) for rid, url, rule in tasks}
+        try:
+            for fut in as_completed(futures):
+                rid, rule = futures[fut]
+                err = None
+                try:
+                    ext, rule_failed = fut.result()
+                except Exception as e:
+                    ext, rule_failed, err = {'title': '', 'content': ''}, False, str(e)
+                ok = bool(ext.get('content'))
+                (updated if ok else failed).append(rid)
+                batch.append((rid, ext, rule if rule_failed else None))
+                info = {'id': rid, 'status': 'updated' if ok else 'failed', 'title': ext.get('title') or '', 'length': len(ext.get('content') or '')}
+                if ext.get('truncated'):
+                    info['truncated'] = ext['truncated']
+                if err:
+                    info['error'] = err
+                yield f"event: record\ndata: {json.dumps(info, ensure_ascii=False)}\n\n"
+                yield f"event: progress\ndata: {round(100*(len(updated)+len(failed))/max(total, 1))}\n\n"
+                if len(batch) >= batch_size:
+                    for lost in _flush():
+                        yield f"event: record\ndata: {json.dumps({'id': lost, 'status': 'failed', 'error': '保存失败'}, ensure_ascii=False)}\n\n"
+            for lost in _flush():
+                yield f"event: record\ndata: {json.dumps({'id': lost, 'status': 'failed', 'error': '保存失败'}, ensure_ascii=False)}\n\n"
+            yield f"event: done\ndata: {json.dumps({'updated': updated, 'failed': failed})}\n\n"
+        finally:
+            # 客户端断开时保存已完成的结果，并取消尚未开始的抓取
+            for f in futures:
+                f.cancel()
+            pool.shutdown(wait=False)
+            _flush()
+    return Response(stream_with_context(_gen()), headers=_sse_headers())
@@ -0,0 +1,113 @@
+import re
+import threading
+from urllib.parse import urlparse
+
+# 统一的网页解码：响应头 charset -> meta 声明 -> 站点编码记忆 -> charset_normalizer 探测 -> 常见编码兜底
+# 每个域名记住上次成功的编码，只在页面没有显式声明时代替探测器；宽松的 gb18030 也能“解开” UTF-8 字节，
+# 所以记忆不能盖过页面自己的声明
+_HEADER_CHARSET = re.compile(r'charset=["\']?([a-zA-Z0-9_-]+)', re.I)
+_META_CHARSET = re.compile(rb'charset=["\']?([a-zA-Z0-9_-]+)', re.I)
+_FALLBACKS = ['utf-8', 'gb18030', 'big5']
+# GB 系列统一按超集 gb18030 解码，避免声明为 gb2312 的页面出现生僻字乱码
+_ALIASES = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'x-gbk': 'gb18030', 'utf8': 'utf-8'}
+
+
+def normalize_encoding(enc):
+    # charset_normalizer 返回 Python 编解码器名（如 utf_8），统一成连字符写法
+    e = (enc or '').strip().lower().replace('_', '-')
+    return _ALIASES.get(e, e)
+
+
+class CharsetDecoder:
+    def __init__(self, max_bad_ratio=0.001):
+        self.max_bad_ratio = max_bad_ratio
+        self._lock = threading.Lock()
+        self._domains = {}
+        self.stats = {'header': 0, 'cache': 0, 'meta': 0, 'detector': 0, 'fallback': 0}
+
+    def _try(self, raw, enc):
+        # 严格解码失败时允许极少量坏字节（如截断的多字节字符），超出则视为编码不对
+        enc = normalize_encoding(enc)
+        if not enc:
+            return None
+        try:
+            return raw.decode(enc)
+        except LookupError:
+            return None
+        except UnicodeDecodeError:
+            text = raw.decode(enc, errors='replace')
+            if text.count('�') <= max(2, len(text) * self.max_bad_ratio):
+                return text
+            return None
+
+    def _hit(self, path, domain, enc):
+        with self._lock:
+            self.stats[path] += 1
+            if domain and enc:
+                self._domains[domain] = normalize_encoding(enc)
+
+    def domain_encoding(self, domain):
+        return self._domains.get((domain or '').lower())
+
+    def decode(self, raw, url='', content_type=''):
+        if not raw:
+            return ''
+        domain = (urlparse(url or '').hostname or '').lower()
+        m = _HEADER_CHARSET.search(content_type or '')
+        if m:
+            text = self._try(raw, m.group(1))
+            if text is not None:
+                self._hit('header', domain, m.group(1))
+                return text
+        m = _META_CHARSET.search(raw[:8192])
+        if m:
+            enc = m.group(1).decode('ascii', 'ignore')
+            text = self._try(raw, enc)
+            if text is not None:
+                self._hit('meta', domain, enc)
+                return text
+        cached = self._domains.get(domain) if domain else None
+        if cached:
+            text = self._try(raw, cached)
+            if text is not None:
+                self._hit('cache', None, None)
+                return text
+        try:
+            from charset_normalizer import from_bytes
+            best = from_bytes(raw).best()
+            if best and best.encoding:
+                text = self._try(raw, best.encoding)
+                if text is not None:
+                    self._hit('detector', domain, best.encoding)
+                    return text
+        except Exception:
+            pass
+        for enc in _FALLBACKS:
+            text = self._try(raw, enc)
+            if text is not None:
+                self._hit('fallback', domain, enc)
+                return text
+        self._hit('fallback', None, None)
+        return raw.decode('utf-8', errors='ignore')
+
+    def decode_response(self, resp):
+        return self.decode(resp.content or b'', url=getattr(resp, 'url', '') or '', content_type=(resp.headers.get('Content-Type') or ''))
+
+    def snapshot(self):
+        with self._lock:
+            return {'paths': dict(self.stats), 'domains': dict(self._domains)}
+
+
+decoder = CharsetDecoder()
+
+
+def decode(raw, url='', content_type=''):
+    return decoder.decode(raw, url=url, content_type=content_type)
+
+
+def decode_response(resp):
+    return decoder.decode_response(resp)
+
+
+def stats():
+    return decoder.snapshot()
@@ -1,10 +1,34 @@
-import requests
 from bs4 import BeautifulSoup
-import random
-import time
+from concurrent.futures import ThreadPoolExecutor
+from . import http_client, http_cache, fast_parse, charset, ratelimit, resolver, text_clean
 
 _CRAWLER_REGISTRY = {}
 
+def _ordered_pages(fetch_page, pages, concurrency=1, prefetch=None):
+    # 并发翻页：窗口内同时请求多页，但始终按页序产出 (page, result)
+    # prefetch 为预计需要的页数，超过后退化为逐页请求，避免无谓的多余请求
+    pages = list(pages)
+    if concurrency <= 1:
+        for p in pages:
+            yield p, fetch_page(p)
+        return
+    ahead = max(1, prefetch or len(pages))
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    futures = {}
+    nxt = 0
+    try:
+        for i, p in enumerate(pages):
+            limit = min(len(pages), i + concurrency, max(ahead, i + 1))
+            while nxt < limit:
+                futures[nxt] = pool.submit(fetch_page, pages[nxt])
+                nxt += 1
+            yield p, futures.pop(i).result()
+    finally:
+        # 调用方提前结束时取消尚未开始的页
+        for f in futures.values():
+            f.cancel()
+        pool.shutdown(wait=False)
+
 def register_crawler(key, cls):
     _CRAWLER_REGISTRY[key] = cls
 
@@ -23,6 +47,22 @@ def create_crawler(key, config=None):
         return XinhuaCrawler(config=config)
     raise ValueError(f"未注册的爬虫 key: {key}")
 
+def _search_config(cfg):
+    # 新华/新浪的站点搜索回退使用百度采集器：优先本来源 config_json 中的 search 配置，
+    # 否则沿用 baidu 采集源的配置（入口地址、限速等），未配置时为默认的线上地址
+    search = (cfg or {}).get('search')
+    if isinstance(search, dict):
+        return search
+    try:
+        import json
+        from .models import CrawlerSource
+        row = CrawlerSource.query.filter_by(key='baidu').first()
+        if row and (row.config_json or '').strip():
+            return json.loads(row.config_json)
+    except Exception:
+        pass
+    return None
+
 class BaiduCrawler:
     def __init__(self, config=None):
         cfg = config or {}
@@ -47,69 +87,93 @@ class BaiduCrawler:
             "Upgrade-Insecure-Requests": "1",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.5845.97 Safari/537.36"
         }
+        # 并发翻页上限，1 表示逐页请求；请求节奏统一由按主机的自适应限速器控制
+        self.concurrency = max(1, int(cfg.get('concurrency') or 3))
+        self.cleaner = text_clean.cleaner_for('baidu', cfg.get('clean'))
+        self.max_pages = max(1, int(cfg.get('max_pages') or 5)) # 安全限制，默认最多翻5页
+        # 列表解析引擎：bs4（默认）或 lxml
+        self.parser = (cfg.get('parser') or 'bs4').strip().lower()
+        # rate_limit: {"rate": 每秒请求数, "burst": 突发上限, "min_rate": .., "max_rate": ..}
+        ratelimit.configure_urls(cfg.get('rate_limit'), self.base_url)
+
+    def _page_params(self, keyword, page):
+        return {
+            "rtt": "1",
+            "bsst": "1",
+            "cl": "2",
+            "tn": "news",
+            "rsv_dl": "ns_pc",
+            "word": keyword,
+            "pn": str(page * 10)
+        }
+
+    def _fetch_page(self, keyword, page):
+        # 返回 (状态码, 清洗后的条目, 异常)，在线程池中执行
+        try:
+            response = http_client.get(
+                self.base_url,
+                headers=self.headers,
+                params=self._page_params(keyword, page),
+                timeout=10
+            )
+            if ratelimit.is_block_page(response):
+                # 安全验证/限流页：限速器已自动退避，本轮停止翻页
+                return response.status_code, [], RuntimeError('百度安全验证拦截，已降低请求速率')
+            if response.status_code != 200:
+                return response.status_code, [], None
+            # 调试：保存HTML到文件以分析结构
+            # with open(f"debug_baidu_{page}.html", "w", encoding="utf-8") as f:
+            #     f.write(response.text)
+            items = self.parse_html(response.text)
+            return 200, self.clean_results(items), None
+        except Exception as e:
+            return 0, [], e
+
+    def _iter_pages(self, keyword, max_count):
+        # 按页序产出每页结果；限速器只在令牌不足或被拦截退避时等待，不再固定随机延迟
+        prefetch = max(1, -(-max_count // 10))
+        return _ordered_pages(
+            lambda p: self._fetch_page(keyword, p),
+            range(self.max_pages),
+            concurrency=self.concurrency,
+            prefetch=prefetch
+        )
 
     def fetch_data(self, keyword, max_count=30):
         # 空关键词时使用默认词，保证可输出
         if not (keyword or '').strip():
             keyword = '新闻'
         all_results = []
-        page = 0
-        
-        while len(all_results) < max_count:
-            pn = page * 10
-            print(f"Fetching page {page + 1} (pn={pn})...")
-            
-            params = {
-                "rtt": "1",
-                "bsst": "1",
-                "cl": "2",
-                "tn": "news",
-                "rsv_dl": "ns_pc",
-                "word": keyword,
-                "pn": str(pn)
-            }
-            
-            try:
-                response = requests.get(
-                    self.base_url, 
-                    headers=self.headers, 
-                    params=params,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    # 调试：保存HTML到文件以分析结构
-                    # with open(f"debug_baidu_{page}.html", "w", encoding="utf-8") as f:
-                    #     f.write(response.text)
-                    
-                    new_results = self.parse_html(response.text)
-                    new_results = self.clean_results(new_results)
-                    if not new_results:
-                        print("No more results found on this page.")
-                        break
-                        
-                    all_results.extend(new_results)
-                    print(f"Found {len(new_results)} items on page {page + 1}. Total: {len(all_results)}")
-                    
-                    if len(new_results) < 5: # 如果一页少于5条，可能没数据了
-                         print("Results count too low, stopping pagination.")
-                         break
-                         
-                else:
-                    print(f"Error: Status code {response.status_code}")
-                    break
-                    
-            except Exception as e:
-                print(f"Exception occurred: {e}")
+        reached_limit = True
+
+        for page, (status, new_results, err) in self._iter_pages(keyword, max_count):
+            print(f"Fetching page {page + 1} (pn={page * 10})...")
+            if err is not None:
+                print(f"Exception occurred: {err}")
+                reached_limit = False
                 break
-            
-            page += 1
-            time.sleep(random.uniform(1, 2)) # 随机延迟，避免被封
-            
-            if page >= 5: # 安全限制，最多翻5页
-                print("Reached maximum page limit (5).")
+            if status != 200:
+                print(f"Error: Status code {status}")
+                reached_limit = False
                 break
-                
+            if not new_results:
+                print("No more results found on this page.")
+                reached_limit = False
+                break
+
+            all_results.extend(new_results)
+            print(f"Found {len(new_results)} items on page {page + 1}. Total: {len(all_results)}")
+
+            if len(new_results) < 5: # 如果一页少于5条，可能没数据了
+                print("Results count too low, stopping pagination.")
+                reached_limit = False
+                break
+            if len(all_results) >= max_count:
+                reached_limit = False
+                break
+
+        if reached_limit:
+            print(f"Reached maximum page limit ({self.max_pages}).")
         return all_results[:max_count]
 
     def iter_data(self, keyword, max_count=30):
@@ -117,31 +181,24 @@ class BaiduCrawler:
         if not (keyword or '').strip():
             keyword = '新闻'
         count = 0
-        page = 0
-        while count < max_count:
-            pn = page * 10
-            params = {"rtt":"1","bsst":"1","cl":"2","tn":"news","rsv_dl":"ns_pc","word":keyword,"pn":str(pn)}
-            try:
-                response = requests.get(self.base_url, headers=self.headers, params=params, timeout=10)
-                if response.status_code != 200:
-                    break
-                items = self.parse_html(response.text)
-                items = self.clean_results(items)
-                if not items:
-                    break
-                for it in items:
-                    yield it
-                    count += 1
-                    if count >= max_count:
-                        break
-            except Exception:
-                break
-            page += 1
-            time.sleep(random.uniform(1, 2))
-            if page >= 5:
+        for _, (status, items, err) in self._iter_pages(keyword, max_count):
+            if err is not None or status != 200 or not items:
                 break
+            for it in items:
+                yield it
+                count += 1
+                if count >= max_count:
+                    return
 
     def parse_html(self, html_content):
+        # 配置 parser: lxml 时走预编译 XPath 快速路径，失败回退 BeautifulSoup
+        if self.parser == 'lxml':
+            try:
+                results = fast_parse.parse_baidu(html_content)
+                print(f"Parsed {len(results)} items (lxml)")
+                return results
+            except Exception as e:
+                print(f"lxml parse failed, fallback to BeautifulSoup: {e}")
         soup = BeautifulSoup(html_content, 'html.parser')
         results = []
         
@@ -228,62 +285,17 @@ class BaiduCrawler:
         return results
 
     def sanitize_text(self, text):
-        if not text:
-            return ""
-        t = str(text)
-        t = t.replace('\u200b', '').replace('\u200c', '').replace('\u200d', '')
-        t = ' '.join(t.split())
-        return t.strip()
+        return text_clean.sanitize(text)
 
     def is_noise_text(self, text):
-        if not text:
-            return True
-        t = self.sanitize_text(text)
-        if len(t) < 6:
-            return True
-        import re
-        valid = re.findall(r"[\u4e00-\u9fffA-Za-z0-9]", t)
-        ratio = (len(valid) / max(len(t), 1))
-        if ratio < 0.4:
-            return True
-        return False
+        return self.cleaner.is_noise(text_clean.sanitize(text))
 
     def clean_results(self, items):
-        cleaned = []
-        seen = set()
-        for it in items:
-            title = self.sanitize_text(it.get('title', ''))
-            summary = self.sanitize_text(it.get('summary', ''))
-            source = self.sanitize_text(it.get('source', ''))
-            cover = (it.get('cover') or '').strip()
-            url = (it.get('original_url') or '').strip()
-
-            if self.is_noise_text(title):
-                continue
-            if self.is_noise_text(summary):
-                summary = '无概要'
-            key = title.lower()
-            if key in seen:
-                continue
-            seen.add(key)
-
-            if not (url.startswith('http://') or url.startswith('https://')):
-                url = ''
-            if not (cover.startswith('http://') or cover.startswith('https://')):
-                cover = ''
-            if not cover:
-                cover = self.default_cover()
-            cleaned.append({
-                'title': title,
-                'summary': summary,
-                'cover': cover,
-                'original_url': url,
-                'source': source or '未知来源'
-            })
-        return cleaned
+        # 统一清洗管线（text_clean），整批处理
+        return self.cleaner.clean(items)
 
     def default_cover(self):
-        return 'https://dummyimage.com/242x162/18202D/ffffff&text=NEWS'
+        return self.cleaner.default_cover
 
     def to_display_schema(self, items):
         formatted = []
@@ -310,59 +322,60 @@ class XinhuaCrawler:
     def __init__(self, config=None):
         cfg = config or {}
         self.list_url = cfg.get('list_url') or "https://sc.news.cn/scyw.htm"
+        ratelimit.configure_urls(cfg.get('rate_limit'), self.list_url)
+        self.search_config = _search_config(cfg)
         self.headers = cfg.get('headers') or {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0 Safari/537.36",
             "Accept-Language": "zh-CN,zh;q=0.9"
         }
+        self.concurrency = max(1, int(cfg.get('concurrency') or 3))
+        self.cleaner = text_clean.cleaner_for('xinhua', cfg.get('clean'))
+        # 列表页条件请求缓存（ETag/Last-Modified/正文摘要），可通过 http_cache: false 关闭
+        self.use_cache = cfg.get('http_cache', True) is not False
+        self.parser = (cfg.get('parser') or 'bs4').strip().lower()
+
+    def _fetch_list(self, keyword=''):
+        # 抓取频道列表页并解析，按关键字过滤；列表未变化时复用缓存的解析结果
+        if self.use_cache:
+            parsed = http_cache.fetch_items(self.list_url, self._parse_list_response, headers=self.headers, timeout=12)
+        else:
+            r = http_client.get(self.list_url, headers=self.headers, timeout=12)
+            parsed = self._parse_list_response(r) if r.status_code == 200 else None
+        parsed = parsed or []
+        if keyword and keyword.strip():
+            kw = keyword.strip()
+            parsed = [it for it in parsed if (kw in it.get('title','')) or (kw in it.get('summary',''))]
+        return parsed
+
+    def _parse_list_response(self, r):
+        html = charset.decode_response(r)
+        return self.parse_html(html)
+
+    def _fetch_source(self, src, keyword, max_count):
+        # 频道列表或站点搜索补充，失败时返回空列表
+        try:
+            if src == 'list':
+                return self.clean_results(self._fetch_list(keyword))
+            bc = BaiduCrawler(config=self.search_config)
+            k = (keyword or '').strip()
+            return bc.fetch_data(f"{src} {k}".strip(), max_count=max_count) or []
+        except Exception:
+            return []
+
+    def _iter_sources(self, keyword, max_count, prefetch=None):
+        # 频道列表优先，站点搜索作为补充，避免列表页面结构变化无结果；三者可并发请求
+        return _ordered_pages(
+            lambda src: self._fetch_source(src, keyword, max_count),
+            ['list', 'site:news.cn', 'site:xinhuanet.com'],
+            concurrency=self.concurrency,
+            prefetch=prefetch
+        )
 
     def fetch_data(self, keyword='', max_count=30):
-        import requests, re
         try:
             items = []
-            # 始终先尝试频道列表，兼容关键字过滤
-            try:
-                r = requests.get(self.list_url, headers=self.headers, timeout=12)
-                if r.status_code == 200:
-                    raw = r.content
-                    enc = (r.encoding or '').lower()
-                    if not enc:
-                        m = re.search(rb'charset=([a-zA-Z0-9_-]+)', raw[:8192], re.I)
-                        if m:
-                            try:
-                                enc = m.group(1).decode('ascii', 'ignore').lower()
-                            except Exception:
-                                enc = ''
-                    if not enc:
-                        try:
-                            enc = (getattr(r, 'apparent_encoding', '') or '').lower()
-                        except Exception:
-                            enc = ''
-                    html = ''
-                    for e in [enc, 'utf-8', 'gb18030', 'gbk', 'gb2312']:
-                        if not e:
-                            continue
-                        try:
-                            html = raw.decode(e, errors='ignore')
-                            break
-                        except Exception:
-                            continue
-                    if not html:
-                        html = raw.decode('utf-8', errors='ignore')
-                    parsed = self.parse_html(html)
-                    if keyword and keyword.strip():
-                        kw = keyword.strip()
-                        parsed = [it for it in parsed if (kw in it.get('title','')) or (kw in it.get('summary',''))]
-                    items.extend(parsed)
-            except Exception:
-                pass
-            # 站点搜索作为补充，避免列表页面结构变化无结果
-            try:
-                bc = BaiduCrawler()
-                k = (keyword or '').strip()
-                items.extend(bc.fetch_data(f"site:news.cn {k}".strip()) or [])
-                items.extend(bc.fetch_data(f"site:xinhuanet.com {k}".strip()) or [])
-            except Exception:
-                pass
+            for _, part in self._iter_sources(keyword, max_count):
+                items.extend(part)
             items = self.clean_results(items)
             return items[:max_count]
         except Exception:
@@ -370,65 +383,25 @@ class XinhuaCrawler:
 
     def iter_data(self, keyword='', max_count=30):
         # 逐条迭代返回，便于SSE实时推送
-        import requests, re
         sent = 0
+        # 无关键字时频道列表通常已足够，站点搜索按需再请求
+        prefetch = 3 if (keyword or '').strip() else 1
         try:
-            # 频道列表优先
-            try:
-                r = requests.get(self.list_url, headers=self.headers, timeout=12)
-                if r.status_code == 200:
-                    raw = r.content
-                    enc = (r.encoding or '').lower()
-                    if not enc:
-                        m = re.search(rb'charset=([a-zA-Z0-9_-]+)', raw[:8192], re.I)
-                        if m:
-                            try:
-                                enc = m.group(1).decode('ascii', 'ignore').lower()
-                            except Exception:
-                                enc = ''
-                    html = ''
-                    for e in [enc, 'utf-8', 'gb18030', 'gbk', 'gb2312']:
-                        if not e:
-                            continue
-                        try:
-                            html = raw.decode(e, errors='ignore')
-                            break
-                        except Exception:
-                            continue
-                    if not html:
-                        html = raw.decode('utf-8', errors='ignore')
-                    parsed = self.parse_html(html)
-                    if keyword and keyword.strip():
-                        kw = keyword.strip()
-                        parsed = [it for it in parsed if (kw in it.get('title','')) or (kw in it.get('summary',''))]
-                    cleaned = self.clean_results(parsed)
-                    for it in cleaned:
-                        yield it
-                        sent += 1
-                        if sent >= max_count:
-                            return
-            except Exception:
-                pass
-            # 站点搜索补充
-            try:
-                bc = BaiduCrawler()
-                for it in bc.iter_data(f"site:news.cn {keyword}".strip(), max_count=max_count - sent):
+            for _, part in self._iter_sources(keyword, max_count, prefetch=prefetch):
+                for it in part:
                     yield it
                     sent += 1
                     if sent >= max_count:
                         return
-                for it in bc.iter_data(f"site:xinhuanet.com {keyword}".strip(), max_count=max_count - sent):
-                    yield it
-                    sent += 1
-                    if sent >= max_count:
-                        return
-            except Exception:
-                return
         except Exception:
             return
 
     def parse_html(self, html):
-        from bs4 import BeautifulSoup
+        if self.parser == 'lxml':
+            try:
+                return fast_parse.parse_xinhua(html)
+            except Exception:
+                pass
         soup = BeautifulSoup(html, 'html.parser')
         results = []
         items = soup.select('div.scpd_page_box li') or soup.select('li')
@@ -472,58 +445,17 @@ class XinhuaCrawler:
         return results
 
     def sanitize_text(self, text):
-        if not text:
-            return ""
-        t = str(text)
-        t = t.replace('\u200b', '').replace('\u200c', '').replace('\u200d', '')
-        t = ' '.join(t.split())
-        return t.strip()
+        return text_clean.sanitize(text)
 
     def is_noise_text(self, text):
-        if not text:
-            return True
-        t = self.sanitize_text(text)
-        if len(t) < 4:
-            return True
-        import re
-        valid = re.findall(r"[\u4e00-\u9fffA-Za-z0-9]", t)
-        ratio = (len(valid) / max(len(t), 1))
-        if ratio < 0.4:
-            return True
-        return False
+        return self.cleaner.is_noise(text_clean.sanitize(text))
 
     def default_cover(self):
-        return 'https://dummyimage.com/242x162/18202D/ffffff&text=NEWS'
+        return self.cleaner.default_cover
 
     def clean_results(self, items):
-        cleaned = []
-        seen = set()
-        for it in items:
-            title = self.sanitize_text(it.get('title', ''))
-            summary = self.sanitize_text(it.get('summary', ''))
-            source = self.sanitize_text(it.get('source', ''))
-            cover = (it.get('cover') or '').strip()
-            url = (it.get('original_url') or '').strip()
-            if self.is_noise_text(title):
-                continue
-            key = title.lower()
-            if key in seen:
-                continue
-            seen.add(key)
-            if not (url.startswith('http://') or url.startswith('https://')):
-                url = ''
-            if not (cover.startswith('http://') or cover.startswith('https://')):
-                cover = ''
-            if not cover:
-                cover = self.default_cover()
-            cleaned.append({
-                'title': title,
-                'summary': summary if not self.is_noise_text(summary) else '无概要',
-                'cover': cover,
-                'original_url': url,
-                'source': source or '新华网'
-            })
-        return cleaned
+        # 统一清洗管线（text_clean），整批处理
+        return self.cleaner.clean(items)
 
     def to_display_schema(self, items):
         formatted = []
@@ -544,121 +476,109 @@ class SinaCrawler:
     def __init__(self, config=None):
         cfg = config or {}
         self.api = cfg.get('api') or 'https://feed.mix.sina.com.cn/api/roll/get'
+        ratelimit.configure_urls(cfg.get('rate_limit'), self.api)
+        self.search_config = _search_config(cfg)
         self.pageid = int(cfg.get('pageid') or 153)
         self.lid = int(cfg.get('lid') or 2509)
         self.headers = cfg.get('headers') or {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0 Safari/537.36",
             "Accept-Language": "zh-CN,zh;q=0.9"
         }
+        self.concurrency = max(1, int(cfg.get('concurrency') or 3))
+        self.use_cache = cfg.get('http_cache', True) is not False
+        self.cleaner = text_clean.cleaner_for('sina', cfg.get('clean'))
+
+    def _fetch_feed_page(self, page, num):
+        # 返回该页原始 data 列表；请求失败或无数据时返回 None 以终止翻页
+        try:
+            params = {
+                'pageid': str(self.pageid),
+                'lid': str(self.lid),
+                'num': str(num),
+                'page': str(page)
+            }
+            if self.use_cache:
+                data = http_cache.fetch_items(self.api, self._parse_feed_response, headers=self.headers, params=params, timeout=12)
+            else:
+                r = http_client.get(self.api, headers=self.headers, params=params, timeout=12)
+                data = self._parse_feed_response(r) if r.status_code == 200 else None
+            return data or None
+        except Exception:
+            return None
+
+    def _parse_feed_response(self, r):
+        try:
+            js = r.json() or {}
+        except Exception:
+            return None
+        data = (js.get('result') or {}).get('data') or []
+        if not isinstance(data, list) or not data:
+            return None
+        return data
+
+    def _to_item(self, it):
+        images = it.get('images') or []
+        cover = ''
+        if isinstance(images, list) and images:
+            c = images[0]
+            cover = (c.get('img_url') or '').strip()
+        return {
+            'title': (it.get('title') or '').strip() or '无标题',
+            'summary': (it.get('intro') or '').strip() or '无概要',
+            'cover': cover,
+            'original_url': (it.get('url') or '').strip(),
+            'source': (it.get('media_name') or '新浪网').strip() or '新浪网'
+        }
+
+    def _iter_feed(self, kw, max_count):
+        # 按页序产出命中关键词的条目；各页使用固定 num 以便并发请求不同偏移
+        num = min(50, max(1, max_count))
+        # 无关键词时按条数估算页数；有关键词时命中率未知，窗口内全部预取
+        prefetch = -(-max_count // num) if not kw else None
+        for _, data in _ordered_pages(lambda p: self._fetch_feed_page(p, num), range(1, 6), concurrency=self.concurrency, prefetch=prefetch):
+            if data is None:
+                return
+            for it in data:
+                title = (it.get('title') or '').strip()
+                intro = (it.get('intro') or '').strip()
+                # 放宽过滤：关键词命中标题或简介；无关键词不过滤
+                if kw and (kw not in title) and (kw not in intro):
+                    continue
+                yield self._to_item(it)
 
     def fetch_data(self, keyword='', max_count=30):
-        import requests
         results = []
-        page = 1
         kw = (keyword or '').strip()
         try:
-            while len(results) < max_count and page <= 5:
-                params = {
-                    'pageid': str(self.pageid),
-                    'lid': str(self.lid),
-                    'num': str(min(50, max_count - len(results))),
-                    'page': str(page)
-                }
-                r = requests.get(self.api, headers=self.headers, params=params, timeout=12)
-                if r.status_code != 200:
+            for it in self._iter_feed(kw, max_count):
+                results.append(it)
+                if len(results) >= max_count:
                     break
-                js = {}
-                try:
-                    js = r.json() or {}
-                except Exception:
-                    break
-                data = (js.get('result') or {}).get('data') or []
-                if not isinstance(data, list) or not data:
-                    break
-                for it in data:
-                    title = (it.get('title') or '').strip()
-                    intro = (it.get('intro') or '').strip()
-                    url = (it.get('url') or '').strip()
-                    # 放宽过滤：关键词命中标题或简介；无关键词不过滤
-                    if kw:
-                        if (kw not in title) and (kw not in intro):
-                            continue
-                    images = it.get('images') or []
-                    cover = ''
-                    if isinstance(images, list) and images:
-                        c = images[0]
-                        cover = (c.get('img_url') or '').strip()
-                    results.append({
-                        'title': title or '无标题',
-                        'summary': intro or '无概要',
-                        'cover': cover,
-                        'original_url': url,
-                        'source': (it.get('media_name') or '新浪网').strip() or '新浪网'
-                    })
-                    if len(results) >= max_count:
-                        break
-                page += 1
         except Exception:
             pass
         cleaned = self.clean_results(results)
         # 若频道未命中关键词或无数据，回退到站点搜索
         if not cleaned:
             try:
-                bc = BaiduCrawler()
+                bc = BaiduCrawler(config=self.search_config)
                 cleaned = bc.fetch_data(f"site:sina.com.cn {kw}".strip(), max_count=max_count) or []
             except Exception:
                 cleaned = []
         return cleaned[:max_count]
 
     def iter_data(self, keyword='', max_count=30):
-        import requests
         count = 0
-        page = 1
         kw = (keyword or '').strip()
         try:
-            while count < max_count and page <= 5:
-                params = {
-                    'pageid': str(self.pageid),
-                    'lid': str(self.lid),
-                    'num': str(min(50, max_count - count)),
-                    'page': str(page)
-                }
-                r = requests.get(self.api, headers=self.headers, params=params, timeout=12)
-                if r.status_code != 200:
-                    break
-                js = {}
-                try:
-                    js = r.json() or {}
-                except Exception:
-                    break
-                data = (js.get('result') or {}).get('data') or []
-                if not isinstance(data, list) or not data:
-                    break
-                for it in data:
-                    title = (it.get('title') or '').strip()
-                    intro = (it.get('intro') or '').strip()
-                    if kw and (kw not in title) and (kw not in intro):
-                        continue
-                    images = it.get('images') or []
-                    cover = ''
-                    if isinstance(images, list) and images:
-                        c = images[0]
-                        cover = (c.get('img_url') or '').strip()
-                    yield {
-                        'title': title or '无标题',
-                        'summary': intro or '无概要',
-                        'cover': cover,
-                        'original_url': (it.get('url') or '').strip(),
-                        'source': (it.get('media_name') or '新浪网').strip() or '新浪网'
-                    }
-                    count += 1
-                    if count >= max_count:
-                        return
-                page += 1
+            for it in self._iter_feed(kw, max_count):
+                yield it
+                count += 1
+                if count >= max_count:
+                    return
             # 若无数据，回退站点搜索
             if count == 0:
                 try:
-                    bc = BaiduCrawler()
+                    bc = BaiduCrawler(config=self.search_config)
                     for it in bc.iter_data(f"site:sina.com.cn {kw}".strip(), max_count=max_count):
                         yield it
                 except Exception:
@@ -667,58 +587,17 @@ class SinaCrawler:
             return
 
     def sanitize_text(self, text):
-        if not text:
-            return ''
-        t = str(text)
-        t = t.replace('\u200b','').replace('\u200c','').replace('\u200d','')
-        t = ' '.join(t.split())
-        return t.strip()
+        return text_clean.sanitize(text)
 
     def is_noise_text(self, text):
-        if not text:
-            return True
-        t = self.sanitize_text(text)
-        if len(t) < 4:
-            return True
-        import re
-        valid = re.findall(r"[\u4e00-\u9fffA-Za-z0-9]", t)
-        ratio = (len(valid) / max(len(t), 1))
-        if ratio < 0.4:
-            return True
-        return False
+        return self.cleaner.is_noise(text_clean.sanitize(text))
 
     def default_cover(self):
-        return 'https://dummyimage.com/242x162/18202D/ffffff&text=NEWS'
+        return self.cleaner.default_cover
 
     def clean_results(self, items):
-        cleaned = []
-        seen = set()
-        for it in items:
-            title = self.sanitize_text(it.get('title',''))
-            summary = self.sanitize_text(it.get('summary',''))
-            source = self.sanitize_text(it.get('source',''))
-            cover = (it.get('cover') or '').strip()
-            url = (it.get('original_url') or '').strip()
-            if self.is_noise_text(title):
-                continue
-            key = title.lower()
-            if key in seen:
-                continue
-            seen.add(key)
-            if not (url.startswith('http://') or url.startswith('https://')):
-                url = ''
-            if not (cover.startswith('http://') or cover.startswith('https://')):
-                cover = ''
-            if not cover:
-                cover = self.default_cover()
-            cleaned.append({
-                'title': title,
-                'summary': summary if not self.is_noise_text(summary) else '无概要',
-                'cover': cover,
-                'original_url': url,
-                'source': source or '新浪网'
-            })
-        return cleaned
+        # 统一清洗管线（text_clean），整批处理
+        return self.cleaner.clean(items)
 
     def to_display_schema(self, items):
         formatted = []
@@ -735,11 +614,7 @@ class SinaCrawler:
 register_crawler('sina', SinaCrawler)
 
 def _resolve_final(url, headers=None):
-    try:
-        if not url:
-            return ''
-        import requests
-        r = requests.get(url, headers=headers or {}, timeout=8, allow_redirects=True)
-        return (r.url or url)
-    except Exception:
-        return url
+    # 单条解析（只发 HEAD）；批量解析与映射缓存见 resolver.resolve_many
+    if not url:
+        return ''
+    return resolver.resolve_one(url, headers)[0]
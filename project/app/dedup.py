@@ -0,0 +1,125 @@
+import hashlib
+import re
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 跨批次持久去重：collection_records 上按规范化 URL 与标题指纹各存一列哈希并建索引，
+# 采集流与入库时按索引查找，单条查询代价与表规模无关（B 树索引点查）
+_TRACKING_PARAMS = {'spm', 'from', 'wfr', 'rsv_dl', 'share_token', 'scene', 'ivk_sa'}
+_TITLE_NOISE = re.compile(r'[^0-9a-z一-鿿]+')
+# 标题常见的站点后缀，如 "xxx_新华网"、"xxx - 新浪网"、"xxx|人民网"
+_TITLE_SUFFIX = re.compile(r'\s*[-_|｜—]+\s*[^-_|｜—]{1,12}(网|新闻|频道|客户端|日报|晚报)\s*$')
+
+
+def normalize_url(url):
+    u = (url or '').strip()
+    if not (u.startswith('http://') or u.startswith('https://')):
+        return ''
+    try:
+        parts = urlsplit(u)
+    except Exception:
+        return ''
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    port = parts.port
+    netloc = host if not port or port in (80, 443) else f"{host}:{port}"
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_PARAMS]
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    # 协议不参与比较，http/https 视为同一篇
+    return urlunsplit(('http', netloc, path, urlencode(sorted(query)), ''))
+
+
+def title_fingerprint(title):
+    t = unicodedata.normalize('NFKC', title or '').strip().lower()
+    t = _TITLE_SUFFIX.sub('', t)
+    t = _TITLE_NOISE.sub('', t)
+    return t if len(t) >= 4 else ''
+
+
+def _sha1(s):
+    return hashlib.sha1(s.encode('utf-8')).hexdigest() if s else None
+
+
+def url_hash(url):
+    return _sha1(normalize_url(url))
+
+
+def title_hash(title):
+    return _sha1(title_fingerprint(title))
+
+
+def item_keys(item):
+    return url_hash(item.get('original_url')), title_hash(item.get('title'))
+
+
+def stamp(record):
+    # url_hash 上有部分唯一索引：规范化 URL 已属于其他记录时不写 URL 哈希，只保留标题指纹
+    from .models import CollectionRecord
+    from . import db
+    uh = url_hash(record.original_url)
+    if uh and uh != record.url_hash:
+        q = db.session.query(CollectionRecord.id).filter(CollectionRecord.url_hash == uh)
+        if record.id:
+            q = q.filter(CollectionRecord.id != record.id)
+        if q.first():
+            uh = None
+    record.url_hash = uh
+    record.title_hash = title_hash(record.title)
+    return record
+
+
+def lookup(items):
+    # 批量查找已入库条目，返回 {items 下标: (已存在记录 id, 命中方式 'url'/'title')}
+    from .models import CollectionRecord
+    from . import db
+    keys = [item_keys(it) for it in items]
+    urls = sorted(set(k[0] for k in keys if k[0]))
+    titles = sorted(set(k[1] for k in keys if k[1]))
+    by_url, by_title = {}, {}
+    for chunk in [urls[i:i+400] for i in range(0, len(urls), 400)]:
+        rows = db.session.query(CollectionRecord.url_hash, CollectionRecord.id).filter(CollectionRecord.url_hash.in_(chunk)).all()
+        for h, rid in rows:
+            by_url.setdefault(h, rid)
+    for chunk in [titles[i:i+400] for i in range(0, len(titles), 400)]:
+        rows = db.session.query(CollectionRecord.title_hash, CollectionRecord.id).filter(CollectionRecord.title_hash.in_(chunk)).all()
+        for h, rid in rows:
+            by_title.setdefault(h, rid)
+    known = {}
+    for i, (uh, th) in enumerate(keys):
+        if uh and uh in by_url:
+            known[i] = (by_url[uh], 'url')
+        elif th and th in by_title:
+            known[i] = (by_title[th], 'title')
+    return known
+
+
+def find_known(items):
+    # 返回 {items 下标: 已存在记录 id}
+    return {i: rid for i, (rid, _) in lookup(items).items()}
+
+
+def find_known_one(item):
+    return find_known([item]).get(0)
+
+
+def backfill(batch_size=1000):
+    # 为历史记录补齐去重哈希（仅处理尚未计算的行），按 id 游标分批提交
+    from .models import CollectionRecord
+    from . import db
+    total = 0
+    last_id = 0
+    while True:
+        rows = CollectionRecord.query.filter(CollectionRecord.id > last_id, CollectionRecord.url_hash.is_(None), CollectionRecord.title_hash.is_(None)) \
+            .order_by(CollectionRecord.id.asc()).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        for r in rows:
+            stamp(r)
+        db.session.commit()
+        total += len(rows)
+    return total
@@ -0,0 +1,208 @@
+import re
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# 正文抽取（文本密度 + 链接密度）：一次后序遍历累计每个元素的文本长度、链接文本长度与标点数，
+# 段落（自身文本足够长的元素）按长度与标点给父元素记分、祖父元素记一半，
+# 候选得分再乘以 (1 - 链接密度) 并按 class/id 提示加减分，取最高者（及得分相近的同级块）作为正文。
+# 每个节点只访问常数次，整页 O(n)，不会像选择器扫描那样对嵌套子树反复取文本
+MAX_CONTENT = 15000
+# 自身文本少于该长度的元素不算段落（导航、按钮、日期等短文本）
+MIN_PARAGRAPH = 25
+_NOISE_TAGS = {'script', 'style', 'noscript', 'iframe', 'form', 'button', 'select', 'textarea', 'svg', 'nav', 'footer', 'header', 'aside'}
+_BLOCK_TAGS = {'p', 'div', 'section', 'article', 'main', 'li', 'ul', 'ol', 'table', 'tr', 'td', 'th', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'dd', 'dt', 'dl'}
+_CANDIDATE_TAGS = {'div', 'article', 'section', 'main', 'td', 'body', 'dd', 'blockquote'}
+_POSITIVE = re.compile(r'article|content|detail|text|txt|main|body|post|entry|story|zoom|rich', re.I)
+_NEGATIVE = re.compile(r'comment|footer|foot|nav|menu|sidebar|side|share|related|recommend|hot|rank|banner|ad[s_-]|copyright|breadcrumb|login|tool', re.I)
+# 流式下载时，已收到的可见文本（去标签、脚本与空白后的字节数）达到该值即可停止：
+# 正文最多保留 MAX_CONTENT 字，按 UTF-8 中文 3 字节计，再为导航、侧栏等页面其余部分留出 3 倍余量
+ENOUGH_TEXT_BYTES = MAX_CONTENT * 3 * 3
+_MARKUP = re.compile(rb'<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>|&[#\w]+;|\s+', re.S | re.I)
+_OPEN_RAW = re.compile(rb'<(?:script|style|noscript)\b|<!--', re.I)
+_RAW_BLOCK = re.compile(rb'<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->', re.S | re.I)
+_PUNCT = re.compile(r'[，。、；：！？,;]')
+_WS = re.compile(r'\s+')
+
+
+def clean_text(text):
+    # 与原通用抽取一致的清理：去零宽字符、规范空白与换行、截断
+    t = (text or '').replace('\u200b', '').replace('\u200c', '').replace('\u200d', '')
+    t = re.sub(r'[\t\r]', ' ', t)
+    t = re.sub(r'\n{3,}', '\n\n', t)
+    t = re.sub(r'\s{2,}', ' ', t)
+    return t.strip()[:MAX_CONTENT]
+
+
+class TextMeter:
+    # 估算流式下载中已收到的可见文本量，作为 http_client.fetch 的 enough 回调；
+    # 跨块未闭合的标签、脚本与注释留到下一块再计
+    def __init__(self, limit=ENOUGH_TEXT_BYTES):
+        self.limit = limit
+        self.text_bytes = 0
+        self._pending = b''
+
+    def __call__(self, chunk):
+        data = self._pending + chunk
+        cut = len(data)
+        lt = data.rfind(b'<')
+        if lt != -1 and data.find(b'>', lt) == -1:
+            cut = lt
+        m = None
+        for m in _OPEN_RAW.finditer(data, 0, cut):
+            pass
+        if m is not None and not _RAW_BLOCK.match(data, m.start()):
+            cut = min(cut, m.start())
+        # 超长未闭合脚本不再等待，直接丢弃，避免缓冲无限增长
+        self._pending = data[cut:] if len(data) - cut <= 256 * 1024 else b''
+        self.text_bytes += len(_MARKUP.sub(b'', data[:cut]))
+        return self.text_bytes >= self.limit
+
+
+def _tag(el):
+    t = el.tag
+    return t.lower() if isinstance(t, str) else ''
+
+
+def _strip_len(s):
+    return len(_WS.sub('', s)) if s else 0
+
+
+def _class_weight(el):
+    w = 0
+    hint = (el.get('class') or '') + ' ' + (el.get('id') or '')
+    if hint.strip():
+        if _POSITIVE.search(hint):
+            w += 25
+        if _NEGATIVE.search(hint):
+            w -= 25
+    return w
+
+
+def _analyze(root):
+    # 后序遍历：子元素总在父元素之前结束，累计值只需读取直接子元素
+    text_len, link_len, scores = {}, {}, {}
+    for event, el in etree.iterwalk(root, events=('end',)):
+        tag = _tag(el)
+        if not tag or tag in _NOISE_TAGS:
+            text_len[el] = 0
+            link_len[el] = 0
+            continue
+        own = _strip_len(el.text)
+        own_punct = len(_PUNCT.findall(el.text or ''))
+        total = own
+        links = 0
+        for child in el:
+            tail = child.tail
+            if tail:
+                own += _strip_len(tail)
+                total += _strip_len(tail)
+                own_punct += len(_PUNCT.findall(tail))
+            total += text_len.get(child, 0)
+            links += link_len.get(child, 0)
+        if tag == 'a':
+            links = total
+        text_len[el] = total
+        link_len[el] = links
+        # 评论、侧栏等带负向提示的段落不为祖先记分
+        if own >= MIN_PARAGRAPH and tag not in ('a', 'li', 'h1', 'h2', 'h3', 'option') and _class_weight(el) >= 0:
+            s = 1 + own_punct + min(own // 100, 3)
+            parent = el.getparent()
+            if tag in _CANDIDATE_TAGS:
+                # 自身即含大段文本的块（无 <p> 的正文容器）
+                scores[el] = scores.get(el, 0) + s
+            if parent is not None:
+                scores[parent] = scores.get(parent, 0) + s
+                grand = parent.getparent()
+                if grand is not None:
+                    scores[grand] = scores.get(grand, 0) + s / 2.0
+    return text_len, link_len, scores
+
+
+def _final_score(el, text_len, link_len, scores):
+    total = text_len.get(el, 0)
+    density = (link_len.get(el, 0) / float(total)) if total else 1.0
+    return (scores.get(el, 0) + _class_weight(el)) * (1 - density)
+
+
+def _join(pieces):
+    # 行内片段相接：两侧都是英文/数字时补空格，中文之间直接相连
+    out = pieces[0]
+    for p in pieces[1:]:
+        out += (' ' + p) if (out[-1].isascii() and out[-1].isalnum() and p[0].isascii() and p[0].isalnum()) else p
+    return out
+
+
+def subtree_text(root):
+    # 按块级元素断行输出子树文本，跳过噪声标签（其后的 tail 文本仍属于父元素，保留）；迭代实现，不受嵌套深度限制
+    lines, buf = [], []
+    def _break():
+        if buf:
+            lines.append(_join(buf))
+            del buf[:]
+    noise = 0
+    for event, el in etree.iterwalk(root, events=('start', 'end')):
+        tag = _tag(el)
+        is_noise = tag in _NOISE_TAGS
+        if event == 'start':
+            if is_noise:
+                noise += 1
+            if noise or not tag:
+                continue
+            if tag in _BLOCK_TAGS:
+                _break()
+            if el.text and el.text.strip():
+                buf.append(el.text.strip())
+            continue
+        if is_noise:
+            noise -= 1
+        if noise:
+            continue
+        if tag in _BLOCK_TAGS:
+            _break()
+        if el is not root and el.tail and el.tail.strip():
+            buf.append(el.tail.strip())
+    _break()
+    return '\n'.join(lines)
+
+
+def main_content(doc):
+    body = doc.find('body')
+    root = body if body is not None else doc
+    text_len, link_len, scores = _analyze(root)
+    best, best_score = None, 0.0
+    for el in scores:
+        if _tag(el) not in _CANDIDATE_TAGS:
+            continue
+        s = _final_score(el, text_len, link_len, scores)
+        if s > best_score:
+            best, best_score = el, s
+    if best is None:
+        return subtree_text(root)
+    parent = best.getparent()
+    if parent is None:
+        return subtree_text(best)
+    # 合并得分相近的同级块（正文被拆成多个并列容器的页面）
+    threshold = max(10.0, best_score * 0.2)
+    parts = []
+    for sib in parent:
+        if sib is best:
+            parts.append(subtree_text(sib))
+        elif _tag(sib) == _tag(best) and sib in scores and _final_score(sib, text_len, link_len, scores) >= threshold:
+            parts.append(subtree_text(sib))
+    return '\n'.join(p for p in parts if p)
+
+
+def extract(html_text):
+    # 返回 {'title', 'content'}；解析失败时返回空结果
+    if not html_text or not html_text.strip():
+        return {'title': '', 'content': ''}
+    try:
+        doc = lxml_html.document_fromstring(html_text)
+    except Exception:
+        return {'title': '', 'content': ''}
+    title = ''
+    t = doc.find('.//title')
+    if t is not None:
+        title = _WS.sub(' ', t.text_content()).strip()
+    return {'title': title, 'content': clean_text(main_content(doc))}
@@ -0,0 +1,152 @@
+import re
+import threading
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# 规则抽取：标题/正文选择器按 (规则 id, updated_at) 编译一次后缓存，规则修改后自动失效；
+# 以 /、.、( 开头（或带 xpath: 前缀）的选择器按 XPath 编译，其余（或带 css: 前缀）按 CSS 编译（依赖 cssselect）；
+# div.content、h1.title 这类 CSS 同时也是合法的 XPath（只会匹配不到任何节点），不能靠“XPath 编译失败”来区分。
+# extract_many 用同一条规则批量处理已下载的页面，适合大批量重新抽取。
+# 编译结果按线程缓存（并行深度采集的工作线程各持一份），不在线程间共享 XPath 对象
+_MAX_CACHE = 512
+_local = threading.local()
+
+
+class SelectorError(ValueError):
+    pass
+
+
+_XPATH_START = ('/', '.', '(')
+
+
+def _compile_xpath(s):
+    try:
+        return etree.XPath(s)
+    except etree.XPathSyntaxError:
+        raise SelectorError(f'无法编译 XPath: {s}')
+
+
+def _compile_css(s):
+    try:
+        from lxml.cssselect import CSSSelector
+    except ImportError:
+        raise SelectorError(f'CSS 选择器需要安装 cssselect: {s}')
+    try:
+        return CSSSelector(s)
+    except Exception:
+        raise SelectorError(f'无法编译 CSS 选择器: {s}')
+
+
+def compile_selector(sel):
+    s = (sel or '').strip()
+    if not s:
+        return None
+    low = s.lower()
+    if low.startswith('xpath:'):
+        return _compile_xpath(s[6:].strip())
+    if low.startswith('css:'):
+        return _compile_css(s[4:].strip())
+    if s.startswith(_XPATH_START):
+        return _compile_xpath(s)
+    try:
+        return _compile_css(s)
+    except SelectorError:
+        # 兼容不以 / 开头的旧 XPath 规则（如 id('c')/p、*[@id='c']）
+        try:
+            return etree.XPath(s)
+        except etree.XPathSyntaxError:
+            raise SelectorError(f'无法编译选择器: {s}')
+
+
+class CompiledRule:
+    def __init__(self, rule):
+        self.rule_id = rule.id
+        self.title = self._compile(rule.title_xpath)
+        self.content = self._compile(rule.content_xpath)
+
+    def _compile(self, sel):
+        # 无法编译的选择器保存为异常，求值到它时再抛出，与逐次求值时的行为一致
+        try:
+            return compile_selector(sel)
+        except SelectorError as e:
+            return e
+
+
+def _thread_cache():
+    cache = getattr(_local, 'cache', None)
+    if cache is None:
+        cache = _local.cache = {}
+    return cache
+
+
+def compiled_rule(rule):
+    # 选择器文本也计入键，未保存的临时规则（如规则测试）同样安全
+    key = (rule.id, getattr(rule, 'updated_at', None), rule.title_xpath or '', rule.content_xpath or '')
+    cache = _thread_cache()
+    c = cache.get(key)
+    if c is None:
+        if len(cache) >= _MAX_CACHE:
+            cache.clear()
+        c = cache[key] = CompiledRule(rule)
+    return c
+
+
+def _node_text(n):
+    return n.text_content().strip() if hasattr(n, 'text_content') else str(n).strip()
+
+
+def _evaluate(sel, doc):
+    if isinstance(sel, SelectorError):
+        raise sel
+    return sel(doc)
+
+
+def apply_compiled(compiled, doc, extracted=None):
+    # 就地填充 extracted：正文选择器出错时已取得的标题仍保留
+    extracted = extracted if extracted is not None else {'title': '', 'content': ''}
+    if compiled.title is not None:
+        t_nodes = _evaluate(compiled.title, doc)
+        if t_nodes:
+            extracted['title'] = _node_text(t_nodes[0])
+    if compiled.content is not None:
+        c_nodes = _evaluate(compiled.content, doc)
+        if c_nodes:
+            txts = [_node_text(n) for n in c_nodes]
+            extracted['content'] = '\n\n'.join([t for t in txts if t])
+    return extracted
+
+
+def fallback_extract(html_text, extracted=None):
+    # 选择器不可用或解析出错时的 BeautifulSoup 兜底：<title> 与 article/content 类容器
+    from bs4 import BeautifulSoup
+    extracted = extracted or {'title': '', 'content': ''}
+    soup = BeautifulSoup(html_text, 'html.parser')
+    if not extracted['title']:
+        tt = soup.find('title')
+        extracted['title'] = (tt.get_text(strip=True) if tt else '')
+    if not extracted['content']:
+        art = soup.find('article') or soup.find(attrs={'id': re.compile('content|article|detail', re.I)}) or soup.find(attrs={'class': re.compile('content|article|detail', re.I)})
+        if art:
+            extracted['content'] = art.get_text('\n', strip=True)
+        else:
+            bod = soup.find('body')
+            extracted['content'] = bod.get_text('\n', strip=True) if bod else ''
+    return extracted
+
+
+def extract(html_text, rule, compiled=None):
+    extracted = {'title': '', 'content': ''}
+    try:
+        compiled = compiled or compiled_rule(rule)
+        apply_compiled(compiled, lxml_html.document_fromstring(html_text), extracted)
+    except Exception:
+        extracted = fallback_extract(html_text, extracted)
+    extracted['title'] = re.sub(r"\s+", " ", extracted['title']).strip()
+    return extracted
+
+
+def extract_many(rule, documents):
+    # 同一规则批量抽取：选择器只编译一次，逐篇解析；返回与 documents 同序的结果列表
+    compiled = compiled_rule(rule)
+    return [extract(html_text, rule, compiled) if html_text else {'title': '', 'content': ''} for html_text in documents]
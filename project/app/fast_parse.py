@@ -0,0 +1,133 @@
+# 采集器列表页的 lxml 快速解析：预编译 XPath，输出与 BeautifulSoup 解析路径一致的条目
+# 选择器兼容层：以 XPath 复现 parse_html 中用到的 CSS 选择器与 find 语义
+_SELECTORS = None
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def selectors():
+    global _SELECTORS
+    if _SELECTORS is None:
+        from lxml import etree
+        X = etree.XPath
+        _SELECTORS = {
+            # get_text 仅取普通文本节点，跳过注释与 script/style 内容
+            'text': X('.//text()[not(ancestor::script) and not(ancestor::style)]'),
+            # 百度：div.result-op.c-container / .c-container
+            'baidu_items': X(f"//div[{_has_class('result-op')} and {_has_class('c-container')}]"),
+            'baidu_items_fallback': X(f"//*[{_has_class('c-container')}]"),
+            'baidu_title': X('(.//h3//a)[1]'),
+            'baidu_summary': X('(.//span[starts-with(@aria-label, "摘要")])[1]'),
+            'baidu_summary_fallback': X(f"(.//*[{_has_class('c-span-last')}])[1]"),
+            'baidu_source': X('(.//span[starts-with(@aria-label, "新闻来源")])[1]'),
+            'baidu_source_fallback': X(f"(.//*[{_has_class('c-color-gray')}])[1]"),
+            # 封面：排除向上三层内带 news-source/source-icon 类的来源图标
+            'baidu_cover': X("(.//img[not(ancestor::*[position() <= 3][contains(@class, 'news-source') or contains(@class, 'source-icon')])][@src != ''])[1]/@src"),
+            # 新华：div.scpd_page_box li / li
+            'xinhua_items': X(f"//div[{_has_class('scpd_page_box')}]//li"),
+            'xinhua_items_fallback': X('//li'),
+            'first_a': X('(.//a)[1]'),
+            'first_dt': X('(.//dt)[1]'),
+            'first_h3': X('(.//h3)[1]'),
+            'first_span': X('(.//span)[1]'),
+            'first_dd': X('(.//dd)[1]'),
+            'first_p': X('(.//p)[1]'),
+            'xinhua_pic': X(f"(.//img[{_has_class('scpd_auto_pic')}])[1]"),
+            'first_img': X('(.//img)[1]'),
+        }
+    return _SELECTORS
+
+
+def _doc(html):
+    from lxml import html as lxml_html
+    return lxml_html.fromstring(html)
+
+
+def _first(sel, node):
+    r = sel(node)
+    return r[0] if r else None
+
+
+def text_of(node):
+    # 等价于 BeautifulSoup 的 get_text(strip=True)
+    return ''.join(t.strip() for t in selectors()['text'](node))
+
+
+def parse_baidu(html):
+    S = selectors()
+    doc = _doc(html)
+    items = S['baidu_items'](doc) or S['baidu_items_fallback'](doc)
+    results = []
+    for item in items:
+        title_elem = _first(S['baidu_title'], item)
+        if title_elem is None:
+            continue
+        title = text_of(title_elem)
+        original_url = title_elem.get('href', '')
+        summary_elem = _first(S['baidu_summary'], item)
+        if summary_elem is None:
+            summary_elem = _first(S['baidu_summary_fallback'], item)
+        summary = text_of(summary_elem) if summary_elem is not None else "无概要"
+        source_elem = _first(S['baidu_source'], item)
+        if source_elem is None:
+            source_elem = _first(S['baidu_source_fallback'], item)
+        source = text_of(source_elem) if source_elem is not None else "未知来源"
+        cover = S['baidu_cover'](item)
+        if not title or title == "无标题":
+            continue
+        results.append({
+            "title": title,
+            "summary": summary,
+            "cover": str(cover[0]) if cover else "",
+            "original_url": original_url,
+            "source": source
+        })
+    return results
+
+
+def parse_xinhua(html):
+    S = selectors()
+    doc = _doc(html)
+    items = S['xinhua_items'](doc) or S['xinhua_items_fallback'](doc)
+    results = []
+    for li in items:
+        a = _first(S['first_a'], li)
+        if a is None:
+            continue
+        url = a.get('href') or ''
+        if url.startswith('//'):
+            url = 'https:' + url
+        if url.startswith('/'):
+            url = 'https://sc.news.cn' + url
+        title = ''
+        for key in ['first_dt', 'first_h3', 'first_span', 'first_a']:
+            n = _first(S[key], li)
+            if n is not None:
+                title = text_of(n)
+                if title:
+                    break
+        dd = _first(S['first_dd'], li)
+        if dd is None:
+            dd = _first(S['first_p'], li)
+        summary = text_of(dd) if dd is not None else ''
+        img = _first(S['xinhua_pic'], li)
+        if img is None:
+            img = _first(S['first_img'], li)
+        cover = ''
+        if img is not None:
+            src = img.get('src') or img.get('data-src') or ''
+            if src.startswith('/'):
+                src = 'https://sc.news.cn' + src
+            if src.startswith('//'):
+                src = 'https:' + src
+            cover = src
+        results.append({
+            'title': title or text_of(a),
+            'summary': summary or '无概要',
+            'cover': cover,
+            'original_url': url,
+            'source': '新华网'
+        })
+    return results
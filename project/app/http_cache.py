@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import threading
+
+from . import http_client
+
+# 频道列表页与 feed 接口的条件请求缓存：保存 ETag/Last-Modified/正文摘要与解析后的条目，
+# 命中 304 或正文未变化时直接复用解析结果，省去下载与解析开销
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'cache', 'http'))
+
+
+class ConditionalCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self.stats = {'not_modified': 0, 'same_body': 0, 'parsed': 0}
+
+    def _key(self, url, params):
+        raw = url + '?' + json.dumps(params or {}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def save(self, key, entry):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception:
+            pass
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def fetch_items(self, url, parse, headers=None, params=None, timeout=12):
+        # parse(resp) 返回可 JSON 序列化的条目列表；返回 None 表示本次响应不可用（不缓存）
+        key = self._key(url, params)
+        entry = self.load(key)
+        hdrs = dict(headers or {})
+        if entry:
+            if entry.get('etag'):
+                hdrs['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                hdrs['If-Modified-Since'] = entry['last_modified']
+        r = http_client.get(url, headers=hdrs, params=params, timeout=timeout)
+        if r.status_code == 304 and entry:
+            self._count('not_modified')
+            return entry.get('items') or []
+        if r.status_code != 200:
+            return None
+        body_hash = hashlib.sha1(r.content or b'').hexdigest()
+        if entry and entry.get('body_hash') == body_hash:
+            items = entry.get('items') or []
+            self._count('same_body')
+        else:
+            items = parse(r)
+            if items is None:
+                return None
+            self._count('parsed')
+        self.save(key, {
+            'url': url,
+            'etag': r.headers.get('ETag') or '',
+            'last_modified': r.headers.get('Last-Modified') or '',
+            'body_hash': body_hash,
+            'items': items
+        })
+        return items
+
+
+cache = ConditionalCache()
+
+
+def fetch_items(url, parse, headers=None, params=None, timeout=12):
+    return cache.fetch_items(url, parse, headers=headers, params=params, timeout=timeout)
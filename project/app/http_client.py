@@ -0,0 +1,218 @@
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import ratelimit
+
+# 应用级 HTTP 客户端：按主机复用 keep-alive 连接池，供采集器、抽取与 LLM 调用共用
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_TIMEOUT = (10, 30)
+# 流式下载（fetch）的默认上限：正文抽取只需要页面本身，超大或不结束的响应不整体读入内存
+STREAM_MAX_BYTES = 4 * 1024 * 1024
+STREAM_DEADLINE = 30
+STREAM_CHUNK = 16 * 1024
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml')
+
+
+class BoundedResponse:
+    # fetch 的结果：只保留已读取的正文；truncated 为截断原因（max_bytes/deadline/enough），
+    # rejected 为被拒绝的 Content-Type（此时不读取正文）
+    def __init__(self, resp, content=b'', truncated='', rejected=''):
+        self.status_code = resp.status_code
+        self.url = resp.url
+        self.headers = resp.headers
+        self.content = content
+        self.truncated = truncated
+        self.rejected = rejected
+
+
+def _iter_chunks(resp, size):
+    # read1 每次只做一次底层读取，逐字节慢速返回的响应也能按总时限及时停下
+    read1 = getattr(getattr(resp, 'raw', None), 'read1', None)
+    if read1 is None:
+        yield from resp.iter_content(size)
+        return
+    while True:
+        chunk = read1(size, decode_content=True)
+        if not chunk:
+            break
+        yield chunk
+
+
+class HttpClient:
+    def __init__(self, pool_maxsize=DEFAULT_POOL_MAXSIZE, timeout=DEFAULT_TIMEOUT, limiter=None):
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        # 出站请求统一经按主机的自适应限速器取令牌，调用处可传 rate_limit=False 跳过
+        self.limiter = limiter if limiter is not None else ratelimit.limiter
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._adapters = {}
+        self._hosts = {}
+
+    def configure_host(self, host, pool_maxsize=None, timeout=None):
+        # 主机配置同样作用于其子域名，如 baidu.com 覆盖 www.baidu.com
+        h = (host or '').strip().lower()
+        if not h:
+            return
+        with self._lock:
+            conf = dict(self._hosts.get(h) or {})
+            if pool_maxsize:
+                conf['pool_maxsize'] = int(pool_maxsize)
+            if timeout:
+                conf['timeout'] = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+            self._hosts[h] = conf
+            # 已建立的连接池按新配置重建；旧池交由仍在使用的线程自然释放
+            for prefix in [p for p in self._adapters if self._host_of(p) == h or self._host_of(p).endswith('.' + h)]:
+                self._adapters.pop(prefix, None)
+
+    def configure(self, hosts):
+        for host, conf in (hosts or {}).items():
+            conf = conf or {}
+            self.configure_host(host, pool_maxsize=conf.get('pool_maxsize'), timeout=conf.get('timeout'))
+
+    def host_config(self, host):
+        h = (host or '').lower()
+        while h:
+            conf = self._hosts.get(h)
+            if conf:
+                return conf
+            if '.' not in h:
+                break
+            h = h.split('.', 1)[1]
+        return {}
+
+    def _host_of(self, prefix):
+        return urlparse(prefix).hostname or ''
+
+    def _adapter(self, prefix):
+        adapter = self._adapters.get(prefix)
+        if adapter is not None:
+            return adapter
+        with self._lock:
+            adapter = self._adapters.get(prefix)
+            if adapter is None:
+                size = self.host_config(self._host_of(prefix)).get('pool_maxsize') or self.pool_maxsize
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                self._adapters[prefix] = adapter
+            return adapter
+
+    def _session(self):
+        # Session 不保证线程安全，每个线程各持一个；连接池挂在共享的 adapter 上
+        s = getattr(self._local, 'session', None)
+        if s is None:
+            s = requests.Session()
+            # 不跨请求保留 Cookie，与逐次 requests.get 的行为一致
+            s.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            self._local.session = s
+        return s
+
+    def request(self, method, url, **kwargs):
+        parts = urlparse(url)
+        prefix = f"{parts.scheme}://{parts.netloc}/".lower()
+        s = self._session()
+        adapter = self._adapter(prefix)
+        if s.adapters.get(prefix) is not adapter:
+            s.mount(prefix, adapter)
+        # 主机级超时优先于调用处的默认值，便于按主机统一调整
+        conf = self.host_config(parts.hostname or '')
+        if conf.get('timeout'):
+            kwargs['timeout'] = conf['timeout']
+        elif kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        limited = kwargs.pop('rate_limit', True) and self.limiter is not None
+        host = (parts.hostname or '').lower()
+        if limited:
+            self.limiter.acquire(host)
+        resp = s.request(method, url, **kwargs)
+        if limited:
+            # 流式响应不预读正文，只按状态码与跳转地址判断是否被限流/拦截
+            self.limiter.observe(host, resp, inspect_body=not kwargs.get('stream'))
+        return resp
+
+    def fetch(self, url, max_bytes=STREAM_MAX_BYTES, deadline=STREAM_DEADLINE, content_types=HTML_CONTENT_TYPES, enough=None, **kwargs):
+        # 有界 GET：超过字节上限或总时限即停止读取；Content-Type 不在允许列表时不读正文（未声明类型的放行）；
+        # enough(chunk) 返回 True 表示已收集到足够内容，提前结束
+        kwargs['stream'] = True
+        kwargs.setdefault('allow_redirects', True)
+        started = time.monotonic()
+        resp = self.request('GET', url, **kwargs)
+        complete = False
+        try:
+            ctype = (resp.headers.get('Content-Type') or '').split(';', 1)[0].strip().lower()
+            if content_types and ctype and ctype not in content_types:
+                return BoundedResponse(resp, rejected=ctype)
+            buf = bytearray()
+            truncated = ''
+            for chunk in _iter_chunks(resp, STREAM_CHUNK):
+                buf += chunk
+                if max_bytes and len(buf) >= max_bytes:
+                    if len(buf) > max_bytes:
+                        del buf[max_bytes:]
+                        truncated = 'max_bytes'
+                    # 恰好读满上限时再探一次，确认正文是否还有剩余
+                    elif next(_iter_chunks(resp, 1), b''):
+                        truncated = 'max_bytes'
+                    break
+                if enough is not None and enough(chunk):
+                    truncated = 'enough'
+                    break
+                if deadline and time.monotonic() - started > deadline:
+                    truncated = 'deadline'
+                    break
+            complete = not truncated
+            return BoundedResponse(resp, bytes(buf), truncated)
+        finally:
+            # 读完的连接归还连接池复用；未读完的直接关闭
+            release = getattr(getattr(resp, 'raw', None), 'release_conn', None)
+            if complete and release is not None:
+                release()
+            else:
+                resp.close()
+
+    def close(self):
+        with self._lock:
+            adapters = list(self._adapters.values())
+            self._adapters.clear()
+        for a in adapters:
+            try:
+                a.close()
+            except Exception:
+                pass
+
+
+client = HttpClient()
+
+
+def configure(hosts):
+    client.configure(hosts)
+
+
+def configure_host(host, pool_maxsize=None, timeout=None):
+    client.configure_host(host, pool_maxsize=pool_maxsize, timeout=timeout)
+
+
+def request(method, url, **kwargs):
+    return client.request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    kwargs.setdefault('allow_redirects', True)
+    return client.request('GET', url, **kwargs)
+
+
+def head(url, **kwargs):
+    kwargs.setdefault('allow_redirects', False)
+    return client.request('HEAD', url, **kwargs)
+
+
+def fetch(url, **kwargs):
+    return client.fetch(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return client.request('POST', url, **kwargs)
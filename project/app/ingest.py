@@ -0,0 +1,151 @@
+from . import dedup, near_dup, resolver, storage
+
+
+def mark_known(formatted, mode):
+    # 按持久去重索引检查条目；返回 False 表示应丢弃
+    if mode == 'off':
+        return True
+    try:
+        rid = dedup.find_known_one(formatted)
+    except Exception:
+        rid = None
+    if rid:
+        if mode == 'drop':
+            return False
+        formatted['known'] = True
+        formatted['known_id'] = rid
+    return True
+
+
+# upsert 时只补全已有记录的空字段（摘要为"无概要"也视为空），正文以新采集到的非空正文为准；标题与原文链接保持不变
+_NO_SUMMARY = '无概要'
+
+
+def _upsert_statement():
+    from sqlalchemy import case, func, or_
+    from sqlalchemy.dialects.sqlite import insert
+    from .models import CollectionRecord
+    t = CollectionRecord.__table__
+    stmt = insert(t)
+    ex = stmt.excluded
+
+    def fill(col):
+        return case((func.coalesce(col, '') == '', getattr(ex, col.name)), else_=col)
+    return stmt.on_conflict_do_update(
+        index_elements=[t.c.url_hash],
+        index_where=t.c.url_hash.isnot(None),
+        set_={
+            'summary': case((or_(func.coalesce(t.c.summary, '') == '', t.c.summary == _NO_SUMMARY), ex.summary), else_=t.c.summary),
+            'source': fill(t.c.source),
+            'cover': fill(t.c.cover),
+            'deep_content': case((func.coalesce(ex.deep_content, '') != '', ex.deep_content), else_=t.c.deep_content),
+            'deep_collected': case((func.coalesce(ex.deep_content, '') != '', True), else_=t.c.deep_collected),
+        },
+    ).returning(t.c.id, t.c.summary, t.c.source, t.c.cover, t.c.deep_content, t.c.title, sort_by_parameter_order=True)
+
+
+def bulk_save(keyword, items):
+    # 批量入库（单个事务）：新条目与按规范化 URL 命中的已有记录用一条 INSERT ... ON CONFLICT DO UPDATE
+    # 以 executemany 写入；仅按标题命中或与本批前面条目重复的不写入。
+    # 返回与 items 一一对应的 [{'status': 'saved'/'updated'/'duplicate', 'id': 记录 id}]
+    from . import db
+    # 跳转链接先换成最终地址，按 URL 去重与按域名匹配规则才能生效（网络请求在调用方线程中完成）
+    try:
+        resolver.resolve_items(items)
+    except Exception:
+        db.session.rollback()
+    # 近似重复的签名与同桶候选在写事务之外计算和查询，写线程只做查重、写入与纯内存的指向计算
+    sigs = [near_dup.item_signature(it) for it in items]
+    try:
+        cands = near_dup.candidates([keys for _, keys in sigs])
+    except Exception:
+        db.session.rollback()
+        cands = {}
+    # 查重与写入在写线程的同一事务中执行，并发保存同一批条目时不会重复插入或误判状态
+    return storage.write(_write_batch, keyword, items, sigs, cands)
+
+
+def _write_batch(keyword, items, sigs, cands):
+    from .models import CollectionRecord
+    from . import db
+    from datetime import datetime
+    known = dedup.lookup(items)
+    results = [None] * len(items)
+    rows = []
+    row_index = []
+    batch_keys = {}
+    now = datetime.utcnow()
+    for idx, it in enumerate(items):
+        if idx in known and known[idx][1] == 'title':
+            results[idx] = {'status': 'duplicate', 'id': known[idx][0]}
+            continue
+        uh, th = dedup.item_keys(it)
+        first = next((batch_keys[k] for k in (uh, th) if k and k in batch_keys), None)
+        if first is not None:
+            # 与本批前面的条目重复，入库后取其 id
+            results[idx] = first
+            continue
+        for k in (uh, th):
+            if k:
+                batch_keys[k] = idx
+        deep_content = it.get('deep_content') or ''
+        rows.append({
+            'keyword': keyword,
+            'title': it.get('title') or '',
+            'summary': it.get('summary') or '',
+            'source': it.get('source') or '',
+            'original_url': it.get('original_url') or '',
+            'cover': it.get('cover') or '',
+            'deep_collected': bool(deep_content.strip()),
+            'deep_content': deep_content,
+            'created_at': now,
+            'url_hash': uh,
+            'title_hash': th,
+        })
+        row_index.append(idx)
+    before = {}
+    url_ids = [known[i][0] for i in row_index if i in known]
+    if url_ids:
+        q = db.session.query(CollectionRecord.id, CollectionRecord.summary, CollectionRecord.source,
+                             CollectionRecord.cover, CollectionRecord.deep_content).filter(CollectionRecord.id.in_(url_ids))
+        before = {r[0]: tuple(r[1:]) for r in q.all()}
+    relink = []
+    fresh = set()
+    stale = []
+    returned = db.session.execute(_upsert_statement(), rows).all() if rows else []
+    for idx, row in zip(row_index, returned):
+        rid = row[0]
+        if rid in before:
+            status = 'updated' if tuple(row[1:5]) != before[rid] else 'duplicate'
+        else:
+            status = 'saved'
+        results[idx] = {'status': status, 'id': rid}
+        if status == 'duplicate':
+            continue
+        it = items[idx]
+        title, summary, deep_content = row[5], row[1], row[4]
+        if status == 'saved':
+            fresh.add(rid)
+        if (title, summary, deep_content) == (it.get('title') or '', it.get('summary') or '', it.get('deep_content') or ''):
+            relink.append((rid,) + sigs[idx])
+        else:
+            # 补全后内容与条目不同的已有记录（少数），按合并后的内容重算签名
+            sig, keys = near_dup.item_signature({'title': title, 'summary': summary, 'deep_content': deep_content})
+            relink.append((rid, sig, keys))
+            stale.append(keys)
+    if relink:
+        if stale:
+            cands = {**cands, **near_dup.candidates(stale)}
+        near_dup.write_links(relink, near_dup.assign(relink, cands), fresh)
+    for idx, r in enumerate(results):
+        if isinstance(r, int):
+            results[idx] = {'status': 'duplicate', 'id': results[r]['id']}
+    return results
+
+
+def save_items(keyword, items):
+    # 返回 (新增 id, 已存在 id)；按 URL 命中并补全了内容的记录也计入已存在
+    results = bulk_save(keyword, items)
+    saved_ids = [r['id'] for r in results if r['status'] == 'saved']
+    duplicate_ids = [r['id'] for r in results if r['status'] != 'saved']
+    return saved_ids, duplicate_ids
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from . import ingest, storage
+
+# 持久化采集任务队列：任务写入 crawl_jobs，由独立的工作线程池领取执行，
+# 采集到的条目按序写入 crawl_job_items，请求线程只负责入队与读取进度，
+# SSE 页面可随时接入（或断线重连到）正在运行的任务
+FINISHED = ('done', 'error', 'cancelled')
+# 运行中任务超过该时长没有心跳视为工作进程已退出，重新排队
+STALE_SECONDS = 600
+# 运行中任务的心跳间隔，须远小于 STALE_SECONDS
+HEARTBEAT_SECONDS = 60
+
+
+def enqueue(source_key, keyword='', max_count=20, dedup_mode='flag'):
+    from .models import CrawlJob
+    jid = storage.write(_insert_job, (source_key or 'baidu').lower(), keyword or '', max(1, int(max_count or 20)), dedup_mode or 'flag')
+    _wakeup.set()
+    return CrawlJob.query.get(jid)
+
+
+def _insert_job(source_key, keyword, max_count, dedup_mode):
+    from .models import CrawlJob
+    from . import db
+    job = CrawlJob(source_key=source_key, keyword=keyword, max_count=max_count,
+                   dedup_mode=dedup_mode, status='queued', progress=0, item_count=0, skipped_count=0, message='排队中')
+    db.session.add(job)
+    db.session.flush()
+    return job.id
+
+
+def job_status(job):
+    return {
+        'id': job.id,
+        'source': job.source_key,
+        'keyword': job.keyword,
+        'max_count': job.max_count,
+        'status': job.status,
+        'progress': job.progress or 0,
+        'item_count': job.item_count or 0,
+        'skipped_count': job.skipped_count or 0,
+        'message': job.message,
+        'error': job.error,
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S') if job.created_at else None,
+        'started_at': job.started_at.strftime('%Y-%m-%d %H:%M:%S') if job.started_at else None,
+        'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None
+    }
+
+
+def job_items(job_id, after=0, limit=None):
+    from .models import CrawlJobItem
+    q = CrawlJobItem.query.filter(CrawlJobItem.job_id == job_id, CrawlJobItem.seq > after).order_by(CrawlJobItem.seq.asc())
+    if limit:
+        q = q.limit(limit)
+    return q.all()
+
+
+def cancel(job_id):
+    return storage.write(_cancel, job_id) > 0
+
+
+def _cancel(job_id):
+    from .models import CrawlJob
+    return CrawlJob.query.filter(CrawlJob.id == job_id, CrawlJob.status.in_(['queued', 'running'])) \
+        .update({'status': 'cancelled', 'message': '已取消', 'finished_at': datetime.utcnow()}, synchronize_session=False)
+
+
+def claim(worker):
+    # 原子领取一条排队任务：条件更新 status='queued' 成功（影响 1 行）才算领到，多进程同样适用
+    return storage.write(_claim, worker, datetime.utcnow())
+
+
+def _claim(worker, now):
+    from .models import CrawlJob
+    from . import db
+    CrawlJob.query.filter(CrawlJob.status == 'running', CrawlJob.heartbeat_at < now - timedelta(seconds=STALE_SECONDS)) \
+        .update({'status': 'queued', 'message': '工作进程超时，重新排队'}, synchronize_session=False)
+    for (jid,) in db.session.query(CrawlJob.id).filter(CrawlJob.status == 'queued').order_by(CrawlJob.id.asc()).limit(5).all():
+        n = CrawlJob.query.filter(CrawlJob.id == jid, CrawlJob.status == 'queued') \
+            .update({'status': 'running', 'worker': worker, 'started_at': now, 'heartbeat_at': now, 'message': '正在采集...'},
+                    synchronize_session=False)
+        if n == 1:
+            return jid
+    return None
+
+
+def _source_config(source_key):
+    from .models import CrawlerSource
+    row = CrawlerSource.query.filter_by(key=source_key).first()
+    if row and (row.config_json or '').strip():
+        try:
+            return json.loads(row.config_json)
+        except Exception:
+            return None
+    return None
+
+
+def _keep_alive(app, job_id, worker, stop):
+    # 独立于条目产出定时刷新心跳：来源长时间没有产出（慢站点、限流退避）时任务不会被判为超时而被重复领取
+    while not stop.wait(HEARTBEAT_SECONDS):
+        try:
+            with app.app_context():
+                if not storage.write(_update_running, job_id, worker, {'heartbeat_at': datetime.utcnow()}):
+                    return
+        except Exception as e:
+            print(f"crawl job {job_id} heartbeat error: {e}")
+
+
+def run_job(job_id, worker=None):
+    # worker 为领取时的工作者名：只有仍归该工作者的任务才写入条目与状态，超时后被重新领取的旧执行不再写入
+    from flask import current_app
+    from sqlalchemy import func
+    from .models import CrawlJob, CrawlJobItem
+    from .crawler import create_crawler
+    from . import db
+    job = CrawlJob.query.get(job_id)
+    if job is None:
+        return None
+    sent = 0
+    skipped = 0
+    max_count = job.max_count
+    # 重新领取的任务接在已写入的条目之后编号，已接入的 SSE 页面可继续读取
+    base = db.session.query(func.max(CrawlJobItem.seq)).filter(CrawlJobItem.job_id == job_id).scalar() or 0
+    stop = threading.Event()
+    threading.Thread(target=_keep_alive, args=(current_app._get_current_object(), job_id, worker, stop),
+                     name=f'crawl-job-{job_id}-heartbeat', daemon=True).start()
+    try:
+        crawler = create_crawler(job.source_key, config=_source_config(job.source_key))
+        iter_fn = getattr(crawler, 'iter_data', None)
+        items = iter_fn(job.keyword, max_count=max_count) if callable(iter_fn) else crawler.fetch_data(job.keyword, max_count=max_count)
+        try:
+            for it in items:
+                try:
+                    formatted = crawler.to_display_schema([it])[0]
+                except Exception:
+                    formatted = it
+                formatted['deep_collected'] = False
+                if not ingest.mark_known(formatted, job.dedup_mode):
+                    skipped += 1
+                    continue
+                sent += 1
+                n = storage.write(_append_item, job_id, worker, base + sent, sent, skipped, max_count, formatted)
+                if n != 1 or sent >= max_count:
+                    break
+        finally:
+            close = getattr(items, 'close', None)
+            if callable(close):
+                close()
+        tail = f"，跳过已入库{skipped}条" if skipped else ''
+        values = {'status': 'done', 'progress': 100, 'item_count': sent, 'skipped_count': skipped,
+                  'message': f"已完成，共{sent}条{tail}", 'finished_at': datetime.utcnow()}
+    except Exception as e:
+        db.session.rollback()
+        values = {'status': 'error', 'error': str(e), 'message': '采集出错', 'finished_at': datetime.utcnow()}
+    finally:
+        stop.set()
+    storage.write(_update_running, job_id, worker, values)
+    db.session.expire_all()
+    return CrawlJob.query.get(job_id)
+
+
+def _update_running(job_id, worker, values):
+    # 被取消或已被其他工作者重新领取的任务不再覆盖状态；返回受影响行数
+    from .models import CrawlJob
+    q = CrawlJob.query.filter(CrawlJob.id == job_id, CrawlJob.status == 'running')
+    if worker is not None:
+        q = q.filter(CrawlJob.worker == worker)
+    return q.update(values, synchronize_session=False)
+
+
+def _append_item(job_id, worker, seq, sent, skipped, max_count, formatted):
+    # 写入一条产出并更新进度（经写线程提交），被取消或被重新领取时不再写入
+    from .models import CrawlJobItem
+    from . import db
+    n = _update_running(job_id, worker, {
+        'item_count': sent,
+        'skipped_count': skipped,
+        'progress': max(0, min(99, round(100 * sent / max_count))),
+        'message': f"正在采集{formatted.get('title', '')}"[:500],
+        'heartbeat_at': datetime.utcnow()
+    })
+    if n == 1:
+        db.session.add(CrawlJobItem(job_id=job_id, seq=seq, data=json.dumps(formatted, ensure_ascii=False)))
+    return n
+
+
+_wakeup = threading.Event()
+
+
+class WorkerPool:
+    def __init__(self, app, workers=4, poll_seconds=2.0):
+        self.app = app
+        self.workers = max(1, int(workers))
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _loop(self, name):
+        while not self._stop.is_set():
+            jid = None
+            try:
+                with self.app.app_context():
+                    from . import db
+                    try:
+                        jid = claim(name)
+                        if jid:
+                            run_job(jid, name)
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                print(f"crawl worker {name} error: {e}")
+            if jid is None:
+                # 本进程入队时立即唤醒，其他进程入队的任务靠轮询发现
+                _wakeup.wait(self.poll_seconds)
+                _wakeup.clear()
+
+    def start(self):
+        if self._threads:
+            return
+        prefix = f"{os.getpid()}-"
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, args=(prefix + str(i),), name=f'crawl-worker-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        _wakeup.set()
+
+
+def init_app(app):
+    # CRAWL_JOB_WORKERS 为本进程内的工作线程数；设为 0 时只入队，由 worker.py 独立进程执行
+    pool = WorkerPool(app, workers=app.config.get('CRAWL_JOB_WORKERS') or 1)
+    app.extensions['crawl_workers'] = pool
+    if not app.config.get('CRAWL_JOB_WORKERS') or app.testing:
+        return pool
+
+    @app.before_request
+    def _start_crawl_workers():
+        pool.start()
+    return pool
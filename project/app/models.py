@@ -51,6 +51,31 @@ class CollectionRecord(db.Model):
     deep_collected = db.Column(db.Boolean, default=False)
     deep_content = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 去重索引：规范化 URL 与标题指纹的 sha1，见 dedup.py
+    url_hash = db.Column(db.String(40))
+    title_hash = db.Column(db.String(40), index=True)
+    # 近似重复：MinHash 签名与所指向的最早同文记录，见 near_dup.py
+    minhash = db.Column(db.LargeBinary)
+    duplicate_of = db.Column(db.Integer, db.ForeignKey('collection_records.id'))
+    __table_args__ = (
+        # 同一规范化 URL 只对应一条记录（部分唯一索引，url_hash 为空的记录不受限），批量入库按此 upsert
+        db.Index('ux_collection_records_url_hash', 'url_hash', unique=True, sqlite_where=db.text('url_hash IS NOT NULL')),
+        # 按时间统计/筛选；(来源|采集关键词, 时间) 覆盖来源分布统计与按来源、关键词筛选后按时间排序
+        db.Index('ix_collection_records_created_at', 'created_at'),
+        db.Index('ix_collection_records_source_created_at', 'source', 'created_at'),
+        db.Index('ix_collection_records_keyword_created_at', 'keyword', 'created_at'),
+        # 折叠近似重复后的最新记录列表（看板、AI 分析与查询工具）
+        db.Index('ix_collection_records_latest', 'created_at', sqlite_where=db.text('duplicate_of IS NULL')),
+        # 只用于查找指向某条记录的重复稿；只索引非空值，duplicate_of IS NULL 的查询改走上面的部分索引
+        db.Index('ix_collection_records_duplicate_target', 'duplicate_of', sqlite_where=db.text('duplicate_of IS NOT NULL')),
+    )
+
+class NearDupBand(db.Model):
+    __tablename__ = 'near_dup_bands'
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.BigInteger, nullable=False)
+    record_id = db.Column(db.Integer, nullable=False, index=True)
+    __table_args__ = (db.Index('ix_near_dup_bands_bucket_record', 'bucket', 'record_id'),)
 
 class CollectionRule(db.Model):
     __tablename__ = 'collection_rules'
@@ -61,6 +86,8 @@ class CollectionRule(db.Model):
     content_xpath = db.Column(db.String(2048))
     headers_json = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 选择器编译缓存按 (id, updated_at) 失效，见 extractor.py
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class AiEngine(db.Model):
     __tablename__ = 'ai_engines'
@@ -89,3 +116,57 @@ class CrawlerSource(db.Model):
     enabled = db.Column(db.Boolean, default=True)
     config_json = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CrawlWatermark(db.Model):
+    __tablename__ = 'crawl_watermarks'
+    id = db.Column(db.Integer, primary_key=True)
+    source_key = db.Column(db.String(64), nullable=False)
+    keyword = db.Column(db.String(128), nullable=False, default='')
+    # 最近见过条目的去重键（JSON 数组，新的在前），增量采集遇到即停止翻页
+    recent_keys = db.Column(db.Text)
+    newest_title = db.Column(db.String(512))
+    newest_url = db.Column(db.String(1024))
+    last_run_at = db.Column(db.DateTime)
+    last_new_count = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    __table_args__ = (db.UniqueConstraint('source_key', 'keyword', name='uq_crawl_watermarks_source_keyword'),)
+
+class CrawlJob(db.Model):
+    __tablename__ = 'crawl_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    source_key = db.Column(db.String(64), nullable=False)
+    keyword = db.Column(db.String(128), default='')
+    max_count = db.Column(db.Integer, default=20)
+    dedup_mode = db.Column(db.String(16), default='flag')
+    # queued / running / done / error / cancelled
+    status = db.Column(db.String(16), default='queued', index=True)
+    progress = db.Column(db.Integer, default=0)
+    item_count = db.Column(db.Integer, default=0)
+    skipped_count = db.Column(db.Integer, default=0)
+    message = db.Column(db.String(512))
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(64))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class CrawlJobItem(db.Model):
+    __tablename__ = 'crawl_job_items'
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('crawl_jobs.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.Text)
+    # 同一任务的条目序号唯一：即使同一任务被两处执行也不会写出重复序号
+    __table_args__ = (db.Index('ux_crawl_job_items_job_seq', 'job_id', 'seq', unique=True),)
+
+class UrlMapping(db.Model):
+    __tablename__ = 'url_mappings'
+    id = db.Column(db.Integer, primary_key=True)
+    # 跳转链接（如百度 /link?url=）的 sha1，按哈希唯一索引点查
+    short_hash = db.Column(db.String(40), unique=True, nullable=False)
+    short_url = db.Column(db.Text, nullable=False)
+    final_url = db.Column(db.Text)
+    status_code = db.Column(db.Integer)
+    error = db.Column(db.String(255))
+    resolved_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,225 @@
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+
+# 近似重复检测（MinHash + LSH 分段）：标题、摘要与正文导语取字符二元组，计算 64 个最小哈希；
+# 签名按 16 段 × 4 行切分，每段哈希成一个桶键写入 near_dup_bands（带索引）。
+# 查询时只取同桶候选并用签名估计 Jaccard 相似度，无需与全表两两比较。
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# 估计 Jaccard >= 0.6 视为同一稿件的转载/改写
+THRESHOLD = 0.6
+# 正文只取导语部分：导语与摘要高度重合，是否深度采集不影响比对
+_CONTENT_LIMIT = 200
+_NOISE = re.compile(r'[^0-9a-z一-鿿]+')
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_STRUCT = struct.Struct('<%dI' % NUM_PERM)
+
+
+def shingles(title='', summary='', deep_content=''):
+    text = ' '.join([title or '', (summary or '') if summary != '无概要' else '', (deep_content or '')[:_CONTENT_LIMIT]])
+    t = _NOISE.sub('', unicodedata.normalize('NFKC', text).lower())
+    return set(t[i:i+2] for i in range(len(t) - 1))
+
+
+def signature(grams):
+    if not grams:
+        return None
+    xs = [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'little') for g in grams]
+    return [min((a * x + b) % _PRIME for x in xs) & 0xffffffff for a, b in _PERMS]
+
+
+def similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / float(NUM_PERM)
+
+
+def band_keys(sig):
+    keys = []
+    for i in range(BANDS):
+        chunk = struct.pack('<B%dI' % ROWS, i, *sig[i*ROWS:(i+1)*ROWS])
+        # SQLite INTEGER 为有符号 64 位
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+def pack(sig):
+    return _STRUCT.pack(*sig)
+
+
+def unpack(blob):
+    return list(_STRUCT.unpack(blob)) if blob and len(blob) == _STRUCT.size else None
+
+
+def record_signature(record):
+    return signature(shingles(record.title, record.summary, record.deep_content))
+
+
+def find_near(sig, before_id=None, threshold=THRESHOLD):
+    # 返回同桶候选中估计相似度最高的记录 (id, 相似度)；相同时取最早入库的一条
+    from .models import CollectionRecord, NearDupBand
+    from . import db
+    q = db.session.query(CollectionRecord.id, CollectionRecord.minhash) \
+        .join(NearDupBand, NearDupBand.record_id == CollectionRecord.id) \
+        .filter(NearDupBand.bucket.in_(band_keys(sig))).distinct()
+    if before_id:
+        # 仅让较新的记录指向较早的记录，避免形成环
+        q = q.filter(CollectionRecord.id < before_id)
+    best = None
+    for rid, blob in q.all():
+        other = unpack(blob)
+        if not other:
+            continue
+        sim = similarity(sig, other)
+        if sim >= threshold and (best is None or (-sim, rid) < (-best[1], best[0])):
+            best = (rid, sim)
+    return best
+
+
+def _point(record, sig):
+    # 指向同桶中最早的近似重复记录（该记录本身是重复时沿用其指向）
+    from .models import CollectionRecord
+    near = find_near(sig, before_id=record.id)
+    if not near:
+        record.duplicate_of = None
+        return None
+    canon = CollectionRecord.query.get(near[0])
+    record.duplicate_of = (canon.duplicate_of or canon.id) if canon else near[0]
+    return record.duplicate_of
+
+
+def link(record):
+    # 入库或内容更新后重算签名与分桶，并指向最早的近似重复记录；record 需已有 id
+    from .models import NearDupBand
+    from . import db
+    sig = record_signature(record)
+    NearDupBand.query.filter_by(record_id=record.id).delete(synchronize_session=False)
+    if not sig:
+        record.minhash = None
+        record.duplicate_of = None
+        return None
+    record.minhash = pack(sig)
+    db.session.add_all([NearDupBand(bucket=k, record_id=record.id) for k in band_keys(sig)])
+    return _point(record, sig)
+
+
+# 一次查询的分桶键上限（SQLite 绑定参数数量有限，超出时分段查询）
+_LOOKUP_CHUNK = 900
+
+
+def item_signature(item):
+    # 返回 (签名, 分桶键)
+    sig = signature(shingles(item.get('title'), item.get('summary'), item.get('deep_content')))
+    return sig, (band_keys(sig) if sig else [])
+
+
+def candidates(key_lists):
+    # 取出与这些分桶键同桶的已入库记录：{id: (签名, duplicate_of, 分桶键集合)}；可在写事务之外调用
+    from .models import CollectionRecord, NearDupBand
+    from . import db
+    keys = sorted({k for keys in key_lists for k in keys})
+    found = {}
+    for i in range(0, len(keys), _LOOKUP_CHUNK):
+        q = db.session.query(NearDupBand.bucket, CollectionRecord.id, CollectionRecord.minhash, CollectionRecord.duplicate_of) \
+            .join(CollectionRecord, NearDupBand.record_id == CollectionRecord.id) \
+            .filter(NearDupBand.bucket.in_(keys[i:i + _LOOKUP_CHUNK]))
+        for bucket, rid, blob, dup in q.all():
+            if rid not in found:
+                found[rid] = (unpack(blob), dup, set())
+            found[rid][2].add(bucket)
+    return found
+
+
+def assign(rows, cands, threshold=THRESHOLD):
+    # 纯计算：rows 为 [(id, 签名, 分桶键)]，按 id 升序为每条挑选同桶中估计相似度最高、id 更小的记录（相同时取最早的一条），
+    # 同批较早的记录也可作为指向目标；返回 {id: duplicate_of 或 None}
+    relinked = {r[0] for r in rows}
+    info = {}
+    buckets = {}
+    for cid, (sig, dup, keys) in cands.items():
+        # 本批重算的记录以新签名为准
+        if cid in relinked or not sig:
+            continue
+        info[cid] = (sig, dup)
+        for k in keys:
+            buckets.setdefault(k, set()).add(cid)
+    out = {}
+    for rid, sig, keys in sorted(rows, key=lambda r: r[0]):
+        if not sig:
+            out[rid] = None
+            continue
+        best = None
+        seen = set()
+        for k in keys:
+            for cid in buckets.get(k, ()):
+                if cid >= rid or cid in seen:
+                    continue
+                seen.add(cid)
+                sim = similarity(sig, info[cid][0])
+                if sim >= threshold and (best is None or (-sim, cid) < (-best[1], best[0])):
+                    best = (cid, sim)
+        out[rid] = (info[best[0]][1] or best[0]) if best else None
+        info[rid] = (sig, out[rid])
+        for k in keys:
+            buckets.setdefault(k, set()).add(rid)
+    return out
+
+
+def write_links(rows, targets, fresh=()):
+    # 写入签名、分桶与指向：rows 同 assign；fresh 为本事务新插入、尚无分桶的记录 id，不必先删除。
+    # 每条记录 16 个分桶，整批可达数千行，直接用驱动的 executemany 写入
+    from .models import NearDupBand
+    from . import db
+    if not rows:
+        return
+    old = [r[0] for r in rows if r[0] not in fresh]
+    if old:
+        NearDupBand.query.filter(NearDupBand.record_id.in_(old)).delete(synchronize_session=False)
+    conn = db.session.connection()
+    bands = [(k, rid) for rid, sig, keys in rows if sig for k in keys]
+    if bands:
+        conn.exec_driver_sql('INSERT INTO near_dup_bands (bucket, record_id) VALUES (?, ?)', bands)
+    conn.exec_driver_sql('UPDATE collection_records SET minhash = ?, duplicate_of = ? WHERE id = ?',
+                         [(pack(sig) if sig else None, targets.get(rid), rid) for rid, sig, keys in rows])
+
+
+def unlink(record_id):
+    # 删除记录前调用：移除其分桶。删除的是簇首时由最早的剩余成员接任簇首，其余成员改指向它；
+    # 删除的本身是重复记录时，指向它的记录改指向其簇首。返回接任的簇首 id（没有成员时为 None）
+    from .models import CollectionRecord, NearDupBand
+    from . import db
+    NearDupBand.query.filter_by(record_id=record_id).delete(synchronize_session=False)
+    members = [rid for (rid,) in db.session.query(CollectionRecord.id).filter(CollectionRecord.duplicate_of == record_id)
+               .order_by(CollectionRecord.id.asc()).all()]
+    if not members:
+        return None
+    head = db.session.query(CollectionRecord.duplicate_of).filter(CollectionRecord.id == record_id).scalar()
+    if head is None:
+        head = members.pop(0)
+        CollectionRecord.query.filter(CollectionRecord.id == head).update({'duplicate_of': None}, synchronize_session=False)
+    if members:
+        CollectionRecord.query.filter(CollectionRecord.id.in_(members)).update({'duplicate_of': head}, synchronize_session=False)
+    return head
+
+
+def backfill(batch_size=500):
+    from .models import CollectionRecord
+    from . import db
+    total = 0
+    last_id = 0
+    while True:
+        rows = CollectionRecord.query.filter(CollectionRecord.id > last_id, CollectionRecord.minhash.is_(None)) \
+            .order_by(CollectionRecord.id.asc()).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        for r in rows:
+            link(r)
+            db.session.flush()
+        db.session.commit()
+        total += len(rows)
+    return total
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+# 键集（游标）分页：按排序列的取值定位下一页/上一页，SQLite 用行值比较 (a, b) > (?, ?) 在排序索引上直接定位，
+# 任意深度的翻页与第一页代价相同，不再需要 OFFSET。游标是签名后的不透明字符串，绑定查询条件（scope），
+# 篡改或条件变化时视为无效，回到第一页。总数按需计算，并按条件缓存 COUNT_TTL 秒。
+_SALT = 'keyset-cursor'
+COUNT_TTL = 60
+_COUNT_CACHE_SIZE = 256
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+class Page:
+    def __init__(self, items, next_token=None, prev_token=None):
+        self.items = items
+        self.next_token = next_token
+        self.prev_token = prev_token
+
+    @property
+    def has_next(self):
+        return self.next_token is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_token is not None
+
+
+def scope_key(*parts):
+    # 查询条件的指纹：游标只在相同条件下有效，也作为总数缓存的键
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def _serializer():
+    from flask import current_app
+    from itsdangerous import URLSafeSerializer
+    return URLSafeSerializer(current_app.secret_key, salt=_SALT)
+
+
+def _dump(v):
+    return {'t': v.isoformat()} if isinstance(v, datetime) else v
+
+
+def _load(v):
+    return datetime.fromisoformat(v['t']) if isinstance(v, dict) else v
+
+
+def encode(values, direction, scope):
+    return _serializer().dumps({'v': [_dump(v) for v in values], 'd': direction, 's': scope})
+
+
+def decode(token, scope):
+    # 返回 (排序列取值, 'next'/'prev')；无效时返回 None
+    from itsdangerous import BadData
+    try:
+        data = _serializer().loads(token)
+        if data.get('s') != scope or data.get('d') not in ('next', 'prev'):
+            return None
+        return [_load(v) for v in data['v']], data['d']
+    except (BadData, KeyError, TypeError, ValueError):
+        return None
+
+
+def _beyond(cols, values, forward):
+    # forward 时为 (cols) > values，否则为 (cols) < values；SQLite 升序中 NULL 排在最前，末列（唯一键）不为 NULL
+    from sqlalchemy import and_, false, or_, tuple_
+    if all(v is not None for v in values):
+        left, right = tuple_(*cols), tuple_(*values)
+        if forward:
+            return left > right
+        # 行值与 NULL 比较结果为未知，排在前面的 NULL 需单独列出
+        nulls = [and_(*[p == pv for p, pv in zip(cols[:k], values[:k])], cols[k].is_(None)) for k in range(len(cols) - 1)]
+        return or_(left < right, *nulls)
+    conds = []
+    for k, (c, v) in enumerate(zip(cols, values)):
+        eq = [p.is_(None) if pv is None else p == pv for p, pv in zip(cols[:k], values[:k])]
+        if forward:
+            step = c.isnot(None) if v is None else c > v
+        elif v is None:
+            continue
+        else:
+            step = or_(c < v, c.is_(None))
+        conds.append(and_(*eq, step))
+    return or_(*conds) if conds else false()
+
+
+def paginate(query, cols, key, per_page, token=None, scope=''):
+    # cols 为升序排序列（末列须唯一，如 id），key(row) 返回该行在 cols 上的取值；query 不要带 order_by
+    cur = decode(token, scope) if token else None
+    forward = cur is None or cur[1] == 'next'
+    if cur:
+        query = query.filter(_beyond(cols, cur[0], forward))
+    rows = query.order_by(*[c.asc() if forward else c.desc() for c in cols]).limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+    has_next = more if forward else True
+    has_prev = cur is not None if forward else more
+    next_token = encode(key(rows[-1]), 'next', scope) if rows and has_next else None
+    prev_token = encode(key(rows[0]), 'prev', scope) if rows and has_prev else None
+    return Page(rows, next_token, prev_token)
+
+
+def cached_count(query, scope, ttl=COUNT_TTL):
+    # 返回 (总数, 是否来自缓存)；缓存期内新增/删除的记录不反映在总数中
+    now = time.monotonic()
+    with _count_lock:
+        hit = _count_cache.get(scope)
+        if hit and now - hit[1] < ttl:
+            return hit[0], True
+    n = query.order_by(None).count()
+    with _count_lock:
+        if len(_count_cache) >= _COUNT_CACHE_SIZE:
+            _count_cache.clear()
+        _count_cache[scope] = (n, now)
+    return n, False
@@ -0,0 +1,187 @@
+import re
+import threading
+import time
+
+# 按主机的自适应令牌桶限速：所有出站请求经 http_client 统一取令牌。
+# 成功响应逐步加速（加性增），429/503 或验证码/安全验证页立即减半（乘性减）并按 Retry-After 暂停，
+# 只有令牌不足时才等待，速率随主机实际承受能力浮动。
+DEFAULT_POLICY = {'rate': 10.0, 'burst': 10, 'min_rate': 0.2, 'max_rate': 20.0}
+# 内置站点的初始策略，可被采集源 config_json 中的 rate_limit 覆盖
+BUILTIN_POLICIES = {
+    'baidu.com': {'rate': 1.0, 'burst': 3, 'min_rate': 0.1, 'max_rate': 5.0},
+}
+# 验证页的主机或路径段（如 wappass.baidu.com、/captcha/、/verify、/security-check.html），只匹配完整路径段
+_BLOCK_HOSTS = ('wappass.baidu.com',)
+_BLOCK_PATH = re.compile(r'/(?:captcha|verify|security-check)(?:/|\.\w+$|$)', re.I)
+_BLOCK_TEXT = ['百度安全验证', '安全验证', '请输入验证码', '访问过于频繁', 'captcha']
+
+
+def _is_block_url(url):
+    from urllib.parse import urlparse
+    try:
+        parts = urlparse(url or '')
+    except Exception:
+        return False
+    return (parts.hostname or '').lower() in _BLOCK_HOSTS or bool(_BLOCK_PATH.search(parts.path or ''))
+
+
+def is_block_page(resp, inspect_body=True):
+    try:
+        if resp.status_code in (429, 503):
+            return True
+        chain = [getattr(h, 'url', '') or '' for h in (getattr(resp, 'history', None) or [])] + [getattr(resp, 'url', '') or '']
+        if any(_is_block_url(u) for u in chain):
+            return True
+        if not inspect_body:
+            return False
+        ct = (resp.headers.get('Content-Type') or '').lower()
+        if 'html' not in ct:
+            return False
+        head = (resp.content or b'')[:6000].decode('utf-8', 'ignore')
+        # 验证页通常很短；正常页面正文中偶然出现的关键字不计
+        return len(resp.content or b'') < 60000 and any(t in head for t in _BLOCK_TEXT)
+    except Exception:
+        return False
+
+
+class HostBucket:
+    def __init__(self, rate, burst, min_rate, max_rate):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = float(min_rate)
+        self.max_rate = max(float(max_rate), self.rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        # 预占一个令牌（可为负，即排队），返回需要等待的秒数
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+            self.waited += wait
+            return wait
+
+    def retune(self, policy):
+        # 策略变化时就地调整上下限，保留当前速率（不超过新的初始速率）、令牌与暂停状态
+        with self._lock:
+            self.burst = max(1.0, float(policy['burst']))
+            self.min_rate = float(policy['min_rate'])
+            self.max_rate = max(float(policy['max_rate']), float(policy['rate']))
+            self.rate = max(self.min_rate, min(self.rate, float(policy['rate']), self.max_rate))
+            self.tokens = min(self.tokens, self.burst)
+
+    def success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.05 * self.rate + 0.02)
+
+    def penalize(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self.paused_until = max(self.paused_until, now + min(pause, 300))
+            self.throttled += 1
+
+
+class RateLimiter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._policies = dict(BUILTIN_POLICIES)
+
+    def configure(self, host, policy):
+        h = (host or '').strip().lower()
+        if not h or not isinstance(policy, dict):
+            return
+        with self._lock:
+            merged = dict(self._policies.get(h) or DEFAULT_POLICY)
+            merged.update({k: v for k, v in policy.items() if k in DEFAULT_POLICY and v})
+            if merged == self._policies.get(h):
+                # 每个采集器实例化时都会调用，策略未变时不动已有的桶，保留退避状态
+                return
+            self._policies[h] = merged
+            buckets = [b for n, b in self._buckets.items() if n == h or n.endswith('.' + h)]
+        for b in buckets:
+            b.retune(merged)
+
+    def policy(self, host):
+        h = host
+        while h:
+            if h in self._policies:
+                return self._policies[h]
+            if '.' not in h:
+                break
+            h = h.split('.', 1)[1]
+        return DEFAULT_POLICY
+
+    def bucket(self, host):
+        h = (host or '').lower()
+        b = self._buckets.get(h)
+        if b is None:
+            with self._lock:
+                b = self._buckets.get(h)
+                if b is None:
+                    p = self.policy(h)
+                    b = HostBucket(p['rate'], p['burst'], p['min_rate'], p['max_rate'])
+                    self._buckets[h] = b
+        return b
+
+    def acquire(self, host):
+        wait = self.bucket(host).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def observe(self, host, resp, inspect_body=True):
+        b = self.bucket(host)
+        if is_block_page(resp, inspect_body=inspect_body):
+            retry_after = None
+            try:
+                ra = resp.headers.get('Retry-After')
+                retry_after = float(ra) if ra else None
+            except Exception:
+                retry_after = None
+            b.penalize(retry_after)
+            return False
+        if resp.status_code < 400:
+            b.success()
+        return True
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self._buckets.items())
+        return {h: {'rate': round(b.rate, 3), 'burst': b.burst, 'throttled': b.throttled, 'waited': round(b.waited, 2)} for h, b in items}
+
+
+limiter = RateLimiter()
+
+
+def configure(host, policy):
+    limiter.configure(host, policy)
+
+
+def configure_urls(policy, *urls):
+    # 采集源 config_json 中的 rate_limit 作用于其各个入口地址的主机
+    from urllib.parse import urlparse
+    if not isinstance(policy, dict):
+        return
+    for u in urls:
+        host = urlparse(u or '').hostname
+        if host:
+            limiter.configure(host, policy)
+
+
+def snapshot():
+    return limiter.snapshot()
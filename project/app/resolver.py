@@ -0,0 +1,154 @@
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urljoin, urlparse
+
+from . import http_client, storage
+
+# 跳转链接批量解析：搜索结果中的跳转地址（如百度 /link?url=）先查 url_mappings 表，
+# 未命中的并发解析，只发 HEAD 跟随跳转、不下载正文；HEAD 不可用或跳转页用脚本/meta 跳转时，
+# 改为流式 GET 只读前 16KB。解析结果写回表中，每个链接只解析一次；失败的记录 6 小时后再重试
+REDIRECT_LINKS = {
+    'baidu.com': ('/link', '/baidu.php'),
+    'sogou.com': ('/link',),
+    'so.com': ('/link',),
+}
+MAX_WORKERS = 8
+TIMEOUT = 8
+PEEK_BYTES = 16 * 1024
+RETRY_FAILED_AFTER = timedelta(hours=6)
+_UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36'
+_SCRIPT_TARGET = re.compile(r'''(?:location\.replace\(|location\.href\s*=\s*|location\s*=\s*)["']([^"']+)["']''')
+_META_REFRESH = re.compile(r'''<meta[^>]+http-equiv=["']?refresh["']?[^>]*content=["']?\s*\d*\s*;\s*url=([^"'>\s]+)''', re.I)
+
+
+def is_redirect_link(url):
+    try:
+        parts = urlparse(url or '')
+    except Exception:
+        return False
+    host = (parts.hostname or '').lower()
+    for domain, prefixes in REDIRECT_LINKS.items():
+        if host == domain or host.endswith('.' + domain):
+            return any(parts.path.startswith(p) for p in prefixes)
+    return False
+
+
+def url_key(url):
+    return hashlib.sha1((url or '').strip().encode('utf-8')).hexdigest()
+
+
+def _page_target(content):
+    text = (content or b'').decode('utf-8', 'ignore')
+    m = _META_REFRESH.search(text) or _SCRIPT_TARGET.search(text)
+    return m.group(1).strip() if m else ''
+
+
+def resolve_one(url, headers=None):
+    # 返回 (最终地址, 状态码, 错误)；失败时最终地址为原链接
+    hdrs = dict(headers or {})
+    hdrs.setdefault('User-Agent', _UA)
+    try:
+        r = http_client.head(url, headers=hdrs, timeout=TIMEOUT, allow_redirects=True)
+        final, code = r.url or url, r.status_code
+        r.close()
+        if code >= 400 or is_redirect_link(final):
+            page = http_client.fetch(url, headers=hdrs, timeout=TIMEOUT, max_bytes=PEEK_BYTES, deadline=TIMEOUT, content_types=None)
+            final, code = page.url or url, page.status_code
+            if is_redirect_link(final):
+                target = _page_target(page.content)
+                if target:
+                    final = urljoin(final, target)
+        if is_redirect_link(final):
+            return url, code, '未能解析跳转目标'
+        return final, code, ''
+    except Exception as e:
+        return url, None, str(e)[:255]
+
+
+def _mappings(urls):
+    # 按哈希分批查表，逐个产出 (链接, 映射行)
+    from .models import UrlMapping
+    keys = {url_key(u): u for u in urls if u}
+    hashes = list(keys)
+    for i in range(0, len(hashes), 500):
+        for m in UrlMapping.query.filter(UrlMapping.short_hash.in_(hashes[i:i + 500])).all():
+            yield keys.get(m.short_hash), m
+
+
+def _cooling_down(m, now):
+    return bool(m.error) and bool(m.resolved_at) and now - m.resolved_at < RETRY_FAILED_AFTER
+
+
+def lookup(urls):
+    # 查表：返回 {链接: 最终地址}；仍在重试冷却期内的失败记录按原链接返回
+    found = {}
+    now = datetime.utcnow()
+    for u, m in _mappings(urls):
+        if m.error:
+            if _cooling_down(m, now):
+                found[u] = u
+            continue
+        found[u] = m.final_url or u
+    return found
+
+
+def failed_links(urls):
+    # 解析失败且仍在重试冷却期内的链接集合：冷却期结束前再次解析也不会有结果
+    now = datetime.utcnow()
+    return {u for u, m in _mappings(urls) if _cooling_down(m, now)}
+
+
+def _store(rows):
+    # 经写线程提交：rows 为 [(链接, (最终地址, 状态码, 错误))]
+    from .models import UrlMapping
+    from . import db
+    now = datetime.utcnow()
+    for url, (final, code, error) in rows:
+        key = url_key(url)
+        m = UrlMapping.query.filter_by(short_hash=key).first()
+        if m is None:
+            m = UrlMapping(short_hash=key, short_url=url)
+            db.session.add(m)
+        m.final_url = final
+        m.status_code = code
+        m.error = error or None
+        m.resolved_at = now
+
+
+def resolve_many(urls, workers=MAX_WORKERS, headers=None):
+    # 返回 {链接: 最终地址}，非跳转链接原样返回；网络请求在线程池中执行，解析结果经写线程写回
+    targets = []
+    seen = set()
+    for u in urls:
+        u = (u or '').strip()
+        if u and u not in seen and is_redirect_link(u):
+            seen.add(u)
+            targets.append(u)
+    found = lookup(targets) if targets else {}
+    missing = [u for u in targets if u not in found]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+            results = list(pool.map(lambda u: resolve_one(u, headers), missing))
+        for u, (final, code, error) in zip(missing, results):
+            found[u] = final
+        try:
+            storage.write(_store, list(zip(missing, results)))
+        except Exception:
+            # 其他进程并发写入同一链接时以先写入者为准，本批结果仍然返回
+            pass
+    return {u: found.get((u or '').strip(), u) for u in urls}
+
+
+def resolve_items(items, field='original_url'):
+    # 就地把条目中的跳转链接替换为最终地址；返回被替换的条数
+    mapping = resolve_many([it.get(field) or '' for it in items])
+    changed = 0
+    for it in items:
+        u = it.get(field) or ''
+        final = mapping.get(u) or u
+        if final != u:
+            it[field] = final
+            changed += 1
+    return changed
@@ -0,0 +1,107 @@
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+# 抽取规则的进程内索引：站点名称字典 + 域名后缀字典树，规则增删改时失效重建；
+# 匹配只读内存，不访问也不写数据库。索引中保存规则的只读副本，可在工作线程中直接使用
+# 多进程部署时其他进程的修改在 TTL 到期后生效
+TTL_SECONDS = 60
+_RULE = object()
+
+
+def snapshot(rule):
+    return SimpleNamespace(id=rule.id, site=rule.site, site_name=rule.site_name, title_xpath=rule.title_xpath,
+                           content_xpath=rule.content_xpath, headers_json=rule.headers_json,
+                           updated_at=getattr(rule, 'updated_at', None))
+
+
+def normalize_site(site):
+    # 规则站点可能带协议、路径、端口或 www 前缀，统一为小写主机名
+    s = (site or '').strip().lower()
+    if '://' in s:
+        s = urlparse(s).hostname or ''
+    s = s.split('/', 1)[0].split(':', 1)[0].strip('.')
+    if s.startswith('www.'):
+        s = s[4:]
+    return s
+
+
+class RuleIndex:
+    def __init__(self, rules):
+        self.by_name = {}
+        self.names = []
+        self.trie = {}
+        self.loose_sites = []
+        # 与原匹配顺序一致：站点名称按 id 升序取第一条；域名匹配同一站点取 id 最大的一条
+        for r in sorted(rules, key=lambda x: x.id):
+            nm = (r.site_name or '').strip().lower()
+            if nm:
+                self.by_name.setdefault(nm, r)
+                self.names.append((nm, r))
+            st = normalize_site(r.site)
+            if not st:
+                continue
+            if '.' in st:
+                node = self.trie
+                for label in reversed(st.split('.')):
+                    node = node.setdefault(label, {})
+                node[_RULE] = r
+            else:
+                # 非域名形式的站点（如 "xinhuanet"）保留子串匹配
+                self.loose_sites.append((st, r))
+
+    def match_domain(self, domain):
+        # 最长后缀匹配：sc.news.cn 优先命中 sc.news.cn 的规则，其次 news.cn
+        node = self.trie
+        best = None
+        for label in reversed((domain or '').split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            best = node.get(_RULE, best)
+        if best is None:
+            for st, r in self.loose_sites:
+                if st in domain:
+                    best = r
+        return best
+
+    def match(self, source, url):
+        src = (source or '').strip().lower()
+        if src:
+            r = self.by_name.get(src)
+            if r is not None:
+                return r
+            for nm, r in self.names:
+                if nm in src:
+                    return r
+        domain = (urlparse(url or '').hostname or '').lower()
+        return self.match_domain(domain) if domain else None
+
+
+_lock = threading.Lock()
+_index = None
+_built_at = 0.0
+
+
+def get_index():
+    global _index, _built_at
+    idx = _index
+    if idx is not None and time.monotonic() - _built_at < TTL_SECONDS:
+        return idx
+    from .models import CollectionRule
+    with _lock:
+        if _index is None or time.monotonic() - _built_at >= TTL_SECONDS:
+            _index = RuleIndex([snapshot(r) for r in CollectionRule.query.all()])
+            _built_at = time.monotonic()
+        return _index
+
+
+def invalidate():
+    global _index
+    with _lock:
+        _index = None
+
+
+def match(source, url):
+    return get_index().match(source, url)
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from . import dedup, ingest, storage
+
+# 定时增量采集：启用的采集源在 config_json 中配置
+#   "schedule": {"keywords": ["成都", "四川"], "interval_minutes": 30, "max_count": 30}
+# 每个 (来源, 关键词) 保存一条水位（最近见过条目的去重键），增量采集逐页请求，
+# 遇到水位内的条目即停止翻页，稳态下通常只需请求第一页
+DEFAULT_INTERVAL_MINUTES = 30
+DEFAULT_MAX_COUNT = 30
+# 水位保留的去重键数量（约为最近几页的条目）
+WATERMARK_SIZE = 60
+
+
+def schedule_entries():
+    # 返回 [(source_key, 采集器配置, 关键词, 间隔分钟, 条数上限)]
+    from .models import CrawlerSource
+    entries = []
+    for row in CrawlerSource.query.filter_by(enabled=True).order_by(CrawlerSource.id.asc()).all():
+        try:
+            cfg = json.loads(row.config_json or '{}') or {}
+        except Exception:
+            continue
+        sch = cfg.get('schedule')
+        if not isinstance(sch, dict):
+            continue
+        keywords = sch.get('keywords')
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        interval = max(1, int(sch.get('interval_minutes') or DEFAULT_INTERVAL_MINUTES))
+        max_count = max(1, int(sch.get('max_count') or DEFAULT_MAX_COUNT))
+        for kw in (keywords or ['']):
+            entries.append((row.key, cfg, (kw or '').strip(), interval, max_count))
+    return entries
+
+
+def _save_watermark(source_key, keyword, values):
+    # 经写线程提交：首次运行时创建水位行；其他进程（或手动触发的同一任务）已建行时 DO NOTHING 后再更新，不会撞唯一约束
+    from sqlalchemy.dialects.sqlite import insert
+    from .models import CrawlWatermark
+    from . import db
+    db.session.execute(insert(CrawlWatermark.__table__)
+                       .values(source_key=source_key, keyword=keyword, recent_keys='[]', last_new_count=0)
+                       .on_conflict_do_nothing(index_elements=['source_key', 'keyword']))
+    CrawlWatermark.query.filter_by(source_key=source_key, keyword=keyword).update(values, synchronize_session=False)
+
+
+def crawl_incremental(source_key, keyword, config=None, max_count=DEFAULT_MAX_COUNT, crawler=None):
+    # 采集与入库期间会话中不留未提交的水位行，避免自动 flush 抢占写锁；水位在入库之后经写线程更新
+    from .models import CrawlWatermark
+    from .crawler import create_crawler
+    wm = CrawlWatermark.query.filter_by(source_key=source_key, keyword=keyword).first()
+    try:
+        seen = json.loads((wm.recent_keys if wm else None) or '[]')
+    except Exception:
+        seen = []
+    seen_set = set(seen)
+    if crawler is None:
+        # 逐页请求：不预取后续页，命中水位后不再产生多余请求
+        crawler = create_crawler(source_key, config=dict(config or {}, concurrency=1))
+    fresh = []
+    reached = False
+    error = None
+    it = crawler.iter_data(keyword, max_count=max_count)
+    try:
+        for item in it:
+            keys = [k for k in dedup.item_keys(item) if k]
+            if seen_set and any(k in seen_set for k in keys):
+                reached = True
+                break
+            fresh.append(item)
+    except Exception as e:
+        error = str(e)
+    finally:
+        close = getattr(it, 'close', None)
+        if callable(close):
+            close()
+    saved_ids, duplicate_ids = ingest.save_items(keyword, fresh) if fresh else ([], [])
+    head = []
+    for item in fresh:
+        head.extend(k for k in dedup.item_keys(item) if k)
+    merged = []
+    for k in head + seen:
+        if k not in merged:
+            merged.append(k)
+    values = {'recent_keys': json.dumps(merged[:WATERMARK_SIZE]), 'last_run_at': datetime.utcnow(),
+              'last_new_count': len(saved_ids), 'last_error': error}
+    if fresh:
+        values['newest_title'] = fresh[0].get('title') or ''
+        values['newest_url'] = fresh[0].get('original_url') or ''
+    storage.write(_save_watermark, source_key, keyword, values)
+    return {
+        'source': source_key,
+        'keyword': keyword,
+        'fetched': len(fresh),
+        'saved_ids': saved_ids,
+        'duplicate_ids': duplicate_ids,
+        'reached_watermark': reached,
+        'error': error
+    }
+
+
+def watermark_status():
+    from .models import CrawlWatermark
+    rows = CrawlWatermark.query.order_by(CrawlWatermark.source_key.asc(), CrawlWatermark.keyword.asc()).all()
+    return [{
+        'source': r.source_key,
+        'keyword': r.keyword,
+        'newest_title': r.newest_title,
+        'newest_url': r.newest_url,
+        'last_run_at': r.last_run_at.strftime('%Y-%m-%d %H:%M:%S') if r.last_run_at else None,
+        'last_new_count': r.last_new_count or 0,
+        'last_error': r.last_error
+    } for r in rows]
+
+
+class ProcessLock:
+    # 跨进程的非阻塞文件锁：多进程部署（如 gunicorn 多 worker）时只有持锁进程运行定时采集，
+    # 持锁进程退出后锁由系统释放，其他进程在下一轮接手
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def acquire(self):
+        if self._fh is not None:
+            return True
+        try:
+            fh = open(self.path, 'a+')
+        except OSError:
+            return False
+        try:
+            try:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError:
+                import msvcrt
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            fh.close()
+            return False
+        self._fh = fh
+        return True
+
+    def release(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def default_lock_path(app):
+    # 按数据库地址区分，同一数据库的各进程争同一把锁
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    return os.path.join(tempfile.gettempdir(), 'crawl-scheduler-%s.lock' % hashlib.sha1(uri.encode('utf-8')).hexdigest()[:12])
+
+
+class CrawlScheduler:
+    def __init__(self, app, tick_seconds=30, lock_path=None):
+        self.app = app
+        self.tick_seconds = tick_seconds
+        self.process_lock = ProcessLock(lock_path) if lock_path else None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def due_entries(self, now=None):
+        from .models import CrawlWatermark
+        now = now or datetime.utcnow()
+        due = []
+        for source_key, cfg, kw, interval, max_count in schedule_entries():
+            wm = CrawlWatermark.query.filter_by(source_key=source_key, keyword=kw).first()
+            if wm is None or wm.last_run_at is None or now - wm.last_run_at >= timedelta(minutes=interval):
+                due.append((source_key, cfg, kw, max_count))
+        return due
+
+    def run_due(self, now=None):
+        # 同一时刻只运行一轮；单个任务失败记录到水位，不影响其他任务
+        from . import db
+        if not self._lock.acquire(blocking=False):
+            return []
+        results = []
+        try:
+            with self.app.app_context():
+                for source_key, cfg, kw, max_count in self.due_entries(now):
+                    try:
+                        results.append(crawl_incremental(source_key, kw, config=cfg, max_count=max_count))
+                    except Exception as e:
+                        db.session.rollback()
+                        results.append({'source': source_key, 'keyword': kw, 'error': str(e)})
+                db.session.remove()
+        finally:
+            self._lock.release()
+        return results
+
+    def _loop(self):
+        while not self._stop.wait(self.tick_seconds):
+            # 未拿到进程锁说明其他进程在调度，本轮跳过
+            if self.process_lock is not None and not self.process_lock.acquire():
+                continue
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"crawl scheduler error: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='crawl-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.process_lock is not None:
+            self.process_lock.release()
+
+
+def init_app(app):
+    # 首个请求到达时才启动后台线程：调试模式下重载器的父进程不处理请求，避免重复调度；
+    # 多进程部署时各进程都启动线程，但只有拿到 CRAWL_SCHEDULER_LOCK 文件锁的进程执行（设为空字符串不加锁）
+    lock_path = app.config.get('CRAWL_SCHEDULER_LOCK')
+    if lock_path is None:
+        lock_path = default_lock_path(app)
+    sched = CrawlScheduler(app, tick_seconds=app.config.get('CRAWL_SCHEDULER_TICK', 30), lock_path=lock_path)
+    app.extensions['crawl_scheduler'] = sched
+    if not app.config.get('CRAWL_SCHEDULER') or app.testing:
+        return sched
+
+    @app.before_request
+    def _start_crawl_scheduler():
+        sched.start()
+    return sched
@@ -0,0 +1,169 @@
+import re
+
+from markupsafe import Markup, escape
+
+# 全文检索：collection_records_fts 为 FTS5 外部内容表（trigram 分词，中文按任意三字子串命中），
+# 覆盖标题、摘要与正文，由触发器随 collection_records 的增删改同步；rank 使用带列权重的 bm25。
+# trigram 无法匹配不足三个字符的词，这类词（如两字地名）退回 LIKE 过滤；整个查询都是短词时
+# 或 SQLite 不支持 FTS5 trigram（3.34 以下）时，整体退回 LIKE。
+FTS_TABLE = 'collection_records_fts'
+MIN_TERM = 3
+# bm25 列权重：标题 > 摘要 > 正文
+RANK = 'bm25(10.0, 4.0, 1.0)'
+SNIPPET_TOKENS = 24
+# 片段高亮先用控制字符占位，转义后再换成 <mark>，避免正文中的 HTML 原样输出
+_OPEN, _CLOSE = '\x02', '\x03'
+
+_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, summary, deep_content, "
+    f"content='collection_records', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS collection_records_fts_ai AFTER INSERT ON collection_records BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, deep_content) VALUES (new.id, new.title, new.summary, new.deep_content); END",
+    f"CREATE TRIGGER IF NOT EXISTS collection_records_fts_ad AFTER DELETE ON collection_records BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, deep_content) VALUES ('delete', old.id, old.title, old.summary, old.deep_content); END",
+    f"CREATE TRIGGER IF NOT EXISTS collection_records_fts_au AFTER UPDATE OF title, summary, deep_content ON collection_records BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, summary, deep_content) VALUES ('delete', old.id, old.title, old.summary, old.deep_content); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, summary, deep_content) VALUES (new.id, new.title, new.summary, new.deep_content); END",
+]
+
+# 按数据库地址缓存是否已建好全文索引
+_available = {}
+
+
+def ensure():
+    # 建表与触发器；首次建表时从 collection_records 重建索引。返回是否可用
+    from sqlalchemy import text
+    from . import db
+    key = str(db.engine.url)
+    try:
+        with db.engine.begin() as conn:
+            existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {'n': FTS_TABLE}).first()
+            for stmt in _DDL:
+                conn.execute(text(stmt))
+            if not existed:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', :r)"), {'r': RANK})
+        _available[key] = True
+    except Exception:
+        _available[key] = False
+    return _available[key]
+
+
+def available():
+    from sqlalchemy import text
+    from . import db
+    key = str(db.engine.url)
+    if key not in _available:
+        try:
+            row = db.session.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {'n': FTS_TABLE}).first()
+            _available[key] = bool(row)
+        except Exception:
+            _available[key] = False
+    return _available[key]
+
+
+def split_terms(q):
+    # 按空白切词，返回 (可走全文索引的词, 需 LIKE 过滤的短词)
+    terms = [t for t in re.split(r'\s+', (q or '').strip()) if t]
+    return [t for t in terms if len(t) >= MIN_TERM], [t for t in terms if len(t) < MIN_TERM]
+
+
+def match_expr(terms):
+    # 每个词作为 FTS5 短语（双引号转义），词之间为 AND
+    return ' '.join('"%s"' % t.replace('"', '""') for t in terms)
+
+
+_fts_table = None
+
+
+def _fts():
+    # 同一个 table 对象：JOIN、MATCH 与按 rank 排序必须引用同一 FROM 项
+    global _fts_table
+    if _fts_table is None:
+        from sqlalchemy import column, table
+        _fts_table = table(FTS_TABLE, column('rowid'), column('rank'), column(FTS_TABLE))
+    return _fts_table
+
+
+def _like(terms):
+    from sqlalchemy import and_, or_
+    from .models import CollectionRecord
+    conds = []
+    for t in terms:
+        pat = '%' + t.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conds.append(or_(CollectionRecord.title.ilike(pat, escape='\\'),
+                         CollectionRecord.summary.ilike(pat, escape='\\'),
+                         CollectionRecord.deep_content.ilike(pat, escape='\\')))
+    return and_(*conds)
+
+
+def apply(query, q):
+    # 给 CollectionRecord 查询加上检索条件，返回 (查询, 是否可按相关度排序)
+    long_terms, short_terms = split_terms(q)
+    if not long_terms and not short_terms:
+        return query, False
+    ranked = bool(long_terms) and available()
+    if ranked:
+        from .models import CollectionRecord
+        fts = _fts()
+        query = query.join(fts, fts.c.rowid == CollectionRecord.id) \
+            .filter(getattr(fts.c, FTS_TABLE).op('MATCH')(match_expr(long_terms)))
+        if short_terms:
+            query = query.filter(_like(short_terms))
+    else:
+        query = query.filter(_like(long_terms + short_terms))
+    return query, ranked
+
+
+def order_by_rank():
+    return _fts().c.rank
+
+
+def _window(text, terms, tokens):
+    # 不走全文索引时在 Python 中截取首个命中附近的片段
+    text = ' '.join((text or '').split())
+    low = text.lower()
+    hits = [(low.find(t.lower()), t) for t in terms]
+    hits = [(i, t) for i, t in hits if i >= 0]
+    if not hits:
+        return ''
+    pos = min(i for i, _ in hits)
+    start = max(0, pos - tokens // 2)
+    piece = text[start:start + tokens * 2]
+    for t in sorted(set(t for _, t in hits), key=len, reverse=True):
+        piece = re.sub(re.escape(t), lambda m: _OPEN + m.group(0) + _CLOSE, piece, flags=re.I)
+    return ('…' if start > 0 else '') + piece + ('…' if start + tokens * 2 < len(text) else '')
+
+
+def _render(raw, html):
+    if html:
+        return Markup(str(escape(raw)).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>'))
+    return raw.replace(_OPEN, '【').replace(_CLOSE, '】')
+
+
+def snippets(ids, q, html=True, tokens=SNIPPET_TOKENS):
+    # 返回 {记录 id: 高亮片段}；html=True 时为转义后带 <mark> 的 Markup，否则以【】标出命中
+    from sqlalchemy import bindparam, text
+    from .models import CollectionRecord
+    from . import db
+    ids = list(ids)
+    long_terms, short_terms = split_terms(q)
+    if not ids or not (long_terms or short_terms):
+        return {}
+    out = {}
+    if long_terms and available():
+        sql = text(f"SELECT rowid, snippet({FTS_TABLE}, -1, :o, :c, '…', :n) FROM {FTS_TABLE} "
+                   f"WHERE {FTS_TABLE} MATCH :q AND rowid IN :ids").bindparams(bindparam('ids', expanding=True))
+        rows = db.session.execute(sql, {'o': _OPEN, 'c': _CLOSE, 'n': tokens, 'q': match_expr(long_terms), 'ids': ids}).all()
+        for rid, raw in rows:
+            out[rid] = _render(raw or '', html)
+        return out
+    rows = db.session.query(CollectionRecord.id, CollectionRecord.title, CollectionRecord.summary, CollectionRecord.deep_content) \
+        .filter(CollectionRecord.id.in_(ids)).all()
+    for rid, *texts in rows:
+        for t in texts:
+            raw = _window(t, long_terms + short_terms, tokens)
+            if raw:
+                out[rid] = _render(raw, html)
+                break
+    return out
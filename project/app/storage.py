@@ -0,0 +1,140 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+# SQLite 并发配置：每个新连接设置 WAL 日志（读写互不阻塞）、synchronous=NORMAL（WAL 下只在检查点 fsync）、
+# 页缓存、内存映射与忙等待超时；写事务经单一写线程串行执行，进程内的并发写入在队列中排队，
+# 不会互相争用写锁而报 "database is locked"。其他进程（如 worker.py）的写入仍由 busy_timeout 兜底。
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # 负数单位为 KiB
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 15000,
+    'temp_store': 'MEMORY',
+}
+DEFAULT_ENGINE_OPTIONS = {
+    'pool_size': 8,
+    'max_overflow': 16,
+    'pool_timeout': 30,
+}
+# 写线程空闲多久后退出（下次提交写任务时重新启动）
+IDLE_SECONDS = 5.0
+# 保护按应用懒创建写队列，避免冷启动时并发写入各自建出一个写线程
+_writer_lock = threading.Lock()
+
+
+def is_sqlite(uri):
+    return (uri or '').startswith('sqlite')
+
+
+def configure(app):
+    # 在 db.init_app 之前调用：补齐连接池参数；SQLITE_PRAGMAS 可按键覆盖默认值，设为 None 的键不设置
+    if not is_sqlite(app.config.get('SQLALCHEMY_DATABASE_URI')):
+        return
+    opts = dict(DEFAULT_ENGINE_OPTIONS)
+    opts.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opts
+
+
+def install(app, engine):
+    # 给引擎注册 connect 事件，逐个新连接执行 PRAGMA
+    from sqlalchemy import event
+    if not is_sqlite(str(engine.url)) or getattr(engine, '_pragmas_installed', False):
+        return
+    pragmas = dict(DEFAULT_PRAGMAS)
+    pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_conn, record):
+        cur = dbapi_conn.cursor()
+        try:
+            for k, v in pragmas.items():
+                if v is not None:
+                    cur.execute(f'PRAGMA {k}={v}')
+        finally:
+            cur.close()
+    engine._pragmas_installed = True
+
+
+class WriteQueue:
+    # 单一写线程：按提交顺序逐个执行写任务，每个任务一个事务（成功提交，异常回滚并把异常交给调用方）
+    def __init__(self, app):
+        self.app = app
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {'tasks': 0, 'errors': 0, 'max_depth': 0}
+
+    def in_writer(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn, *args, **kwargs):
+        fut = Future()
+        self._queue.put((fn, args, kwargs, fut))
+        with self._lock:
+            self.stats['max_depth'] = max(self.stats['max_depth'], self._queue.qsize())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='sqlite-writer', daemon=True)
+                self._thread.start()
+        return fut
+
+    def _loop(self):
+        while True:
+            try:
+                task = self._queue.get(timeout=IDLE_SECONDS)
+            except queue.Empty:
+                with self._lock:
+                    # 加锁后再确认一次，避免与 submit 竞争导致任务无人处理
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            fn, args, kwargs, fut = task
+            if not fut.set_running_or_notify_cancel():
+                continue
+            with self.app.app_context():
+                from . import db
+                try:
+                    result = fn(*args, **kwargs)
+                    db.session.commit()
+                    fut.set_result(result)
+                except Exception as e:
+                    db.session.rollback()
+                    self.stats['errors'] += 1
+                    fut.set_exception(e)
+                finally:
+                    self.stats['tasks'] += 1
+                    db.session.remove()
+
+
+def writer(app=None):
+    from flask import current_app
+    app = app or current_app._get_current_object()
+    if not app.config.get('SQLITE_WRITE_QUEUE') or not is_sqlite(app.config.get('SQLALCHEMY_DATABASE_URI')):
+        return None
+    wq = app.extensions.get('sqlite_writer')
+    if wq is None:
+        with _writer_lock:
+            wq = app.extensions.get('sqlite_writer')
+            if wq is None:
+                wq = app.extensions['sqlite_writer'] = WriteQueue(app)
+    return wq
+
+
+def write(fn, *args, **kwargs):
+    # 在写线程中执行 fn(*args, **kwargs) 并提交，阻塞等待并返回其结果（或抛出其异常）。
+    # fn 内使用 db.session，返回值不要带 ORM 对象（写线程的会话在任务结束后即关闭）。
+    # 未启用写队列或已在写线程中时，直接在当前线程执行并提交
+    from . import db
+    wq = writer()
+    if wq is None or wq.in_writer():
+        try:
+            result = fn(*args, **kwargs)
+            db.session.commit()
+            return result
+        except Exception:
+            db.session.rollback()
+            raise
+    return wq.submit(fn, *args, **kwargs).result()
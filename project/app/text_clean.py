@@ -0,0 +1,77 @@
+import re
+
+# 采集结果清洗：各采集器共用一套预编译模式，整批处理条目。
+# 来源之间只有参数不同：最短长度、有效字符（中文/字母/数字）比例下限与缺省来源名；
+# 可在采集源 config_json 的 clean 中覆盖，如 {"clean": {"min_length": 8}}
+DEFAULT_COVER = 'https://dummyimage.com/242x162/18202D/ffffff&text=NEWS'
+_ZERO_WIDTH = re.compile('[\u200b\u200c\u200d]')
+_INVALID = re.compile(r'[^\u4e00-\u9fffA-Za-z0-9]+')
+
+
+def sanitize(text):
+    # 去零宽字符并把连续空白折叠为单个空格
+    if not text:
+        return ''
+    t = str(text)
+    # 零宽字符很少出现，先做子串判断，避免每条都跑一遍替换
+    if '\u200b' in t or '\u200c' in t or '\u200d' in t:
+        t = _ZERO_WIDTH.sub('', t)
+    return ' '.join(t.split())
+
+
+class TextCleaner:
+    def __init__(self, min_length=4, valid_ratio=0.4, default_source='未知来源', default_cover=DEFAULT_COVER):
+        self.min_length = int(min_length)
+        self.valid_ratio = float(valid_ratio)
+        self.default_source = default_source
+        self.default_cover = default_cover
+
+    def is_noise(self, text):
+        # text 应已经过 sanitize
+        n = len(text)
+        if not n or n < self.min_length:
+            return True
+        return len(_INVALID.sub('', text)) / n < self.valid_ratio
+
+    def clean(self, items):
+        # 去噪声标题、按标题（不区分大小写）去重，噪声概要替换为“无概要”，非 http(s) 链接置空
+        cleaned = []
+        seen = set()
+        for it in items:
+            title = sanitize(it.get('title'))
+            if self.is_noise(title):
+                continue
+            key = title.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            summary = sanitize(it.get('summary'))
+            url = (it.get('original_url') or '').strip()
+            cover = (it.get('cover') or '').strip()
+            if not url.startswith(('http://', 'https://')):
+                url = ''
+            if not cover.startswith(('http://', 'https://')):
+                cover = self.default_cover
+            cleaned.append({
+                'title': title,
+                'summary': '无概要' if self.is_noise(summary) else summary,
+                'cover': cover,
+                'original_url': url,
+                'source': sanitize(it.get('source')) or self.default_source
+            })
+        return cleaned
+
+
+# 各来源的默认参数：百度结果混有较多短标题/导航文本，最短长度取 6
+PROFILES = {
+    'baidu': {'min_length': 6, 'default_source': '未知来源'},
+    'xinhua': {'min_length': 4, 'default_source': '新华网'},
+    'sina': {'min_length': 4, 'default_source': '新浪网'},
+}
+
+
+def cleaner_for(source_key, overrides=None):
+    params = dict(PROFILES.get(source_key) or {})
+    if isinstance(overrides, dict):
+        params.update({k: v for k, v in overrides.items() if k in ('min_length', 'valid_ratio', 'default_source', 'default_cover')})
+    return TextCleaner(**params)
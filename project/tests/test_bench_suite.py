@@ -0,0 +1,25 @@
+import unittest
+
+from tools import bench_suite
+
+
+class BenchSuiteTest(unittest.TestCase):
+    def test_outputs_match_baseline(self):
+        # 只比较抽取结果指纹（离线、每项运行一次），吞吐与内存由 tools/bench_suite.py 单独比较
+        baseline, _ = bench_suite.load_baseline()
+        self.assertTrue(baseline)
+        results = bench_suite.run(quick=True)
+        self.assertEqual(set(results), set(baseline))
+        changed = [n for n, cur in results.items() if cur['digest'] != baseline[n]['digest']]
+        self.assertEqual(changed, [])
+
+    def test_compare_flags_regressions(self):
+        base = {'a': {'ops_per_sec': 100.0, 'peak_kb': 100.0, 'digest': 'x'}}
+        ok = {'a': {'ops_per_sec': 80.0, 'peak_kb': 110.0, 'digest': 'x'}}
+        bad = {'a': {'ops_per_sec': 50.0, 'peak_kb': 500.0, 'digest': 'y'}}
+        self.assertEqual(bench_suite.compare(ok, base, 0.3), [])
+        self.assertEqual(len(bench_suite.compare(bad, base, 0.3)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+import charset_normalizer
+
+from app.charset import CharsetDecoder
+
+
+GBK_PAGE = ('<html><head><title>四川新闻</title></head><body>' + '成都平原经济区协同发展，' * 200 + '</body></html>').encode('gb18030')
+
+
+class CharsetDecoderTest(unittest.TestCase):
+    def test_header_charset_wins(self):
+        d = CharsetDecoder()
+        self.assertIn('成都', d.decode(GBK_PAGE, 'https://a.cn/1', 'text/html; charset=GBK'))
+        self.assertEqual(d.stats['header'], 1)
+        self.assertEqual(d.domain_encoding('a.cn'), 'gb18030')
+
+    def test_detector_runs_once_per_domain(self):
+        d = CharsetDecoder()
+        with mock.patch('charset_normalizer.from_bytes', wraps=charset_normalizer.from_bytes) as det:
+            for i in range(3):
+                self.assertIn('协同发展', d.decode(GBK_PAGE, 'https://b.cn/%d' % i, 'text/html'))
+        self.assertEqual(det.call_count, 1)
+        self.assertEqual(d.stats['detector'], 1)
+        self.assertEqual(d.stats['cache'], 2)
+
+    def test_meta_charset(self):
+        d = CharsetDecoder()
+        page = b'<meta charset="gb2312">' + GBK_PAGE
+        self.assertIn('四川', d.decode(page, 'https://c.cn/', ''))
+        self.assertEqual(d.stats['meta'], 1)
+        self.assertEqual(d.domain_encoding('c.cn'), 'gb18030')
+
+    def test_cache_miss_falls_back_to_detector(self):
+        # 没有声明的页面：记忆的编码解不开时改用探测结果，并更新站点记忆
+        d = CharsetDecoder()
+        d._domains['e.cn'] = 'ascii'
+        page = ('<html><body>' + '成都平原经济区协同发展，' * 100 + '</body></html>').encode('utf-8')
+        self.assertIn('协同发展', d.decode(page, 'https://e.cn/1', 'text/html'))
+        self.assertEqual((d.stats['cache'], d.stats['meta'], d.stats['detector']), (0, 0, 1))
+        self.assertEqual(d.domain_encoding('e.cn'), 'utf-8')
+
+    def test_declaration_beats_domain_memory(self):
+        # 站点记为 GBK 时，声明 utf-8 的页面仍按 utf-8 解码
+        d = CharsetDecoder()
+        d.decode(GBK_PAGE, 'https://d.cn/1', 'text/html; charset=gbk')
+        page = '<html><head><meta charset="utf-8"><title>四川新闻</title></head><body>成都平原经济区</body></html>'.encode('utf-8')
+        self.assertIn('成都平原经济区', d.decode(page, 'https://d.cn/2', 'text/html'))
+        self.assertEqual(d.stats['cache'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
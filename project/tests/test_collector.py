@@ -0,0 +1,434 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app import create_app
+from app import admin, dedup, rule_index
+from app.models import CollectionRecord
+
+
+class FakeCrawler:
+    def __init__(self, key, titles, delay=0.3):
+        self.key = key
+        self.titles = titles
+        self.delay = delay
+
+    def iter_data(self, keyword, max_count=20):
+        time.sleep(self.delay)
+        for t in self.titles[:max_count]:
+            yield {'title': t, 'summary': '摘要', 'cover': '', 'original_url': 'https://example.com/' + t, 'source': self.key}
+
+    def to_display_schema(self, items):
+        return [dict(it) for it in items]
+
+
+def parse_sse(body):
+    events = []
+    for block in body.split('\n\n'):
+        lines = [ln for ln in block.strip().split('\n') if not ln.startswith('id: ')]
+        if len(lines) == 2 and lines[0].startswith('event: '):
+            events.append((lines[0][7:], lines[1][6:]))
+    return events
+
+
+class CollectorTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + self.db_path, 'TESTING': True})
+        self.client = self.app.test_client()
+        self.client.post('/login', data={'username': 'admin', 'password': '123456'})
+        # 规则索引是进程级缓存，每个用例使用独立的临时库
+        rule_index.invalidate()
+
+    def tearDown(self):
+        with self.app.app_context():
+            admin.db.engine.dispose()
+        os.remove(self.db_path)
+
+
+class FanoutStreamTest(CollectorTestCase):
+    def test_sources_run_concurrently_and_dedupe(self):
+        fakes = {
+            'baidu': FakeCrawler('baidu', ['甲新闻', '乙新闻']),
+            'xinhua': FakeCrawler('xinhua', ['乙新闻', '丙新闻']),
+        }
+        with mock.patch.object(admin, 'create_crawler', side_effect=lambda key, config=None: fakes[key]):
+            t0 = time.time()
+            res = self.client.get('/admin/collector/stream?source=all&keyword=x&max_count=5&pace_ms=0')
+            body = res.get_data(as_text=True)
+            elapsed = time.time() - t0
+        events = parse_sse(body)
+        titles = sorted(json.loads(d)['title'] for e, d in events if e == 'item')
+        self.assertEqual(titles, sorted(['甲新闻', '乙新闻', '丙新闻']))
+        self.assertIn('done', [e for e, _ in events])
+        self.assertLess(elapsed, 0.55)
+
+    def test_dead_or_stuck_source_does_not_hang(self):
+        # 线程未发出结束事件就退出、或一直无进展的来源按失败结束，整条流照常完成
+        class _Killed(BaseException):
+            pass
+
+        class Dying(FakeCrawler):
+            def iter_data(self, keyword, max_count=20):
+                raise _Killed()
+
+        release = threading.Event()
+
+        class Stuck(FakeCrawler):
+            def iter_data(self, keyword, max_count=20):
+                release.wait(5)
+                return iter(())
+
+        fakes = {'baidu': FakeCrawler('baidu', ['甲新闻'], delay=0), 'xinhua': Dying('xinhua', []), 'sina': Stuck('sina', [])}
+        with mock.patch.object(admin, 'create_crawler', side_effect=lambda key, config=None: fakes[key]), \
+                mock.patch.object(admin, '_enabled_sources', return_value=[type('T', (), {'key': k, 'name': k, 'config_json': ''})() for k in fakes]), \
+                mock.patch.object(admin, '_FANOUT_KEEPALIVE', 0.1), mock.patch.object(admin, '_FANOUT_IDLE_LIMIT', 0.5), \
+                mock.patch('threading.excepthook'):
+            body = self.client.get('/admin/collector/stream?source=all&keyword=x&max_count=5&pace_ms=0').get_data(as_text=True)
+        release.set()
+        self.assertIn(': keepalive', body)
+        events = parse_sse(body)
+        errors = {json.loads(d)['source']: json.loads(d).get('error') for e, d in events if e == 'source' and json.loads(d)['done']}
+        self.assertEqual(errors, {'baidu': None, 'xinhua': '采集线程异常退出', 'sina': '来源长时间无进展'})
+        self.assertEqual(events[-1][0], 'done')
+
+
+class DedupIndexTest(CollectorTestCase):
+    def test_normalization(self):
+        self.assertEqual(dedup.normalize_url('https://WWW.Example.com/a/?utm_source=x&b=2&a=1#top'),
+                         dedup.normalize_url('http://example.com/a?a=1&b=2'))
+        self.assertEqual(dedup.title_fingerprint('成都发布新政策_新华网'), dedup.title_fingerprint('成都发布 新政策！'))
+
+    def test_save_skips_known_items(self):
+        items = [{'title': '成都发布新政策', 'original_url': 'https://a.com/1?spm=1'},
+                 {'title': '成都发布新政策 - 新浪网', 'original_url': 'https://b.com/2'},
+                 {'title': '重庆另一条新闻', 'original_url': 'https://a.com/3'}]
+        first = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': items}).get_json()
+        self.assertEqual(len(first['saved_ids']), 2)
+        again = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [{'title': '完全不同的标题', 'original_url': 'https://a.com/1'}]}).get_json()
+        self.assertEqual(again['saved_ids'], [])
+        self.assertEqual(again['duplicate_ids'], [first['saved_ids'][0]])
+
+    def test_bulk_save_upserts_by_url(self):
+        items = [{'title': '批量新闻第%d条内容' % i, 'summary': '' if i % 2 else '摘要%d' % i,
+                  'original_url': 'https://bulk.example.com/%d' % i, 'source': '百度'} for i in range(300)]
+        t0 = time.perf_counter()
+        first = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': items}).get_json()
+        self.assertLess(time.perf_counter() - t0, 5)
+        self.assertEqual(len(first['saved_ids']), 300)
+        self.assertEqual([r['status'] for r in first['results']], ['saved'] * 300)
+        # 深度采集后再次保存：按规范化 URL 命中，补全正文与空摘要；未带来新内容的条目记为 duplicate
+        again = [dict(items[1], deep_content='正文内容', original_url='http://www.bulk.example.com/1?utm_source=x'),
+                 dict(items[2], summary='新的摘要'),
+                 dict(items[1], title='同一链接的另一标题')]
+        resp = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': again}).get_json()
+        self.assertEqual([r['status'] for r in resp['results']], ['updated', 'duplicate', 'duplicate'])
+        self.assertEqual(resp['updated_ids'], [first['saved_ids'][1]])
+        self.assertEqual([r['id'] for r in resp['results']], [first['saved_ids'][1], first['saved_ids'][2], first['saved_ids'][1]])
+        with self.app.app_context():
+            self.assertEqual(CollectionRecord.query.count(), 300)
+            rec = CollectionRecord.query.get(first['saved_ids'][1])
+            self.assertTrue(rec.deep_collected)
+            self.assertEqual(rec.deep_content, '正文内容')
+            self.assertEqual(CollectionRecord.query.get(first['saved_ids'][2]).summary, '摘要2')
+
+    def test_stamp_keeps_url_hash_unique(self):
+        ids = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [
+            {'title': '第一条独立新闻标题', 'original_url': 'https://u.example.com/1'},
+            {'title': '第二条独立新闻标题', 'original_url': 'https://u.example.com/2'}]}).get_json()['saved_ids']
+        self.client.post('/admin/data_warehouse/edit/%d' % ids[1], data={'title': '第二条独立新闻标题', 'original_url': 'https://u.example.com/1'})
+        with self.app.app_context():
+            rec = CollectionRecord.query.get(ids[1])
+            self.assertEqual(rec.original_url, 'https://u.example.com/1')
+            self.assertIsNone(rec.url_hash)
+            self.assertIsNotNone(CollectionRecord.query.get(ids[0]).url_hash)
+
+    def test_stream_flags_or_drops_known(self):
+        self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [{'title': '甲新闻旧闻', 'original_url': 'https://example.com/甲新闻旧闻'}]})
+        fake = FakeCrawler('baidu', ['甲新闻旧闻', '乙新闻新的'], delay=0)
+        with mock.patch.object(admin, 'create_crawler', return_value=fake):
+            flagged = parse_sse(self.client.get('/admin/collector/stream?source=baidu&max_count=5&pace_ms=0').get_data(as_text=True))
+            dropped = parse_sse(self.client.get('/admin/collector/stream?source=baidu&max_count=5&pace_ms=0&dedup=drop').get_data(as_text=True))
+        flagged_items = [json.loads(d) for e, d in flagged if e == 'item']
+        self.assertEqual([bool(it.get('known')) for it in flagged_items], [True, False])
+        self.assertEqual([json.loads(d)['title'] for e, d in dropped if e == 'item'], ['乙新闻新的'])
+
+
+class NearDuplicateTest(CollectorTestCase):
+    def test_syndicated_items_link_to_first(self):
+        items = [
+            {'title': '成都出台新政策支持民营经济发展壮大', 'summary': '成都市政府日前印发意见，从市场准入、融资支持等方面提出二十条具体措施，支持民营经济发展壮大。', 'original_url': 'https://a.com/1', 'source': '百度'},
+            {'title': '重庆举办国际马拉松赛事吸引三万人参赛', 'summary': '本周末重庆国际马拉松在南滨路鸣枪开跑。', 'original_url': 'https://a.com/2', 'source': '百度'},
+            {'title': '成都出台新政 全力支持民营经济发展壮大_新华网', 'summary': '成都市政府日前印发意见，从市场准入、融资支持等方面提出二十条具体措施支持民营经济发展。', 'original_url': 'https://b.com/3', 'source': '新华网'},
+        ]
+        ids = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': items}).get_json()['saved_ids']
+        with self.app.app_context():
+            dups = {r.id: r.duplicate_of for r in CollectionRecord.query.all()}
+        self.assertEqual(dups, {ids[0]: None, ids[1]: None, ids[2]: ids[0]})
+        page = self.client.get('/admin/data_warehouse?collapse=1&per_page=50').get_data(as_text=True)
+        self.assertNotIn('https://b.com/3', page)
+        self.client.get('/admin/data_warehouse/delete/%d' % ids[0])
+        with self.app.app_context():
+            self.assertIsNone(CollectionRecord.query.get(ids[2]).duplicate_of)
+
+    def test_delete_canonical_keeps_cluster(self):
+        # 删除簇首后由最早的剩余成员接任，其余成员仍归入同一簇
+        base = {'summary': '四川省气象台发布暴雨橙色预警，成都、德阳、绵阳等地部分学校停课，多条高速公路临时管制。', 'source': '百度'}
+        titles = ['四川发布暴雨橙色预警多地停课停工', '四川省发布暴雨橙色预警 多地学校停课停工',
+                  '四川暴雨橙色预警发布 多地停课停工_新华网', '暴雨橙色预警：四川多地停课停工']
+        items = [dict(base, title=t, original_url='https://%s.com/rain' % 'abcd'[i]) for i, t in enumerate(titles)]
+        ids = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': items}).get_json()['saved_ids']
+        self.assertEqual(len(ids), 4)
+        with self.app.app_context():
+            self.assertEqual([CollectionRecord.query.get(i).duplicate_of for i in ids], [None, ids[0], ids[0], ids[0]])
+        self.client.get('/admin/data_warehouse/delete/%d' % ids[0])
+        with self.app.app_context():
+            self.assertEqual([CollectionRecord.query.get(i).duplicate_of for i in ids[1:]], [None, ids[1], ids[1]])
+        # 删除非簇首成员不影响其余成员
+        self.client.get('/admin/data_warehouse/delete/%d' % ids[2])
+        with self.app.app_context():
+            self.assertEqual([CollectionRecord.query.get(i).duplicate_of for i in (ids[1], ids[3])], [None, ids[1]])
+
+    def test_signatures_outside_writer(self):
+        # MinHash 签名与同桶候选在请求线程计算，写线程只写入；跨批次的近似重复仍能指向已入库记录
+        import threading
+        from app import near_dup
+        first = {'title': '四川发布暴雨橙色预警多地停课停工', 'summary': '四川省气象台发布暴雨橙色预警，成都、德阳等地部分学校停课。',
+                 'original_url': 'https://a.com/rain', 'source': '百度'}
+        later = dict(first, title='四川省发布暴雨橙色预警 多地学校停课停工', original_url='https://b.com/rain', source='新华网')
+        rid = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [first]}).get_json()['saved_ids'][0]
+        threads = []
+        orig = near_dup.signature
+
+        def spy(grams):
+            threads.append(threading.current_thread().name)
+            return orig(grams)
+        with mock.patch.object(near_dup, 'signature', side_effect=spy):
+            dup = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [later]}).get_json()['saved_ids'][0]
+        self.assertTrue(threads)
+        self.assertNotIn('sqlite-writer', threads)
+        with self.app.app_context():
+            self.assertEqual(CollectionRecord.query.get(dup).duplicate_of, rid)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class PagedCrawler:
+    # 模拟按时间倒序的分页列表，记录实际请求的页数
+    def __init__(self, titles, per_page=10):
+        self.titles = titles
+        self.per_page = per_page
+        self.pages = 0
+
+    def iter_data(self, keyword, max_count=30):
+        count = 0
+        for start in range(0, len(self.titles), self.per_page):
+            self.pages += 1
+            for t in self.titles[start:start + self.per_page]:
+                yield {'title': t, 'summary': '摘要', 'cover': '', 'original_url': 'https://example.com/' + t, 'source': 'fake'}
+                count += 1
+                if count >= max_count:
+                    return
+
+
+class IncrementalCrawlTest(CollectorTestCase):
+    def test_stops_at_watermark(self):
+        from app import scheduler
+        first = ['旧闻标题%02d号' % i for i in range(30)]
+        with self.app.app_context():
+            c = PagedCrawler(first)
+            r1 = scheduler.crawl_incremental('fake', '成都', crawler=c, max_count=30)
+            self.assertEqual(len(r1['saved_ids']), 30)
+            self.assertEqual(c.pages, 3)
+            c = PagedCrawler(['新闻标题甲号', '新闻标题乙号'] + first)
+            r2 = scheduler.crawl_incremental('fake', '成都', crawler=c, max_count=30)
+            self.assertEqual(len(r2['saved_ids']), 2)
+            self.assertTrue(r2['reached_watermark'])
+            self.assertEqual(c.pages, 1)
+            self.assertEqual(CollectionRecord.query.count(), 32)
+            status = scheduler.watermark_status()
+            self.assertEqual(status[0]['newest_title'], '新闻标题甲号')
+
+    def test_first_run_with_cached_redirects(self):
+        # 首次运行且跳转链接命中映射表时，水位行不得在入库期间挂在会话里抢占写锁
+        from app import resolver, scheduler
+        from app.models import CrawlWatermark, UrlMapping
+        links = ['https://www.baidu.com/link?url=wm%d' % i for i in range(3)]
+
+        class LinkCrawler:
+            def iter_data(self, keyword, max_count=30):
+                for i, u in enumerate(links):
+                    yield {'title': '跳转新闻标题%d号' % i, 'summary': '摘要', 'cover': '', 'original_url': u, 'source': 'fake'}
+        with self.app.app_context():
+            for i, u in enumerate(links):
+                admin.db.session.add(UrlMapping(short_hash=resolver.url_key(u), short_url=u, final_url='https://final.example.com/%d' % i))
+            admin.db.session.commit()
+            r = scheduler.crawl_incremental('fake', '成都', crawler=LinkCrawler())
+            self.assertEqual(len(r['saved_ids']), 3)
+            self.assertEqual(CrawlWatermark.query.count(), 1)
+            self.assertEqual(CollectionRecord.query.filter(CollectionRecord.original_url.like('https://final.example.com/%')).count(), 3)
+
+    def test_watermark_created_by_another_process(self):
+        # 首次运行期间另一个进程先建了同一 (来源, 关键词) 的水位行：不得撞唯一约束，以本次结果更新
+        from sqlalchemy import text
+        from app import scheduler
+        from app.models import CrawlWatermark
+        app = self.app
+
+        class RacingCrawler(PagedCrawler):
+            def iter_data(self, keyword, max_count=30):
+                with app.app_context(), admin.db.engine.begin() as conn:
+                    conn.execute(text("INSERT INTO crawl_watermarks (source_key, keyword, recent_keys, last_new_count) VALUES ('fake', '成都', '[]', 0)"))
+                yield from super().iter_data(keyword, max_count)
+        with self.app.app_context():
+            r = scheduler.crawl_incremental('fake', '成都', crawler=RacingCrawler(['竞争新闻标题甲号']))
+            self.assertIsNone(r['error'])
+            self.assertEqual(CrawlWatermark.query.count(), 1)
+            self.assertEqual(CrawlWatermark.query.first().newest_title, '竞争新闻标题甲号')
+
+    def test_process_lock_single_holder(self):
+        from app import scheduler
+        path = scheduler.default_lock_path(self.app)
+        first, second = scheduler.ProcessLock(path), scheduler.ProcessLock(path)
+        try:
+            self.assertTrue(first.acquire())
+            self.assertFalse(second.acquire())
+            first.release()
+            self.assertTrue(second.acquire())
+        finally:
+            first.release()
+            second.release()
+
+    def test_due_entries_follow_interval(self):
+        from datetime import datetime, timedelta
+        from app import scheduler
+        from app.models import CrawlerSource
+        with self.app.app_context():
+            admin.db.session.add(CrawlerSource(name='测试', key='fake', enabled=True,
+                                               config_json=json.dumps({'schedule': {'keywords': ['成都'], 'interval_minutes': 10}})))
+            admin.db.session.commit()
+            sched = self.app.extensions['crawl_scheduler']
+            self.assertEqual([e[2] for e in sched.due_entries()], ['成都'])
+            scheduler.crawl_incremental('fake', '成都', crawler=PagedCrawler(['旧闻标题甲号']))
+            self.assertEqual(sched.due_entries(), [])
+            self.assertEqual(len(sched.due_entries(datetime.utcnow() + timedelta(minutes=11))), 1)
+
+
+class CrawlJobTest(CollectorTestCase):
+    def test_job_runs_in_worker_pool_and_stream_attaches(self):
+        from app import jobs
+        fake = FakeCrawler('baidu', ['任务新闻甲', '任务新闻乙', '任务新闻丙'], delay=0.1)
+        res = self.client.post('/admin/collector/run', json={'keyword': 'k', 'max_count': 3, 'source': 'baidu'})
+        self.assertEqual(res.status_code, 202)
+        job_id = res.get_json()['job_id']
+        self.assertEqual(self.client.get('/admin/collector/jobs/%d' % job_id).get_json()['status'], 'queued')
+        pool = jobs.WorkerPool(self.app, workers=2, poll_seconds=0.1)
+        with mock.patch('app.crawler.create_crawler', return_value=fake):
+            pool.start()
+            try:
+                body = self.client.get('/admin/collector/jobs/%d/stream' % job_id).get_data(as_text=True)
+            finally:
+                pool.stop()
+        events = parse_sse(body)
+        self.assertEqual([json.loads(d)['title'] for e, d in events if e == 'item'], ['任务新闻甲', '任务新闻乙', '任务新闻丙'])
+        self.assertEqual(events[-1][0], 'done')
+        status = self.client.get('/admin/collector/jobs/%d' % job_id).get_json()
+        self.assertEqual((status['status'], status['progress'], status['item_count']), ('done', 100, 3))
+        result = self.client.get('/admin/collector/jobs/%d/result' % job_id).get_json()
+        self.assertEqual(len(result['items']), 3)
+        # 断线重连：从 Last-Event-ID 之后继续
+        body = self.client.get('/admin/collector/jobs/%d/stream' % job_id, headers={'Last-Event-ID': '2'}).get_data(as_text=True)
+        self.assertEqual([json.loads(d)['title'] for e, d in parse_sse(body) if e == 'item'], ['任务新闻丙'])
+
+    def test_cancel_queued_job(self):
+        from app import jobs
+        job_id = self.client.post('/admin/collector/jobs', json={'keyword': 'k', 'source': 'baidu'}).get_json()['job_id']
+        self.assertTrue(self.client.post('/admin/collector/jobs/%d/cancel' % job_id).get_json()['cancelled'])
+        with self.app.app_context():
+            self.assertIsNone(jobs.claim('t'))
+
+
+    def test_quiet_job_keeps_heartbeat(self):
+        # 长时间没有产出的任务靠定时心跳保持领取，不会被第二个工作者重复执行
+        from app import jobs
+        fake = FakeCrawler('baidu', ['慢速来源新闻'], delay=0.6)
+        job_id = self.client.post('/admin/collector/jobs', json={'keyword': 'k', 'source': 'baidu', 'max_count': 1}).get_json()['job_id']
+        claimed = []
+
+        def run():
+            with self.app.app_context():
+                jobs.run_job(jobs.claim('w1'), 'w1')
+        with mock.patch('app.crawler.create_crawler', return_value=fake), \
+                mock.patch.object(jobs, 'HEARTBEAT_SECONDS', 0.05), mock.patch.object(jobs, 'STALE_SECONDS', 0.3):
+            t = threading.Thread(target=run)
+            t.start()
+            with self.app.app_context():
+                while t.is_alive():
+                    claimed.append(jobs.claim('w2'))
+                    time.sleep(0.05)
+            t.join()
+        self.assertEqual(set(claimed), {None})
+        status = self.client.get('/admin/collector/jobs/%d' % job_id).get_json()
+        self.assertEqual((status['status'], status['item_count']), ('done', 1))
+
+    def test_reclaimed_job_drops_stale_writes(self):
+        # 被重新领取后，旧执行的写入被丢弃；同一任务的序号唯一
+        from sqlalchemy.exc import IntegrityError
+        from app import db, jobs, storage
+        from app.models import CrawlJobItem
+        job_id = self.client.post('/admin/collector/jobs', json={'keyword': 'k', 'source': 'baidu'}).get_json()['job_id']
+        with self.app.app_context():
+            self.assertEqual(jobs.claim('w1'), job_id)
+            with mock.patch.object(jobs, 'STALE_SECONDS', -1):
+                self.assertEqual(jobs.claim('w2'), job_id)
+            self.assertEqual(storage.write(jobs._append_item, job_id, 'w1', 1, 1, 0, 20, {'title': '旧执行'}), 0)
+            self.assertEqual(storage.write(jobs._append_item, job_id, 'w2', 1, 1, 0, 20, {'title': '新执行'}), 1)
+            self.assertEqual([json.loads(r.data)['title'] for r in jobs.job_items(job_id)], ['新执行'])
+            with self.assertRaises(IntegrityError):
+                storage.write(lambda: db.session.add(CrawlJobItem(job_id=job_id, seq=1, data='{}')))
+
+    def test_job_list_limit(self):
+        for limit in ('abc', '-5', '100000'):
+            self.assertEqual(self.client.get('/admin/collector/jobs?limit=' + limit).status_code, 200)
+
+
+class ParallelDeepCollectTest(CollectorTestCase):
+    def test_stream_parallel_with_host_limit(self):
+        import threading
+        items = [{'title': '深度采集测试新闻%d号' % i, 'original_url': 'https://%s.example.com/%d' % ('ab'[i % 2], i)} for i in range(6)]
+        ids = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': items}).get_json()['saved_ids']
+        active, peak = {}, {}
+        lock = threading.Lock()
+
+        def fake_extract(url):
+            host = url.split('/')[2]
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.15)
+            with lock:
+                active[host] -= 1
+            return {'title': '', 'content': '正文 ' + url}
+
+        with mock.patch.object(admin, '_generic_extract', side_effect=fake_extract):
+            t0 = time.time()
+            body = self.client.get('/admin/data_warehouse/deep_collect/stream?per_host=1&batch_size=4&ids=' + ','.join(map(str, ids + [99999]))).get_data(as_text=True)
+            elapsed = time.time() - t0
+        events = parse_sse(body)
+        records = [json.loads(d) for e, d in events if e == 'record']
+        self.assertEqual(len(records), 7)
+        done = json.loads([d for e, d in events if e == 'done'][0])
+        self.assertEqual(sorted(done['updated']), sorted(ids))
+        self.assertEqual(done['failed'], [99999])
+        self.assertEqual(peak, {'a.example.com': 1, 'b.example.com': 1})
+        self.assertLess(elapsed, 0.8)
+        with self.app.app_context():
+            rows = CollectionRecord.query.filter(CollectionRecord.id.in_(ids)).all()
+            self.assertTrue(all(r.deep_collected and r.deep_content.startswith('正文') for r in rows))
@@ -0,0 +1,149 @@
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app import crawler, http_cache
+from app.crawler import BaiduCrawler, SinaCrawler, XinhuaCrawler, _ordered_pages
+
+
+def _baidu_page(page, n=10):
+    rows = []
+    for i in range(n):
+        rows.append(
+            '<div class="result-op c-container"><h3><a href="https://example.com/%d/%d">第%d页新闻标题%d号</a></h3>'
+            '<span aria-label="摘要：">这是第%d页第%d条新闻的摘要内容</span>'
+            '<span aria-label="新闻来源：">示例来源</span></div>' % (page, i, page, i, page, i)
+        )
+    return '<html><body>%s</body></html>' % ''.join(rows)
+
+
+class FakeResponse:
+    def __init__(self, text='', status_code=200, js=None, headers=None):
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._js = js
+
+    def json(self):
+        return self._js
+
+
+class OrderedPagesTest(unittest.TestCase):
+    def test_yields_in_page_order(self):
+        def fetch(p):
+            time.sleep(0.05 * (5 - p))
+            return p * 10
+        out = list(_ordered_pages(fetch, range(5), concurrency=5))
+        self.assertEqual(out, [(p, p * 10) for p in range(5)])
+
+    def test_stops_prefetching_after_break(self):
+        calls = []
+        def fetch(p):
+            calls.append(p)
+            return p
+        for p, _ in _ordered_pages(fetch, range(5), concurrency=2, prefetch=1):
+            break
+        self.assertEqual(calls, [0])
+
+
+class BaiduConcurrentTest(unittest.TestCase):
+    def fake_get(self, url, headers=None, params=None, timeout=None):
+        time.sleep(0.2)
+        page = int(params['pn']) // 10
+        return FakeResponse(_baidu_page(page))
+
+    def test_concurrent_fetch_keeps_order_and_is_fast(self):
+        c = BaiduCrawler(config={'concurrency': 5})
+        with mock.patch.object(crawler.http_client, 'get', side_effect=self.fake_get):
+            t0 = time.time()
+            items = list(c.iter_data('新闻', max_count=40))
+            elapsed = time.time() - t0
+        self.assertEqual(len(items), 40)
+        self.assertEqual(items[0]['title'], '第0页新闻标题0号')
+        self.assertEqual(items[-1]['title'], '第3页新闻标题9号')
+        self.assertLess(elapsed, 0.6)
+
+    def test_sequential_mode_matches(self):
+        c = BaiduCrawler(config={'concurrency': 1})
+        with mock.patch.object(crawler.http_client, 'get', side_effect=self.fake_get):
+            items = c.fetch_data('新闻', max_count=25)
+        self.assertEqual([it['title'] for it in items[:2]], ['第0页新闻标题0号', '第0页新闻标题1号'])
+        self.assertEqual(len(items), 25)
+
+
+class SinaConcurrentTest(unittest.TestCase):
+    def test_feed_pages_in_order(self):
+        def fake_get(url, headers=None, params=None, timeout=None):
+            page = int(params['page'])
+            num = int(params['num'])
+            data = [{'title': '新浪第%d页新闻%d' % (page, i), 'intro': '新浪新闻简介内容', 'url': 'https://news.sina.com.cn/%d/%d' % (page, i)} for i in range(num)]
+            return FakeResponse(js={'result': {'data': data}})
+        c = SinaCrawler(config={'concurrency': 3, 'http_cache': False})
+        with mock.patch.object(crawler.http_client, 'get', side_effect=fake_get):
+            items = c.fetch_data('', max_count=30)
+        self.assertEqual(len(items), 30)
+        self.assertEqual(items[0]['title'], '新浪第1页新闻0')
+
+
+BAIDU_SAMPLE = """<html><body>
+<div class="result-op c-container new-pmd"><h3 class="t"><a href="https://a.com/1"> 成都<em>新闻</em>标题一 <!-- c --></a></h3>
+  <div class="news-source"><span><img src="https://icon.com/s.png"></span><span aria-label="新闻来源：成都日报">成都日报</span></div>
+  <div class="c-span3"><img src=""><img src="https://img.com/c.jpg"></div>
+  <span aria-label="摘要：x">摘要 &nbsp;内容 <script>var x=1;</script>一</span></div>
+<div class="result-op c-container"><h3><a href="https://a.com/2">标题二</a></h3><div class="c-span-last"> 回退 摘要 </div><span class="c-color-gray">灰色来源</span></div>
+<div class="result-op c-container"><h3>无链接</h3></div>
+</body></html>"""
+
+XINHUA_SAMPLE = """<html><head><meta charset="utf-8"></head><body>
+<ul><li><a href="/nav">导航</a></li></ul>
+<div class="scpd_page_box"><ul>
+<li><dl><dt><a href="//sc.news.cn/a.htm">四川要闻一</a></dt><dd>要闻摘要一</dd></dl><img class="x scpd_auto_pic" src="/p.jpg"></li>
+<li><a href="/b.htm"><span></span><h3>四川要闻二</h3></a><p>段落摘要</p><img data-src="//img.cn/q.jpg"></li>
+<li><span>无链接</span></li>
+</ul></div></body></html>"""
+
+
+class FastParserTest(unittest.TestCase):
+    def test_baidu_lxml_matches_bs4(self):
+        fast = BaiduCrawler(config={'parser': 'lxml'}).parse_html(BAIDU_SAMPLE)
+        slow = BaiduCrawler().parse_html(BAIDU_SAMPLE)
+        self.assertEqual(len(slow), 2)
+        self.assertEqual(fast, slow)
+
+    def test_xinhua_lxml_matches_bs4(self):
+        fast = XinhuaCrawler(config={'parser': 'lxml'}).parse_html(XINHUA_SAMPLE)
+        slow = XinhuaCrawler().parse_html(XINHUA_SAMPLE)
+        self.assertEqual(len(slow), 2)
+        self.assertEqual(fast, slow)
+
+    def test_falls_back_to_bs4(self):
+        c = BaiduCrawler(config={'parser': 'lxml'})
+        with mock.patch.object(crawler.fast_parse, 'parse_baidu', side_effect=ValueError('boom')):
+            self.assertEqual(c.parse_html(BAIDU_SAMPLE), BaiduCrawler().parse_html(BAIDU_SAMPLE))
+
+
+class ConditionalCacheTest(unittest.TestCase):
+    def test_reuses_parsed_items_on_304_and_same_body(self):
+        cache = http_cache.ConditionalCache(tempfile.mkdtemp())
+        sent = []
+        responses = [
+            FakeResponse('<ul></ul>', headers={'ETag': '"v1"'}),
+            FakeResponse('', status_code=304),
+            FakeResponse('<ul></ul>'),
+        ]
+        def fake_get(url, headers=None, params=None, timeout=None):
+            sent.append(dict(headers or {}))
+            return responses[len(sent) - 1]
+        parse = mock.Mock(return_value=[{'title': 't'}])
+        with mock.patch.object(http_cache.http_client, 'get', side_effect=fake_get):
+            for _ in range(3):
+                self.assertEqual(cache.fetch_items('https://example.com/list', parse), [{'title': 't'}])
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(sent[1].get('If-None-Match'), '"v1"')
+        self.assertEqual(cache.stats, {'not_modified': 1, 'same_body': 1, 'parsed': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
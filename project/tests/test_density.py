@@ -0,0 +1,49 @@
+import os
+import unittest
+
+from app import charset, density
+
+PAGES = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+
+def _load(name):
+    with open(os.path.join(PAGES, name + '.html'), 'rb') as f:
+        html = charset.decode(f.read())
+    with open(os.path.join(PAGES, name + '.txt'), encoding='utf-8') as f:
+        expected = [ln.strip() for ln in f if ln.strip()]
+    return html, expected
+
+
+class DensityExtractTest(unittest.TestCase):
+    def test_fixture_pages(self):
+        for name in ('xinhua_article', 'people_article', 'gov_br_article', 'deep_nested'):
+            html, expected = _load(name)
+            content = density.extract(html)['content']
+            for para in expected:
+                self.assertIn(para, content, name)
+
+    def test_skips_comments_and_links(self):
+        html, _ = _load('people_article')
+        content = density.extract(html)['content']
+        self.assertNotIn('网友3', content)
+        self.assertNotIn('排行新闻', content)
+        page = ('<html><body><div class="links">' + '<a href="#">相关链接标题文字很长很长很长很长很长很长</a>' * 10 +
+                '</div><div id="main"><p>这是正文第一段，内容足够长，包含标点，用于测试密度算法。</p>'
+                '<p>这是正文第二段，同样足够长，也包含标点，用于测试。</p></div></body></html>')
+        content = density.extract(page)['content']
+        self.assertIn('正文第一段', content)
+        self.assertNotIn('相关链接', content)
+
+    def test_title_and_empty(self):
+        self.assertEqual(density.extract(''), {'title': '', 'content': ''})
+        ext = density.extract('<html><head><title> 标题\n文字 </title></head><body><p>短</p></body></html>')
+        self.assertEqual(ext['title'], '标题 文字')
+        self.assertEqual(ext['content'], '短')
+
+    def test_content_truncated(self):
+        page = '<html><body><div class="content">' + '<p>%s</p>' % ('长文本，' * 10000) + '</div></body></html>'
+        self.assertEqual(len(density.extract(page)['content']), density.MAX_CONTENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app import extractor
+
+PAGE = ('<html><head><title>页面标题</title></head><body><h1 class="t">  规则 标题 </h1>'
+        '<div id="c"><p>第一段</p><p></p><p>第二段</p></div><div class="content">兜底正文</div></body></html>')
+
+
+def _rule(title='//h1', content="//div[@id='c']/p", updated_at=None, id=1):
+    return SimpleNamespace(id=id, title_xpath=title, content_xpath=content, updated_at=updated_at)
+
+
+class ExtractorTest(unittest.TestCase):
+    def test_extract_with_xpath(self):
+        self.assertEqual(extractor.extract(PAGE, _rule()), {'title': '规则 标题', 'content': '第一段\n\n第二段'})
+
+    def test_css_selectors(self):
+        # h1.t 也是合法 XPath，必须按 CSS 编译才能命中
+        self.assertEqual(extractor.extract(PAGE, _rule(title='h1.t', content='div#c p')), {'title': '规则 标题', 'content': '第一段\n\n第二段'})
+        self.assertEqual(extractor.extract(PAGE, _rule(title='css:h1', content='xpath:id("c")/p'))['content'], '第一段\n\n第二段')
+
+    def test_compiled_cache_keyed_by_updated_at(self):
+        t = datetime(2024, 1, 1)
+        a = extractor.compiled_rule(_rule(updated_at=t, id=7))
+        self.assertIs(extractor.compiled_rule(_rule(updated_at=t, id=7)), a)
+        self.assertIsNot(extractor.compiled_rule(_rule(updated_at=t + timedelta(seconds=1), id=7)), a)
+
+    def test_invalid_selector_falls_back(self):
+        ext = extractor.extract(PAGE, _rule(content='//div[@id='))
+        self.assertEqual(ext['title'], '规则 标题')
+        self.assertEqual(ext['content'], '兜底正文')
+
+    def test_extract_many_matches_single(self):
+        docs = [PAGE, '', PAGE.replace('第二段', '第三段')]
+        rule = _rule()
+        out = extractor.extract_many(rule, docs)
+        self.assertEqual(out[0], extractor.extract(PAGE, rule))
+        self.assertEqual(out[1], {'title': '', 'content': ''})
+        self.assertEqual(out[2]['content'], '第一段\n\n第三段')
+
+
+if __name__ == '__main__':
+    unittest.main()
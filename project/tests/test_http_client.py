@@ -0,0 +1,131 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.density import TextMeter
+from app.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.connections.add(self.client_address)
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'sid=1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+    def setUp(self):
+        _Handler.connections = set()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused_across_threads(self):
+        client = HttpClient()
+        client.configure_host('127.0.0.1', pool_maxsize=2)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            codes = list(pool.map(lambda _: client.request('GET', self.url).status_code, range(20)))
+        self.assertEqual(codes, [200] * 20)
+        self.assertLessEqual(len(_Handler.connections), 2)
+        client.close()
+
+    def test_cookies_not_persisted(self):
+        client = HttpClient()
+        client.request('GET', self.url)
+        self.assertEqual(len(client._session().cookies), 0)
+        client.close()
+
+    def test_host_timeout_applies_to_subdomains(self):
+        client = HttpClient()
+        client.configure_host('example.com', timeout=[3, 7])
+        self.assertEqual(client.host_config('news.example.com').get('timeout'), (3, 7))
+        self.assertEqual(client.host_config('example.org'), {})
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/pdf':
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('Content-Length', '4')
+            self.end_headers()
+            self.wfile.write(b'%PDF')
+            return
+        # /big 与 /slow 为不声明长度、持续输出的页面；/slow 每块之间停顿
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        chunk = ('<p>' + '正文内容' * 500 + '</p>').encode('utf-8')
+        try:
+            for _ in range(400):
+                self.wfile.write(chunk)
+                self.wfile.flush()
+                if self.path == '/slow':
+                    time.sleep(0.05)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class BoundedFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StreamHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        self.client = HttpClient()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_max_bytes(self):
+        r = self.client.fetch(self.base + '/big', max_bytes=50000)
+        self.assertEqual(len(r.content), 50000)
+        self.assertEqual(r.truncated, 'max_bytes')
+
+    def test_deadline(self):
+        t0 = time.monotonic()
+        r = self.client.fetch(self.base + '/slow', deadline=0.3)
+        self.assertEqual(r.truncated, 'deadline')
+        self.assertLess(time.monotonic() - t0, 2)
+
+    def test_content_type_rejected(self):
+        r = self.client.fetch(self.base + '/pdf')
+        self.assertEqual((r.rejected, r.content), ('application/pdf', b''))
+        r = self.client.fetch(self.base + '/pdf', content_types=None)
+        self.assertEqual((r.content, r.truncated), (b'%PDF', ''))
+
+    def test_stops_when_enough_text(self):
+        meter = TextMeter(limit=100000)
+        r = self.client.fetch(self.base + '/big', enough=meter)
+        self.assertEqual(r.truncated, 'enough')
+        self.assertGreaterEqual(meter.text_bytes, 100000)
+        self.assertLess(len(r.content), 200000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import html
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import db, pagination
+from app.models import CollectionRecord
+from tests.test_collector import CollectorTestCase
+
+
+def _link(body, label):
+    m = re.search(r'<a href="([^"]+)">%s</a>' % label, body)
+    return html.unescape(m.group(1)) if m else None
+
+
+def _ids(body):
+    return [int(x) for x in re.findall(r'class="chkRow" value="(\d+)"', body)]
+
+
+class KeysetPaginationTest(CollectorTestCase):
+    def setUp(self):
+        super().setUp()
+        base = datetime(2024, 5, 1)
+        with self.app.app_context():
+            # 同一时间戳的记录成组出现，验证按 (created_at, id) 翻页不重不漏
+            for i in range(47):
+                db.session.add(CollectionRecord(keyword='k', title='分页测试新闻%d' % i, summary='摘要', source=['百度', '新华网'][i % 2],
+                                                original_url='https://page.example.com/%d' % i, created_at=base + timedelta(minutes=i // 3)))
+            db.session.commit()
+            self.expected = [r.id for r in CollectionRecord.query.order_by(CollectionRecord.created_at, CollectionRecord.id)]
+
+    def _walk(self, url, label='下一页'):
+        pages = []
+        while url:
+            body = self.client.get(url).get_data(as_text=True)
+            pages.append(_ids(body))
+            url = _link(body, label)
+        return pages, body
+
+    def test_forward_and_backward(self):
+        pages, last = self._walk('/admin/data_warehouse?per_page=10')
+        self.assertEqual([len(p) for p in pages], [10, 10, 10, 10, 7])
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertIsNone(_link(last, '下一页'))
+        back, first = self._walk(_link(last, '上一页'), '上一页')
+        self.assertEqual(back, pages[-2::-1])
+        self.assertIsNone(_link(first, '上一页'))
+
+    def test_filters_and_invalid_cursor(self):
+        pages, _ = self._walk('/admin/data_warehouse?per_page=4&source=百度')
+        with self.app.app_context():
+            ids = [r.id for r in CollectionRecord.query.filter_by(source='百度').order_by(CollectionRecord.created_at, CollectionRecord.id)]
+        self.assertEqual(sum(pages, []), ids)
+        body = self.client.get('/admin/data_warehouse?per_page=10').get_data(as_text=True)
+        token = re.search(r'cursor=([^&"]+)', _link(body, '下一页')).group(1)
+        # 篡改或换了筛选条件的游标无效，回到第一页
+        for url in ('/admin/data_warehouse?per_page=10&cursor=' + token[:-2] + 'xx',
+                    '/admin/data_warehouse?per_page=10&source=新华网&cursor=' + token):
+            first = _ids(self.client.get(url).get_data(as_text=True))
+            self.assertEqual(first[0], self.expected[0] if 'source' not in url else ids[0] + 1)
+
+    def test_ranked_search_pages(self):
+        pages, _ = self._walk('/admin/data_warehouse?per_page=6&q=分页测试')
+        flat = sum(pages, [])
+        self.assertEqual(sorted(flat), sorted(self.expected))
+        self.assertEqual(len(flat), len(set(flat)))
+
+    def test_null_created_at(self):
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                for i in range(5):
+                    conn.execute(text("INSERT INTO collection_records (keyword, title, source) VALUES ('k', :t, '百度')"), {'t': '无时间记录%d' % i})
+            expected = [r.id for r in CollectionRecord.query.order_by(CollectionRecord.created_at, CollectionRecord.id)]
+        pages, last = self._walk('/admin/data_warehouse?per_page=3')
+        self.assertEqual(sum(pages, []), expected)
+        back, _ = self._walk(_link(last, '上一页'), '上一页')
+        self.assertEqual(sum(back[::-1], []) + pages[-1], expected)
+
+    def test_count_on_demand_and_cached(self):
+        body = self.client.get('/admin/data_warehouse').get_data(as_text=True)
+        self.assertIn('统计总数', body)
+        self.assertNotIn('共', re.search(r'<div class="pager">(.*?)</div>', body, re.S).group(1))
+        self.assertIn('共 47 条', self.client.get('/admin/data_warehouse?count=1').get_data(as_text=True))
+        self.assertIn('共约 47 条', self.client.get('/admin/data_warehouse?count=1').get_data(as_text=True))
+        with self.app.app_context():
+            scope = pagination.scope_key('x')
+            self.assertEqual(pagination.cached_count(CollectionRecord.query, scope, ttl=0), (47, False))
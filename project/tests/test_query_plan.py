@@ -0,0 +1,101 @@
+import html
+import re
+
+from sqlalchemy import event
+
+from app import admin, db, dedup
+from tests.test_collector import CollectorTestCase
+
+# 全表扫描（SQLite 3.36 起为 "SCAN t"，更早为 "SCAN TABLE t"）；"SCAN t USING [COVERING] INDEX" 为按索引顺序扫描
+_FULL_SCAN = re.compile(r'^SCAN (TABLE )?collection_records( AS \w+)?$')
+
+
+class QueryPlanTest(CollectorTestCase):
+    def setUp(self):
+        super().setUp()
+        items = [{'title': '索引测试新闻第%d条' % i, 'summary': '摘要%d' % i, 'source': ['百度', '新华网'][i % 2],
+                  'original_url': 'https://plan.example.com/%d' % i} for i in range(20)]
+        self.client.post('/admin/collector/save', json={'keyword': '成都', 'items': items})
+
+    def _plans(self, fn):
+        # 记录 fn 执行期间查询 collection_records 的语句，逐条取 EXPLAIN QUERY PLAN
+        stmts = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and 'collection_records' in statement:
+                stmts.append((statement, parameters))
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            fn()
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        self.assertTrue(stmts)
+        plans = []
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                for sql, params in stmts:
+                    rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+                    plans.append((sql, [r[-1] for r in rows]))
+        return plans
+
+    def assertIndexed(self, plans, sorted_by_index=True):
+        for sql, details in plans:
+            for d in details:
+                self.assertIsNone(_FULL_SCAN.match(d), '%s\n%s' % (sql, details))
+                if sorted_by_index:
+                    self.assertNotIn('TEMP B-TREE', d, '%s\n%s' % (sql, details))
+
+    def _uses(self, plans, index):
+        return any(index in d for _, details in plans for d in details)
+
+    def test_dashboard_latest(self):
+        plans = self._plans(lambda: self.client.get('/admin/dashboard/data/latest'))
+        self.assertIndexed(plans)
+        self.assertTrue(self._uses(plans, 'ix_collection_records_latest'))
+
+    def test_dashboard_source_pie(self):
+        plans = self._plans(lambda: self.client.get('/admin/dashboard/data/source_pie'))
+        self.assertIndexed(plans)
+        self.assertTrue(self._uses(plans, 'ix_collection_records_source_created_at'))
+
+    def test_data_warehouse(self):
+        for qs in ('', '?source=百度', '?collapse=1', '?source=百度&collapse=1'):
+            plans = self._plans(lambda: self.client.get('/admin/data_warehouse' + qs))
+            self.assertIndexed(plans)
+        self.assertTrue(self._uses(plans, 'ix_collection_records_source_created_at'))
+
+    def test_select_collection_records_tool(self):
+        with self.app.app_context():
+            plans = self._plans(lambda: admin._execute_tool_call('select_collection_records', {'days': 7, 'limit': 10}))
+            self.assertIndexed(plans)
+            self.assertTrue(self._uses(plans, 'ix_collection_records_latest'))
+            plans = self._plans(lambda: admin._execute_tool_call('select_collection_records', {'collect_keyword': '成都', 'limit': 5}))
+            self.assertIndexed(plans)
+            self.assertTrue(self._uses(plans, 'ix_collection_records_keyword_created_at'))
+
+    def test_dedup_lookups(self):
+        items = [{'title': '索引测试新闻第1条', 'original_url': 'https://plan.example.com/1'}]
+        with self.app.app_context():
+            plans = self._plans(lambda: dedup.lookup(items))
+            self.assertIndexed(plans, sorted_by_index=False)
+            self.assertTrue(self._uses(plans, 'ux_collection_records_url_hash'))
+            self.assertTrue(self._uses(plans, 'ix_collection_records_title_hash'))
+
+    def test_search_uses_full_text_index(self):
+        plans = self._plans(lambda: self.client.get('/admin/data_warehouse?q=索引测试&source=百度'))
+        # 按相关度排序需要临时排序，但不得扫描 collection_records
+        self.assertIndexed(plans, sorted_by_index=False)
+        self.assertTrue(self._uses(plans, 'collection_records_fts VIRTUAL TABLE'))
+
+    def test_data_warehouse_cursor_pages(self):
+        # 游标翻页按 (created_at, id) 在索引上定位，前后翻页都不得全表扫描或临时排序
+        for qs in ('', '&source=百度'):
+            body = self.client.get('/admin/data_warehouse?per_page=5' + qs).get_data(as_text=True)
+            nxt = html.unescape(re.search(r'<a href="([^"]+)">下一页</a>', body).group(1))
+            plans = self._plans(lambda: self.client.get(nxt))
+            self.assertIndexed(plans)
+            body = self.client.get(nxt).get_data(as_text=True)
+            prev = html.unescape(re.search(r'<a href="([^"]+)">上一页</a>', body).group(1))
+            self.assertIndexed(self._plans(lambda: self.client.get(prev)))
@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+from app import ratelimit
+from app.ratelimit import RateLimiter, is_block_page
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text='', headers=None, url='https://www.baidu.com/s', history=None):
+        self.status_code = status_code
+        self.content = text.encode('utf-8')
+        self.headers = headers or {'Content-Type': 'text/html; charset=utf-8'}
+        self.url = url
+        self.history = history or []
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_burst_then_wait(self):
+        rl = RateLimiter()
+        rl.configure('example.com', {'rate': 2, 'burst': 3})
+        with mock.patch.object(ratelimit.time, 'sleep') as slept:
+            waits = [rl.acquire('news.example.com') for _ in range(5)]
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.5, places=1)
+        self.assertAlmostEqual(waits[4], 1.0, places=1)
+        self.assertEqual(slept.call_count, 2)
+
+    def test_backoff_on_429_and_recover(self):
+        rl = RateLimiter()
+        rl.configure('example.com', {'rate': 4, 'burst': 1, 'max_rate': 4})
+        rl.observe('example.com', FakeResponse(429, headers={'Retry-After': '3'}))
+        b = rl.bucket('example.com')
+        self.assertEqual(b.rate, 2.0)
+        self.assertEqual(b.throttled, 1)
+        with mock.patch.object(ratelimit.time, 'sleep'):
+            self.assertGreater(rl.acquire('example.com'), 2.5)
+        for _ in range(50):
+            rl.observe('example.com', FakeResponse(200, text='<html>ok</html>'))
+        self.assertEqual(b.rate, 4.0)
+
+    def test_block_page_detection(self):
+        self.assertTrue(is_block_page(FakeResponse(200, text='<title>百度安全验证</title>')))
+        self.assertTrue(is_block_page(FakeResponse(200, url='https://wappass.baidu.com/static/captcha/tuxing.html')))
+        self.assertFalse(is_block_page(FakeResponse(200, text='<title>新闻</title>')))
+        self.assertFalse(is_block_page(FakeResponse(200, text='百度安全验证', headers={'Content-Type': 'application/json'})))
+        self.assertTrue(is_block_page(FakeResponse(200, url='https://example.com/verify?from=news')))
+        for url in ('https://news.example.com/2024/how-to-verify-sources.html', 'https://example.com/s?wd=verify'):
+            self.assertFalse(is_block_page(FakeResponse(200, text='<title>新闻</title>', url=url)))
+
+    def test_reconfigure_keeps_backoff(self):
+        # 每个新采集器都会重新 configure；相同策略不得清掉退避与暂停，策略变化时保留暂停并收紧速率
+        rl = RateLimiter()
+        rl.configure('example.com', {'rate': 4, 'burst': 2})
+        rl.observe('example.com', FakeResponse(429, headers={'Retry-After': '120'}))
+        b = rl.bucket('example.com')
+        rl.configure('example.com', {'rate': 4, 'burst': 2})
+        self.assertIs(rl.bucket('example.com'), b)
+        with mock.patch.object(ratelimit.time, 'sleep'):
+            self.assertGreater(rl.acquire('example.com'), 100)
+        rl.configure('example.com', {'rate': 1, 'burst': 1})
+        self.assertIs(rl.bucket('example.com'), b)
+        self.assertEqual((b.rate, b.burst), (1.0, 1.0))
+        with mock.patch.object(ratelimit.time, 'sleep'):
+            self.assertGreater(rl.acquire('example.com'), 100)
+
+    def test_captcha_page_slows_host(self):
+        rl = RateLimiter()
+        before = rl.bucket('www.baidu.com').rate
+        ok = rl.observe('www.baidu.com', FakeResponse(200, text='<title>百度安全验证</title>'))
+        self.assertFalse(ok)
+        self.assertEqual(rl.bucket('www.baidu.com').rate, before / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlencode
+
+import requests
+from werkzeug.serving import make_server
+
+from app import db, http_client
+from app.crawler import BaiduCrawler, create_crawler
+from app.models import CrawlerSource
+from tests.test_collector import CollectorTestCase
+from tools import load_driver, replay_server
+from tools.replay_server import Recording, ReplayServer, request_key
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'bench', 'baidu_results.html')
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits = 0
+
+    def do_GET(self):
+        _Upstream.hits += 1
+        body = ('<html><body><a href="/next">下一页</a><a href="https://news.example.com/a">新闻</a>%s</body></html>' % self.path).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class ReplayServerTest(CollectorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = tempfile.mkdtemp()
+        self.servers = []
+
+    def tearDown(self):
+        for s in self.servers:
+            s.shutdown()
+            s.server_close()
+        super().tearDown()
+
+    def _replay(self, **kw):
+        srv = _serve(ReplayServer(('127.0.0.1', 0), Recording(self.dir), **kw))
+        self.servers.append(srv)
+        return srv
+
+    def test_record_then_replay_offline(self):
+        _Upstream.hits = 0
+        up = _serve(ThreadingHTTPServer(('127.0.0.1', 0), _Upstream))
+        up_host = '127.0.0.1:%d' % up.server_address[1]
+        rec = self._replay(mode='record')
+        url = '%s/_/http/%s/list?b=2&a=1' % (rec.base_url, up_host)
+        self.assertEqual(requests.get(url).status_code, 200)
+        up.shutdown()
+        up.server_close()
+        rep = self._replay()
+        # 参数顺序不同也命中同一条录制；正文中的链接改写为指向回放服务
+        r = requests.get('%s/_/http/%s/list?a=1&b=2' % (rep.base_url, up_host))
+        self.assertEqual(r.status_code, 200)
+        self.assertIn('%s/_/https/news.example.com/a' % rep.base_url, r.text)
+        self.assertIn('href="%s/_/http/%s/next"' % (rep.base_url, up_host), r.text)
+        self.assertEqual(requests.get(url, headers={'If-None-Match': '"v1"'}).status_code, 304)
+        self.assertEqual(requests.get('%s/_/http/%s/other' % (rep.base_url, up_host)).status_code, 404)
+        self.assertEqual(_Upstream.hits, 1)
+
+    def test_latency_errors_and_throttle(self):
+        Recording(self.dir).put(request_key('GET', 'https', 'a.com', '/x', ''), 200, {'Content-Type': 'text/plain'}, b'ok')
+        slow = self._replay(latency_ms=100)
+        t0 = time.monotonic()
+        self.assertEqual(requests.get(slow.base_url + '/_/https/a.com/x').text, 'ok')
+        self.assertGreaterEqual(time.monotonic() - t0, 0.1)
+        failing = self._replay(error_rate=1.0)
+        self.assertEqual(requests.get(failing.base_url + '/_/https/a.com/x').status_code, 503)
+        limited = self._replay(throttle_rps=1, throttle_burst=2)
+        codes = [requests.get(limited.base_url + '/_/https/a.com/x').status_code for _ in range(4)]
+        self.assertEqual(codes[:2], [200, 200])
+        self.assertIn(429, codes[2:])
+        self.assertGreater(json.loads(requests.get(limited.base_url + '/_stats').text)['throttled'], 0)
+
+    def test_load_driver_against_replayed_collector(self):
+        params = BaiduCrawler()._page_params('成都', 0)
+        with open(FIXTURE, 'rb') as f:
+            Recording(self.dir).put(request_key('GET', 'https', 'www.baidu.com', '/s', urlencode(params)), 200,
+                                    {'Content-Type': 'text/html; charset=utf-8'}, f.read())
+        rep = self._replay(latency_ms=20)
+        with self.app.app_context():
+            db.session.add(CrawlerSource(name='百度', key='baidu', enabled=True, config_json='{}'))
+            db.session.commit()
+        self.assertEqual(replay_server.configure_sources(rep.base_url, app=self.app), ['baidu', 'xinhua', 'sina'])
+        with self.app.app_context():
+            cfg = json.loads(CrawlerSource.query.filter_by(key='baidu').first().config_json)
+        self.assertTrue(cfg['base_url'].startswith(rep.base_url + '/_/https/www.baidu.com/s'))
+        web = make_server('127.0.0.1', 0, self.app, threaded=True)
+        self.servers.append(_serve(web))
+        report = load_driver.drive('http://127.0.0.1:%d' % web.server_port, source='baidu', keywords=['成都'],
+                                   streams=3, max_count=20)
+        self.assertEqual(report['errors'], 0, report.get('first_error'))
+        self.assertEqual(report['items'], 60)
+        self.assertGreater(report['items_per_sec'], 0)
+        self.assertLessEqual(report['first_item_ms'][50], report['stream_ms'][50])
+        replay_server.configure_sources(rep.base_url, reset=True, app=self.app)
+        with self.app.app_context():
+            self.assertEqual(json.loads(CrawlerSource.query.filter_by(key='baidu').first().config_json), {})
+            # 回放时新建的内置来源行随 reset 删除
+            self.assertEqual([r.key for r in CrawlerSource.query.all()], ['baidu'])
+
+    def test_load_driver_deep_collects_every_saved_record(self):
+        # 按 URL 更新的记录（updated_ids）同样纳入深度采集压测
+        items = [{'title': '压测入库新闻%d号' % i, 'original_url': 'https://load.example.com/%d' % i, 'summary': '摘要'} for i in range(3)]
+        first = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [dict(items[0], summary='')] + items[1:2]}).get_json()
+        saved = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': items + items[1:2]}).get_json()
+        self.assertTrue(saved['updated_ids'])
+        self.assertEqual(load_driver.record_ids(saved), first['saved_ids'] + saved['saved_ids'])
+
+    def test_site_search_fallbacks_stay_on_replay_host(self):
+        # 新华/新浪没有 CrawlerSource 行时也指向回放服务，其站点搜索回退（嵌套的百度采集器）同样不访问线上站点
+        with open(FIXTURE, 'rb') as f:
+            body = f.read()
+        rec = Recording(self.dir)
+        for kw in ('site:sina.com.cn 成都', 'site:news.cn 成都', 'site:xinhuanet.com 成都'):
+            rec.put(request_key('GET', 'https', 'www.baidu.com', '/s', urlencode(BaiduCrawler()._page_params(kw, 0))), 200,
+                    {'Content-Type': 'text/html; charset=utf-8'}, body)
+        rep = self._replay()
+        self.assertEqual(replay_server.configure_sources(rep.base_url, app=self.app), ['baidu', 'xinhua', 'sina'])
+        urls = []
+        orig = http_client.HttpClient.request
+
+        def spy(client, method, url, **kw):
+            urls.append(url)
+            return orig(client, method, url, **kw)
+        with mock.patch.object(http_client.HttpClient, 'request', spy), self.app.app_context():
+            for key in ('xinhua', 'sina'):
+                cfg = json.loads(CrawlerSource.query.filter_by(key=key).first().config_json)
+                items = list(create_crawler(key, config=cfg).iter_data('成都', max_count=10))
+                self.assertTrue(items, key)
+        self.assertTrue(urls)
+        self.assertEqual([u for u in urls if not u.startswith(rep.base_url + '/')], [])
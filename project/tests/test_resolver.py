@@ -0,0 +1,115 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from app import db, dedup, resolver
+from app.models import CollectionRecord, UrlMapping
+from tests.test_collector import CollectorTestCase
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    lock = threading.Lock()
+
+    def _reply(self, body):
+        with self.lock:
+            self.requests.append((self.command, self.path))
+        if self.path.startswith('/link?url='):
+            # 普通 302 跳转
+            self.send_response(302)
+            self.send_header('Location', '/article/' + self.path.split('=', 1)[1])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = b''
+        if self.path.startswith('/link?js='):
+            # 200 + 脚本跳转的中间页，HEAD 拿不到目标
+            data = ('<script>window.location.replace("/article/%s")</script>' % self.path.split('=', 1)[1]).encode()
+        elif self.path.startswith('/article/'):
+            data = b'<html><body>' + b'x' * 100000 + b'</body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if body:
+            self.wfile.write(data)
+
+    def do_HEAD(self):
+        self._reply(False)
+
+    def do_GET(self):
+        self._reply(True)
+
+    def log_message(self, *args):
+        pass
+
+
+class ResolverTest(CollectorTestCase):
+    def setUp(self):
+        super().setUp()
+        _Handler.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        self.links = mock.patch.dict(resolver.REDIRECT_LINKS, {'127.0.0.1': ('/link',)})
+        self.links.start()
+
+    def tearDown(self):
+        self.links.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def test_resolves_with_head_and_caches(self):
+        urls = [self.base + '/link?url=%d' % i for i in range(6)] + ['https://example.com/a']
+        with self.app.app_context():
+            out = resolver.resolve_many(urls + urls[:2])
+            self.assertEqual(out[urls[3]], self.base + '/article/3')
+            self.assertEqual(out['https://example.com/a'], 'https://example.com/a')
+            self.assertEqual(UrlMapping.query.count(), 6)
+            # 只发 HEAD，不下载正文
+            self.assertEqual({m for m, _ in _Handler.requests}, {'HEAD'})
+            n = len(_Handler.requests)
+            self.assertEqual(resolver.resolve_many(urls)[urls[0]], self.base + '/article/0')
+            self.assertEqual(len(_Handler.requests), n)
+
+    def test_script_redirect_page(self):
+        url = self.base + '/link?js=9'
+        with self.app.app_context():
+            self.assertEqual(resolver.resolve_many([url])[url], self.base + '/article/9')
+            self.assertIn(('GET', '/link?js=9'), _Handler.requests)
+            self.assertNotIn(('GET', '/article/9'), _Handler.requests)
+
+    def test_save_dedups_on_final_url(self):
+        with self.app.app_context():
+            rec = CollectionRecord(keyword='k', title='已有文章', original_url=self.base + '/article/5')
+            dedup.stamp(rec)
+            db.session.add(rec)
+            db.session.commit()
+            existing = rec.id
+        resp = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [
+            {'title': '另一个标题', 'original_url': self.base + '/link?url=5', 'source': '百度'},
+            {'title': '新文章', 'original_url': self.base + '/link?url=6', 'source': '百度'},
+        ]})
+        data = resp.get_json()
+        # 已有记录来源为空，按 URL 命中后被补全，计为 updated
+        self.assertIn(existing, data['updated_ids'])
+        with self.app.app_context():
+            urls = [r.original_url for r in CollectionRecord.query.order_by(CollectionRecord.id).all()]
+        self.assertEqual(urls, [self.base + '/article/5', self.base + '/article/6'])
+
+    def test_bulk_resolve_skips_failed_links(self):
+        # 解析失败的链接在冷却期内不再计入剩余条数，也不会被反复请求
+        with self.app.app_context():
+            for u in ('/link?url=1', '/link?bad=1'):
+                rec = CollectionRecord(keyword='k', title='跳转记录' + u, original_url=self.base + u)
+                dedup.stamp(rec)
+                db.session.add(rec)
+            db.session.commit()
+        data = self.client.post('/admin/data_warehouse/resolve_links', json={}).get_json()
+        self.assertEqual((data['resolved'], data['remaining'], data['failed']), (1, 0, 1))
+        n = len(_Handler.requests)
+        data = self.client.post('/admin/data_warehouse/resolve_links', json={}).get_json()
+        self.assertEqual((data['resolved'], data['remaining'], data['failed']), (0, 0, 1))
+        self.assertEqual(len(_Handler.requests), n)
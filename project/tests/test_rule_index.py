@@ -0,0 +1,60 @@
+import unittest
+from types import SimpleNamespace
+
+from app import rule_index
+from app.models import CollectionRule
+from app.rule_index import RuleIndex, normalize_site
+from tests.test_collector import CollectorTestCase
+
+
+def _rule(id, site, site_name=''):
+    return SimpleNamespace(id=id, site=site, site_name=site_name)
+
+
+class RuleIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.idx = RuleIndex([
+            _rule(1, 'news.cn', '新华网'),
+            _rule(2, 'https://sc.news.cn/scyw.htm'),
+            _rule(3, 'www.sina.com.cn', '新浪'),
+            _rule(4, 'people'),
+        ])
+
+    def test_normalize_site(self):
+        self.assertEqual(normalize_site('HTTPS://www.Example.com:8080/a'), 'example.com')
+        self.assertEqual(normalize_site('example.com/path'), 'example.com')
+
+    def test_name_lookup_has_priority(self):
+        self.assertEqual(self.idx.match('新华网', 'https://news.sina.com.cn/a').id, 1)
+        self.assertEqual(self.idx.match('新浪财经', 'https://x.com/a').id, 3)
+
+    def test_longest_domain_suffix(self):
+        self.assertEqual(self.idx.match('', 'https://sc.news.cn/a.htm').id, 2)
+        self.assertEqual(self.idx.match('', 'http://www.news.cn/a.htm').id, 1)
+        self.assertEqual(self.idx.match('', 'https://finance.sina.com.cn/a').id, 3)
+        self.assertIsNone(self.idx.match('', 'https://fakenews.cn/a'))
+
+    def test_loose_site_substring(self):
+        self.assertEqual(self.idx.match('', 'http://politics.people.com.cn/a').id, 4)
+
+
+class RuleIndexAppTest(CollectorTestCase):
+    def test_invalidated_on_crud_and_read_only(self):
+        self.client.post('/admin/rules/add', data={'site': 'example.com', 'site_name': '示例网'})
+        with self.app.app_context():
+            r = rule_index.match('', 'https://news.example.com/1')
+            self.assertEqual(r.site, 'example.com')
+            rid = r.id
+        self.client.post('/admin/rules/edit/%d' % rid, data={'site': 'other.com', 'site_name': ''})
+        with self.app.app_context():
+            self.assertIsNone(rule_index.match('', 'https://news.example.com/1'))
+            self.assertEqual(rule_index.match('', 'https://other.com/1').id, rid)
+            # 匹配不回写站点
+            self.assertEqual(CollectionRule.query.get(rid).site, 'other.com')
+        self.client.get('/admin/rules/delete/%d' % rid)
+        with self.app.app_context():
+            self.assertIsNone(rule_index.match('', 'https://other.com/1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+from sqlalchemy import text
+
+from app import admin, db, search
+from app.models import CollectionRecord
+from tests.test_collector import CollectorTestCase
+
+
+class FullTextSearchTest(CollectorTestCase):
+    def setUp(self):
+        super().setUp()
+        items = [
+            {'title': '成都发布新能源汽车补贴政策', 'summary': '补贴覆盖购车与充电设施', 'original_url': 'https://s.example.com/1', 'source': '百度'},
+            {'title': '重庆举办国际马拉松赛事', 'summary': '三万人参赛', 'original_url': 'https://s.example.com/2', 'source': '百度'},
+            {'title': '四川省经济运行情况通报', 'summary': '上半年数据发布', 'original_url': 'https://s.example.com/3', 'source': '新华网',
+             'deep_content': '会上提到，新能源汽车产量同比增长，<b>充电桩</b>建设加快。'},
+        ]
+        self.ids = self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': items}).get_json()['saved_ids']
+
+    def _search(self, q):
+        with self.app.app_context():
+            query, ranked = search.apply(CollectionRecord.query, q)
+            order = [search.order_by_rank()] if ranked else []
+            return [r.id for r in query.order_by(*order, CollectionRecord.id).all()], ranked
+
+    def test_ranked_match_over_title_summary_and_content(self):
+        ids, ranked = self._search('新能源汽车')
+        self.assertTrue(ranked)
+        # 标题命中排在正文命中之前
+        self.assertEqual(ids, [self.ids[0], self.ids[2]])
+        self.assertEqual(self._search('充电桩 新能源')[0], [self.ids[2]])
+        # 不足三个字符的词走 LIKE
+        self.assertEqual(self._search('马拉')[0], [self.ids[1]])
+        self.assertEqual(self._search('成都 补贴政策')[0], [self.ids[0]])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.client.post('/admin/collector/save', json={'keyword': 'k', 'items': [
+            {'title': '重庆举办国际马拉松赛事', 'original_url': 'https://s.example.com/2', 'deep_content': '赛道经过长江索道附近'}]})
+        self.assertEqual(self._search('长江索道')[0], [self.ids[1]])
+        self.client.post('/admin/data_warehouse/edit/%d' % self.ids[0], data={'title': '成都发布文旅消费政策', 'original_url': 'https://s.example.com/1'})
+        self.assertEqual(self._search('新能源汽车')[0], [self.ids[2]])
+        self.client.get('/admin/data_warehouse/delete/%d' % self.ids[2])
+        self.assertEqual(self._search('新能源汽车')[0], [])
+        self.assertEqual(self._search('文旅消费')[0], [self.ids[0]])
+
+    def test_rebuild_for_existing_database(self):
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                for name in ('collection_records_fts_ai', 'collection_records_fts_ad', 'collection_records_fts_au'):
+                    conn.execute(text('DROP TRIGGER %s' % name))
+                conn.execute(text('DROP TABLE collection_records_fts'))
+            search._available.clear()
+            self.assertFalse(search.available())
+            # 不可用时退回 LIKE
+            self.assertEqual(self._search('新能源汽车'), ([self.ids[0], self.ids[2]], False))
+            self.assertTrue(search.ensure())
+        self.assertEqual(self._search('新能源汽车'), ([self.ids[0], self.ids[2]], True))
+
+    def test_warehouse_and_tool_snippets(self):
+        page = self.client.get('/admin/data_warehouse?q=充电桩').get_data(as_text=True)
+        self.assertIn('<mark>充电桩</mark>', page)
+        self.assertIn('&lt;b&gt;', page)
+        self.assertNotIn('重庆举办国际马拉松赛事', page)
+        with self.app.app_context():
+            res = admin._execute_tool_call('select_collection_records', {'keyword': '新能源汽车', 'limit': 5})
+        self.assertEqual([it['id'] for it in res['items']], [self.ids[0], self.ids[2]])
+        self.assertIn('【新能源汽车】', res['items'][1]['snippet'])
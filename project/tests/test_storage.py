@@ -0,0 +1,132 @@
+import threading
+import time
+from unittest import mock
+
+from sqlalchemy import text
+
+from app import db, storage
+from app.models import CollectionRecord, SystemSetting
+from tests.test_collector import CollectorTestCase
+
+
+def _increment(key):
+    # 读-改-写：不串行执行时会丢失更新
+    row = SystemSetting.query.get(key)
+    value = int(row.value) + 1
+    time.sleep(0.001)
+    row.value = str(value)
+    return value
+
+
+class SqliteStorageTest(CollectorTestCase):
+    def test_pragmas_and_pool(self):
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                self.assertEqual(conn.exec_driver_sql('PRAGMA journal_mode').scalar().lower(), 'wal')
+                self.assertEqual(conn.exec_driver_sql('PRAGMA synchronous').scalar(), 1)
+                self.assertEqual(conn.exec_driver_sql('PRAGMA busy_timeout').scalar(), storage.DEFAULT_PRAGMAS['busy_timeout'])
+                self.assertEqual(conn.exec_driver_sql('PRAGMA cache_size').scalar(), storage.DEFAULT_PRAGMAS['cache_size'])
+            self.assertEqual(db.engine.pool.size(), storage.DEFAULT_ENGINE_OPTIONS['pool_size'])
+
+    def test_writes_are_serialized(self):
+        with self.app.app_context():
+            db.session.add(SystemSetting(key='counter', value='0'))
+            db.session.commit()
+        errors = []
+
+        def worker():
+            try:
+                with self.app.app_context():
+                    for _ in range(20):
+                        storage.write(_increment, 'counter')
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        with self.app.app_context():
+            self.assertEqual(SystemSetting.query.get('counter').value, '160')
+            self.assertEqual(self.app.extensions['sqlite_writer'].stats['errors'], 0)
+
+    def test_cold_writer_created_once(self):
+        # 冷启动时多个线程同时首次写入，只能建出一个写队列
+        self.app.extensions.pop('sqlite_writer', None)
+        init = storage.WriteQueue.__init__
+
+        def slow_init(wq, app):
+            time.sleep(0.05)
+            init(wq, app)
+        start = threading.Barrier(8)
+        queues = []
+
+        def first_write():
+            start.wait()
+            queues.append(storage.writer(self.app))
+        with mock.patch.object(storage.WriteQueue, '__init__', slow_init):
+            threads = [threading.Thread(target=first_write) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len({id(q) for q in queues}), 1)
+        self.assertIs(queues[0], self.app.extensions['sqlite_writer'])
+
+    def test_writer_error_is_raised_and_rolled_back(self):
+        def bad():
+            db.session.add(SystemSetting(key='half', value='x'))
+            db.session.flush()
+            raise ValueError('boom')
+        with self.app.app_context():
+            with self.assertRaises(ValueError):
+                storage.write(bad)
+            self.assertIsNone(SystemSetting.query.get('half'))
+
+    def test_concurrent_saves_and_reads(self):
+        # 并发保存（含互相重叠的条目）与看板/数据仓库读取同时进行，不得出现 database is locked
+        errors = []
+        stop = threading.Event()
+
+        def client():
+            c = self.app.test_client()
+            c.post('/login', data={'username': 'admin', 'password': '123456'})
+            return c
+
+        def saver(n):
+            c = client()
+            try:
+                for i in range(15):
+                    items = [{'title': '并发写入新闻%d号%d' % (j, (n + i) % 5), 'original_url': 'https://stress.example.com/%d/%d' % (j, (n + i) % 5),
+                              'summary': '压力测试'} for j in range(10)]
+                    r = c.post('/admin/collector/save', json={'keyword': 'k', 'items': items})
+                    if r.status_code != 200:
+                        errors.append(r.status_code)
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            c = client()
+            try:
+                while not stop.is_set():
+                    for url in ('/admin/dashboard/data/latest', '/admin/dashboard/data/source_pie', '/admin/data_warehouse?q=并发写入'):
+                        r = c.get(url)
+                        if r.status_code != 200 or (url.endswith('source_pie') and r.get_json().get('error')):
+                            errors.append((url, r.status_code))
+            except Exception as e:
+                errors.append(e)
+        readers = [threading.Thread(target=reader) for _ in range(3)]
+        savers = [threading.Thread(target=saver, args=(n,)) for n in range(6)]
+        for t in readers + savers:
+            t.start()
+        for t in savers:
+            t.join()
+        stop.set()
+        for t in readers:
+            t.join()
+        self.assertEqual(errors, [])
+        with self.app.app_context():
+            # 10 个位置 × 5 个变体，重叠的条目只入库一次
+            self.assertEqual(CollectionRecord.query.count(), 50)
+            self.assertEqual(db.session.execute(text('SELECT count(*) FROM collection_records_fts')).scalar(), 50)
@@ -0,0 +1,38 @@
+import unittest
+
+from app import text_clean
+from app.crawler import BaiduCrawler, SinaCrawler, XinhuaCrawler
+
+
+class TextCleanTest(unittest.TestCase):
+    def test_sanitize(self):
+        self.assertEqual(text_clean.sanitize(' 成都\u200b新闻\n\t发布 '), '成都新闻 发布')
+        self.assertEqual(text_clean.sanitize(None), '')
+
+    def test_noise_rules(self):
+        c = text_clean.TextCleaner(min_length=6)
+        self.assertTrue(c.is_noise('成都新闻'))
+        self.assertTrue(c.is_noise('>>>——|||。。'))
+        self.assertFalse(c.is_noise('成都新闻发布会'))
+
+    def test_clean_batch(self):
+        items = [
+            {'title': ' 成都经济 发展 ', 'summary': '——', 'source': '', 'cover': '//a.jpg', 'original_url': '/x'},
+            {'title': '成都经济 发展', 'summary': '重复标题', 'source': '', 'original_url': 'https://a.com/1'},
+            {'title': '短', 'summary': '', 'original_url': 'https://a.com/2'},
+        ]
+        out = text_clean.cleaner_for('xinhua').clean(items)
+        self.assertEqual(out, [{'title': '成都经济 发展', 'summary': '无概要', 'cover': text_clean.DEFAULT_COVER,
+                                'original_url': '', 'source': '新华网'}])
+
+    def test_per_source_profiles(self):
+        item = [{'title': '成都新闻发布', 'original_url': 'https://a.com/1'}]
+        self.assertEqual(BaiduCrawler().clean_results(item)[0]['source'], '未知来源')
+        self.assertEqual(SinaCrawler().clean_results(item)[0]['source'], '新浪网')
+        self.assertEqual(BaiduCrawler().clean_results([{'title': '成都新闻'}]), [])
+        self.assertEqual(len(XinhuaCrawler().clean_results([{'title': '成都新闻'}])), 1)
+        self.assertEqual(XinhuaCrawler(config={'clean': {'min_length': 8}}).clean_results(item), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+
+from app import charset, density
+
+# 正文抽取基准：对比原选择器扫描（8 个宽泛选择器逐个 get_text，取最长）与文本密度抽取。
+# 页面取自目录下的 *.html，同名 *.txt 为人工标注的正文，准确度按字符二元组 F1 计算
+# 用法：python tools/bench_main_content.py [页面目录] [重复次数]
+DEFAULT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures', 'pages'))
+SELECTORS = ['article', 'div[role="article"]', 'div[id*="content"]', 'div[class*="content"]',
+             'div[id*="article"]', 'div[class*="article"]', 'div[id*="detail"]', 'div[class*="detail"]']
+
+
+def selector_scan(html):
+    # 原 _generic_extract / collector_deep 的实现
+    soup = BeautifulSoup(html, 'html.parser')
+    for t in soup(['script', 'style', 'noscript']):
+        t.decompose()
+    candidates = []
+    for sel in SELECTORS:
+        for el in soup.select(sel):
+            txt = el.get_text(separator='\n', strip=True)
+            if txt:
+                candidates.append(txt)
+    if candidates:
+        candidates.sort(key=lambda x: len(x), reverse=True)
+        content = candidates[0]
+    else:
+        content = soup.get_text(separator='\n', strip=True)
+    return density.clean_text(content)
+
+
+def bigram_f1(got, expected):
+    g = re.sub(r'\s+', '', got)
+    e = re.sub(r'\s+', '', expected)
+    cg = Counter(g[i:i+2] for i in range(len(g) - 1))
+    ce = Counter(e[i:i+2] for i in range(len(e) - 1))
+    overlap = sum((cg & ce).values())
+    if not overlap:
+        return 0.0
+    p = overlap / sum(cg.values())
+    r = overlap / sum(ce.values())
+    return 2 * p * r / (p + r)
+
+
+def timed(fn, html, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(html)
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return best, out
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIR
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    names = sorted(f[:-5] for f in os.listdir(path) if f.endswith('.html'))
+    totals = {'selector': [0.0, 0.0], 'density': [0.0, 0.0]}
+    print(f"{'page':<28}{'selector ms':>12}{'F1':>6}{'density ms':>12}{'F1':>6}")
+    for name in names:
+        with open(os.path.join(path, name + '.html'), 'rb') as f:
+            html = charset.decode(f.read())
+        expected = ''
+        if os.path.exists(os.path.join(path, name + '.txt')):
+            with open(os.path.join(path, name + '.txt'), encoding='utf-8') as f:
+                expected = f.read()
+        t_old, old = timed(selector_scan, html, repeat)
+        t_new, new = timed(lambda h: density.extract(h)['content'], html, repeat)
+        f_old = bigram_f1(old, expected) if expected else float('nan')
+        f_new = bigram_f1(new, expected) if expected else float('nan')
+        totals['selector'][0] += t_old
+        totals['selector'][1] += f_old
+        totals['density'][0] += t_new
+        totals['density'][1] += f_new
+        print(f"{name:<28}{t_old * 1000:>12.2f}{f_old:>6.2f}{t_new * 1000:>12.2f}{f_new:>6.2f}")
+    n = max(len(names), 1)
+    print(f"{'total / mean F1':<28}{totals['selector'][0] * 1000:>12.2f}{totals['selector'][1] / n:>6.2f}"
+          f"{totals['density'][0] * 1000:>12.2f}{totals['density'][1] / n:>6.2f}")
+    if totals['density'][0]:
+        print(f"speedup: {totals['selector'][0] / totals['density'][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+import contextlib
+import gc
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import charset, density, extractor
+from app.crawler import BaiduCrawler, XinhuaCrawler
+
+# 离线解析/抽取基准套件：对 tests/fixtures 下保存的结果页、列表页与文章页（含 GBK/GB18030 页面）
+# 以及由其放大生成的超大页面，逐项测吞吐（次/秒、MB/秒）与峰值内存（tracemalloc，仅统计 Python 侧分配，
+# 不含 libxml2 内部内存），并与 tools/bench_baseline.json 对比：吞吐下降或峰值内存上升超过容差、
+# 或输出指纹变化（抽取结果不同）均视为回归，退出码为 1。全程不访问网络。
+# 用法：python tools/bench_suite.py [--update] [--tolerance 0.4] [--only 名称前缀] [--quick] [--normalize]
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+BASELINE = os.path.join(ROOT, 'tools', 'bench_baseline.json')
+DEFAULT_TOLERANCE = 0.4
+# 每轮至少运行的时长与轮数，取最快一轮
+MIN_ROUND_SECONDS = 0.2
+ROUNDS = 7
+# 峰值内存比较时忽略的绝对波动
+MEMORY_SLACK = 64 * 1024
+XINHUA_RULE = SimpleNamespace(id=-1, updated_at=None, title_xpath='//h1', content_xpath="//div[@id='detail']/p")
+
+
+def _read(*parts):
+    with open(os.path.join(FIXTURES, *parts), 'rb') as f:
+        return f.read()
+
+
+def _large_results(raw, factor=40):
+    # 把结果列表重复 factor 次，得到约 2MB 的结果页
+    html = raw.decode('utf-8')
+    start = html.index('<div id="content_left">') + len('<div id="content_left">')
+    end = html.index('<div id="rs">')
+    block = html[start:end - len('</div>')]
+    return (html[:start] + block * factor + html[end - len('</div>'):]).encode('utf-8')
+
+
+def _large_article(raw, paragraphs=6000):
+    # 正文后追加大量段落与评论区，约 2MB
+    html = raw.decode('utf-8')
+    extra = ''.join('<p>第%d段：记者了解到，相关项目建设正按计划推进，预计年内完成主体工程，带动就业岗位数千个。</p>' % i for i in range(paragraphs))
+    comments = ''.join('<div class="comment-item">网友%d：支持，希望早日建成。</div>' % i for i in range(paragraphs // 4))
+    pos = html.index('<div class="editor">')
+    end = html.index('</div>', pos) + len('</div></div>')
+    return (html[:pos] + extra + html[pos:end] + '<div class="comment-list">' + comments + '</div>' + html[end:]).encode('utf-8')
+
+
+def _digest(obj):
+    return hashlib.sha1(json.dumps(obj, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def _decode(raw):
+    # 与抓取路径一致：按 meta/探测确定编码后解码
+    return charset.decode(raw)
+
+
+def build_cases():
+    # 返回 [(名称, 输入字节数, 无参函数)]；输入在此处准备好，计时只覆盖解析/抽取本身
+    baidu_raw = _read('bench', 'baidu_results.html')
+    baidu_html = baidu_raw.decode('utf-8')
+    baidu_large = _large_results(baidu_raw).decode('utf-8')
+    xinhua_list = _read('bench', 'xinhua_list.html').decode('utf-8')
+    article_raw = _read('pages', 'xinhua_article.html')
+    pages = {
+        'xinhua': article_raw,
+        'people': _read('pages', 'people_article.html'),
+        'gbk': _read('bench', 'gbk_article.html'),
+        'gb18030': _read('bench', 'gb18030_article.html'),
+        'large': _large_article(article_raw),
+    }
+    # 乱码样本含 \x85 等字符，不能用 splitlines 按行切分
+    mojibake = [ln for ln in _read('bench', 'mojibake.txt').decode('utf-8').split('\n') if ln] * 50
+    bs4_baidu = BaiduCrawler(config={'parser': 'bs4'})
+    lxml_baidu = BaiduCrawler(config={'parser': 'lxml'})
+    bs4_xinhua = XinhuaCrawler(config={'parser': 'bs4'})
+    lxml_xinhua = XinhuaCrawler(config={'parser': 'lxml'})
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw_items = bs4_baidu.parse_html(baidu_large)
+    from app.admin import fix_mojibake
+
+    cases = [
+        ('baidu_parse_bs4', len(baidu_raw), lambda: bs4_baidu.parse_html(baidu_html)),
+        ('baidu_parse_lxml', len(baidu_raw), lambda: lxml_baidu.parse_html(baidu_html)),
+        ('baidu_parse_lxml_large', len(baidu_large.encode('utf-8')), lambda: lxml_baidu.parse_html(baidu_large)),
+        ('xinhua_parse_bs4', len(xinhua_list.encode('utf-8')), lambda: bs4_xinhua.parse_html(xinhua_list)),
+        ('xinhua_parse_lxml', len(xinhua_list.encode('utf-8')), lambda: lxml_xinhua.parse_html(xinhua_list)),
+        ('clean_results', sum(len(json.dumps(it, ensure_ascii=False).encode('utf-8')) for it in raw_items),
+         lambda: bs4_baidu.clean_results(raw_items)),
+        ('fix_mojibake', sum(len(s.encode('utf-8')) for s in mojibake), lambda: [fix_mojibake(s) for s in mojibake]),
+    ]
+    for name, raw in pages.items():
+        # 通用抽取（_generic_extract 的解码 + 文本密度抽取）与规则抽取（_extract_with_rule 的解码 + 选择器求值）
+        cases.append(('generic_extract_' + name, len(raw), lambda raw=raw: density.extract(_decode(raw))))
+        cases.append(('rule_extract_' + name, len(raw), lambda raw=raw: extractor.extract(_decode(raw), XINHUA_RULE)))
+    return cases
+
+
+def measure(fn, quick=False):
+    # 返回 (每次耗时秒, 峰值内存字节, 输出)
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn()
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if quick:
+            t0 = time.perf_counter()
+            fn()
+            return time.perf_counter() - t0, peak, out
+        number = 1
+        while True:
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - t0
+            if elapsed >= MIN_ROUND_SECONDS or number >= 1 << 16:
+                break
+            number *= 2
+        best = elapsed / number
+        for _ in range(ROUNDS - 1):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - t0) / number)
+    return best, peak, out
+
+
+def calibrate():
+    # 固定的纯 Python 参考负载，用于把基准折算到当前机器速度（基准文件可在不同机器间复用）
+    def work():
+        d = {}
+        for i in range(20000):
+            d[str(i)] = len(str(i * 7919))
+        return sum(d.values())
+    best = None
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        work()
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return best
+
+
+def run(only='', quick=False):
+    results = {}
+    for name, size, fn in build_cases():
+        if only and not name.startswith(only):
+            continue
+        seconds, peak, out = measure(fn, quick=quick)
+        results[name] = {
+            'ops_per_sec': round(1.0 / seconds, 2) if seconds else 0.0,
+            'mb_per_sec': round(size / seconds / 1e6, 3) if seconds else 0.0,
+            'peak_kb': round(peak / 1024.0, 1),
+            'input_kb': round(size / 1024.0, 1),
+            'digest': _digest(out),
+        }
+    return results
+
+
+def load_baseline(path=BASELINE):
+    # 返回 (用例字典, 参考负载耗时)
+    if not os.path.exists(path):
+        return {}, None
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('cases') or {}, data.get('calibration')
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, check_speed=True, speed_factor=1.0):
+    # 返回回归说明列表；基准中没有的用例不比较。speed_factor 为当前机器相对基准机器的速度
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if cur['digest'] != base.get('digest'):
+            problems.append(f"{name}: 输出变化 ({base.get('digest')} -> {cur['digest']})")
+        expected = (base.get('ops_per_sec') or 0) * speed_factor
+        if check_speed and expected and cur['ops_per_sec'] < expected * (1 - tolerance):
+            problems.append(f"{name}: 吞吐 {expected:.1f} -> {cur['ops_per_sec']:.1f} 次/秒")
+        if base.get('peak_kb') is not None and cur['peak_kb'] * 1024 > base['peak_kb'] * 1024 * (1 + tolerance) + MEMORY_SLACK:
+            problems.append(f"{name}: 峰值内存 {base['peak_kb']:.0f} -> {cur['peak_kb']:.0f} KB")
+    return problems
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='离线解析/抽取基准')
+    ap.add_argument('--update', action='store_true', help='把本次结果写入基准文件')
+    ap.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    ap.add_argument('--only', default='', help='只运行名称以此开头的用例')
+    ap.add_argument('--quick', action='store_true', help='每项只运行一次，只比较输出与内存')
+    ap.add_argument('--baseline', default=BASELINE)
+    ap.add_argument('--normalize', action='store_true', help='按参考负载折算机器速度差异（基准来自其他机器时使用）')
+    args = ap.parse_args(argv)
+    cal = calibrate()
+    results = run(only=args.only, quick=args.quick)
+    baseline, base_cal = load_baseline(args.baseline)
+    factor = (base_cal / cal) if (args.normalize and base_cal and cal) else 1.0
+    if args.normalize:
+        print(f"machine speed vs baseline: {factor:.2f}x")
+    print(f"{'case':<28}{'ops/s':>10}{'MB/s':>9}{'peak KB':>10}{'base ops/s':>12}{'ratio':>7}")
+    for name, cur in results.items():
+        base = (baseline.get(name) or {}).get('ops_per_sec')
+        expected = base * factor if base else float('nan')
+        print(f"{name:<28}{cur['ops_per_sec']:>10.1f}{cur['mb_per_sec']:>9.2f}{cur['peak_kb']:>10.0f}"
+              f"{expected:>12.1f}{cur['ops_per_sec'] / expected:>7.2f}")
+    if args.update:
+        merged = dict(baseline)
+        merged.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'calibration': cal, 'cases': merged}, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"baseline updated: {args.baseline}")
+        return 0
+    problems = compare(results, baseline, args.tolerance, check_speed=not args.quick, speed_factor=factor)
+    for p in problems:
+        print('REGRESSION ' + p)
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import text_clean
+
+# 采集结果清洗基准：对比原各采集器的 sanitize_text/is_noise_text/clean_results 与统一清洗管线，
+# 输出每秒处理条目数，并校验两者输出一致
+# 用法：python tools/bench_text_clean.py [条目数]
+
+
+class LegacyCleaner:
+    # 原 BaiduCrawler/XinhuaCrawler/SinaCrawler 中的实现（三者仅最短长度与缺省来源名不同）
+    def __init__(self, min_len, default_source):
+        self.min_len = min_len
+        self.default_source = default_source
+
+    def sanitize_text(self, text):
+        if not text:
+            return ""
+        t = str(text)
+        t = t.replace('\u200b', '').replace('\u200c', '').replace('\u200d', '')
+        t = ' '.join(t.split())
+        return t.strip()
+
+    def is_noise_text(self, text):
+        if not text:
+            return True
+        t = self.sanitize_text(text)
+        if len(t) < self.min_len:
+            return True
+        import re
+        valid = re.findall(r"[\u4e00-\u9fffA-Za-z0-9]", t)
+        ratio = (len(valid) / max(len(t), 1))
+        if ratio < 0.4:
+            return True
+        return False
+
+    def clean_results(self, items):
+        cleaned = []
+        seen = set()
+        for it in items:
+            title = self.sanitize_text(it.get('title', ''))
+            summary = self.sanitize_text(it.get('summary', ''))
+            source = self.sanitize_text(it.get('source', ''))
+            cover = (it.get('cover') or '').strip()
+            url = (it.get('original_url') or '').strip()
+            if self.is_noise_text(title):
+                continue
+            key = title.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            if not (url.startswith('http://') or url.startswith('https://')):
+                url = ''
+            if not (cover.startswith('http://') or cover.startswith('https://')):
+                cover = ''
+            if not cover:
+                cover = 'https://dummyimage.com/242x162/18202D/ffffff&text=NEWS'
+            cleaned.append({
+                'title': title,
+                'summary': summary if not self.is_noise_text(summary) else '无概要',
+                'cover': cover,
+                'original_url': url,
+                'source': source or self.default_source
+            })
+        return cleaned
+
+
+def make_items(n, seed=7):
+    rng = random.Random(seed)
+    words = ['成都', '经济', '发展', 'GDP', '增长', '政策', '发布会', '\u200b', '  ', '——', '|', '…', '2024', 'AI', '科技']
+    items = []
+    for i in range(n):
+        title = ''.join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+        summary = ''.join(rng.choice(words) for _ in range(rng.randint(0, 40)))
+        items.append({
+            'title': title if rng.random() > 0.1 else '>>>',
+            'summary': summary,
+            'source': rng.choice(['新华网', ' 人民网 ', '', '央视\u200b新闻']),
+            'cover': rng.choice(['', 'https://img.example.com/a.jpg', '//img.example.com/b.jpg']),
+            'original_url': rng.choice(['https://news.example.com/%d' % i, '/relative/%d' % i, '']),
+        })
+    return items
+
+
+def best_of(fn, repeat=5):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return best, out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    items = make_items(n)
+    print(f"items: {n}")
+    for key, min_len in (('baidu', 6), ('xinhua', 4), ('sina', 4)):
+        legacy = LegacyCleaner(min_len, text_clean.PROFILES[key]['default_source'])
+        cleaner = text_clean.cleaner_for(key)
+        t_old, old = best_of(lambda: legacy.clean_results(items))
+        t_new, new = best_of(lambda: cleaner.clean(items))
+        assert old == new, key
+        print(f"{key:<8} legacy {n / t_old:>10,.0f} items/s   pipeline {n / t_new:>10,.0f} items/s   ({t_old / t_new:.2f}x, {len(new)} kept)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+import json
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# 采集流压测：多个并发会话同时打开 /admin/collector/stream（SSE）读到 done/error，
+# 统计总条目数/秒、首条延迟、单流耗时与条目间隔的分位数；可选把采集到的条目提交入库，
+# 再对这些条目对应的全部记录（新增、按 URL 更新与已存在的）分批调用 /admin/data_warehouse/deep_collect，
+# 统计深度采集的记录/秒与单批延迟。
+# 配合 tools/replay_server.py 使用时结果可复现，且不访问真实站点。
+# 用法：python tools/load_driver.py --app http://127.0.0.1:5000 --source baidu --keywords 成都,四川 --streams 8 --rounds 2 [--deep-batch 10]
+
+
+def percentile(values, p):
+    # 最近秩法；空列表返回 nan
+    if not values:
+        return float('nan')
+    s = sorted(values)
+    k = max(0, min(len(s) - 1, math.ceil(p / 100.0 * len(s)) - 1))
+    return s[k]
+
+
+def record_ids(saved):
+    # /admin/collector/save 的 results 与提交的条目一一对应（saved/updated/duplicate 都带记录 id），按出现顺序去重
+    return list(dict.fromkeys(r['id'] for r in saved.get('results') or [] if r.get('id')))
+
+
+def login(app, username, password):
+    s = requests.Session()
+    r = s.post(app.rstrip('/') + '/login', data={'username': username, 'password': password}, allow_redirects=False, timeout=10)
+    if r.status_code not in (200, 302) or not s.cookies:
+        raise RuntimeError(f'登录失败: HTTP {r.status_code}')
+    return s
+
+
+def run_stream(session, app, source, keyword, max_count, pace_ms=0, dedup='off', timeout=120):
+    # 返回单条流的统计：条目、首条延迟、条目到达时刻、总耗时、错误
+    params = {'source': source, 'keyword': keyword, 'max_count': max_count, 'pace_ms': pace_ms, 'dedup': dedup}
+    t0 = time.perf_counter()
+    arrivals = []
+    items = []
+    error = None
+    event = None
+    try:
+        with session.get(app.rstrip('/') + '/admin/collector/stream', params=params, stream=True, timeout=timeout) as r:
+            if r.status_code != 200:
+                raise RuntimeError(f'HTTP {r.status_code}')
+            # 按字节切行再解码：str.splitlines 会在正文中的 \u2028 等字符处误切
+            for raw in r.iter_lines():
+                line = raw.decode('utf-8', 'replace')
+                if line.startswith('event: '):
+                    event = line[7:]
+                elif line.startswith('data: ') and event:
+                    if event == 'item':
+                        arrivals.append(time.perf_counter() - t0)
+                        items.append(json.loads(line[6:]))
+                    elif event == 'error':
+                        error = line[6:]
+                    if event in ('done', 'error'):
+                        break
+                    event = None
+    except Exception as e:
+        error = str(e)
+    return {'items': items, 'arrivals': arrivals, 'elapsed': time.perf_counter() - t0, 'error': error}
+
+
+def run_deep(session, app, ids, batch):
+    # 按批调用深度采集，返回 [(批大小, 延迟, 成功数)]
+    out = []
+    for i in range(0, len(ids), batch):
+        chunk = ids[i:i + batch]
+        t0 = time.perf_counter()
+        r = session.post(app.rstrip('/') + '/admin/data_warehouse/deep_collect', json={'ids': chunk}, timeout=600)
+        updated = len((r.json() or {}).get('updated') or []) if r.status_code == 200 else 0
+        out.append((len(chunk), time.perf_counter() - t0, updated))
+    return out
+
+
+def drive(app, source='baidu', keywords=('成都',), streams=4, rounds=1, max_count=20, pace_ms=0,
+          username='admin', password='123456', deep_batch=0):
+    base = login(app, username, password)
+    cookies = base.cookies.get_dict()
+    local = threading.local()
+
+    def _session():
+        s = getattr(local, 'session', None)
+        if s is None:
+            s = local.session = requests.Session()
+            s.cookies.update(cookies)
+        return s
+
+    jobs = [keywords[i % len(keywords)] for i in range(streams * rounds)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=streams) as pool:
+        results = list(pool.map(lambda kw: run_stream(_session(), app, source, kw, max_count, pace_ms), jobs))
+    wall = time.perf_counter() - t0
+    total = sum(len(r['items']) for r in results)
+    first = [r['arrivals'][0] for r in results if r['arrivals']]
+    gaps = [b - a for r in results for a, b in zip(r['arrivals'], r['arrivals'][1:])]
+    elapsed = [r['elapsed'] for r in results]
+    report = {
+        'streams': len(results),
+        'concurrency': streams,
+        'items': total,
+        'errors': sum(1 for r in results if r['error']),
+        'wall_seconds': round(wall, 3),
+        'items_per_sec': round(total / wall, 2) if wall else 0.0,
+        'first_item_ms': {p: round(percentile(first, p) * 1000, 1) for p in (50, 90, 99)},
+        'item_gap_ms': {p: round(percentile(gaps, p) * 1000, 1) for p in (50, 90, 99)},
+        'stream_ms': {p: round(percentile(elapsed, p) * 1000, 1) for p in (50, 90, 99)},
+    }
+    if deep_batch:
+        seen = {}
+        for r in results:
+            for it in r['items']:
+                seen.setdefault(it.get('original_url') or it.get('title'), it)
+        saved = base.post(app.rstrip('/') + '/admin/collector/save',
+                          json={'keyword': keywords[0], 'items': list(seen.values())}, timeout=120).json()
+        ids = record_ids(saved)
+        t1 = time.perf_counter()
+        batches = run_deep(base, app, ids, deep_batch)
+        dwall = time.perf_counter() - t1
+        report['deep'] = {
+            'records': len(ids),
+            'updated': sum(b[2] for b in batches),
+            'records_per_sec': round(len(ids) / dwall, 2) if dwall else 0.0,
+            'batch_ms': {p: round(percentile([b[1] for b in batches], p) * 1000, 1) for p in (50, 90, 99)},
+        }
+    errors = [r['error'] for r in results if r['error']]
+    if errors:
+        report['first_error'] = errors[0]
+    return report
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='采集流并发压测')
+    ap.add_argument('--app', default='http://127.0.0.1:5000')
+    ap.add_argument('--source', default='baidu')
+    ap.add_argument('--keywords', default='成都')
+    ap.add_argument('--streams', type=int, default=4, help='并发流数')
+    ap.add_argument('--rounds', type=int, default=1, help='每个并发位依次运行的流数')
+    ap.add_argument('--max-count', type=int, default=20)
+    ap.add_argument('--pace-ms', type=int, default=0)
+    ap.add_argument('--user', default='admin')
+    ap.add_argument('--password', default='123456')
+    ap.add_argument('--deep-batch', type=int, default=0, help='>0 时把采集到的条目入库，并对其对应的全部记录按此批大小调用深度采集')
+    args = ap.parse_args(argv)
+    report = drive(args.app, source=args.source, keywords=[k for k in args.keywords.split(',') if k.strip()],
+                   streams=args.streams, rounds=args.rounds, max_count=args.max_count, pace_ms=args.pace_ms,
+                   username=args.user, password=args.password, deep_batch=args.deep_batch)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
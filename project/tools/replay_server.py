@@ -0,0 +1,359 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# HTTP 录制/回放替身服务器：采集源的入口地址（config_json 中的 base_url/list_url/api）指向本服务，
+# 请求路径形如 /_/https/www.baidu.com/s?...，即 /_/<协议>/<主机><原路径>。
+# record 模式把请求转发到真实站点并把响应写入录制目录；replay 模式只读录制目录，不访问网络，
+# 可注入延迟（含抖动）、随机错误与按主机的限流（超出速率返回 429 + Retry-After）。
+# 回放时响应正文中的绝对链接与站内根路径链接改写为指向本服务，深度采集也走回放。
+# 用法：
+#   python tools/replay_server.py serve --dir recordings/demo --mode record
+#   python tools/replay_server.py serve --dir recordings/demo --latency-ms 80 --jitter-ms 40 --error-rate 0.02 --throttle-rps 20
+#   python tools/replay_server.py configure --server http://127.0.0.1:8765 [--reset]
+PREFIX = '/_/'
+DEFAULT_PORT = 8765
+# 录制时保留的响应头；正文已由 requests 解压，不保留 Content-Encoding
+_KEEP_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Location', 'Retry-After', 'Cache-Control')
+# 转发到上游时不透传的请求头
+_HOP_HEADERS = {'host', 'connection', 'content-length', 'accept-encoding', 'keep-alive', 'transfer-encoding',
+                'if-none-match', 'if-modified-since'}
+_TEXT_TYPES = ('text/', 'json', 'javascript', 'xml')
+# https://host 与 JSON 中转义的 https:\/\/host
+_ABS_URL = re.compile(rb'(https?):(\\?/)\\?/([A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+)(:\d+)?')
+_PROTO_REL = re.compile(rb'(?<=["\'(=])//([A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+)')
+_ROOT_REL = re.compile(rb'((?:href|src|data-src)\s*=\s*["\'])/(?!/)', re.I)
+# 入口地址字段（采集器属性名与 config_json 键一致）
+ENTRY_FIELDS = ('base_url', 'list_url', 'api')
+# 内置采集源没有 CrawlerSource 行时按线上默认地址运行，configure 时为其建行（reset 时删除）；
+# 百度、新华与数据采集页一致视为启用，新浪建为停用行，只在显式选择该来源时使用
+BUILTIN_SOURCES = (('baidu', '百度新闻', True), ('xinhua', '新华网', True), ('sina', '新浪网', False))
+
+
+def to_replay_url(server, url):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    return f"{server.rstrip('/')}{PREFIX}{parts.scheme}/{parts.netloc}{path}" + (f"?{parts.query}" if parts.query else '')
+
+
+def parse_target(path):
+    # /_/https/host/a?b → ('https', 'host', '/a', 'b')；不是代理路径时返回 None
+    if not path.startswith(PREFIX):
+        return None
+    parts = urlsplit(path[len(PREFIX):])
+    seg = parts.path.split('/', 2)
+    if len(seg) < 2 or seg[0] not in ('http', 'https') or not seg[1]:
+        return None
+    return seg[0], seg[1].lower(), '/' + (seg[2] if len(seg) > 2 else ''), parts.query
+
+
+def request_key(method, scheme, host, path, query):
+    # 查询参数排序后参与匹配，参数顺序不同的同一请求命中同一条录制
+    q = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return f"{method.upper()} {scheme}://{host}{path}" + (f"?{q}" if q else '')
+
+
+class Recording:
+    # 录制目录：index.jsonl 每行一条（键、状态码、响应头、正文文件名），正文按 sha1 存于 bodies/
+    def __init__(self, path):
+        self.path = path
+        self.bodies = os.path.join(path, 'bodies')
+        self.index = os.path.join(path, 'index.jsonl')
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.index):
+            with open(self.index, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        e = json.loads(line)
+                        # 同一请求录制多次时以最后一次为准
+                        self.entries[e['key']] = e
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def body(self, entry):
+        name = entry.get('body')
+        if not name:
+            return b''
+        with open(os.path.join(self.bodies, name), 'rb') as f:
+            return f.read()
+
+    def put(self, key, status, headers, body):
+        name = hashlib.sha1(body).hexdigest() if body else ''
+        entry = {'key': key, 'status': status, 'headers': headers, 'body': name, 'recorded_at': time.time()}
+        with self._lock:
+            os.makedirs(self.bodies, exist_ok=True)
+            if name and not os.path.exists(os.path.join(self.bodies, name)):
+                with open(os.path.join(self.bodies, name), 'wb') as f:
+                    f.write(body)
+            with open(self.index, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.entries[key] = entry
+        return entry
+
+
+class Throttle:
+    # 按主机的令牌桶；rps 为 0 表示不限流
+    def __init__(self, rps=0.0, burst=None):
+        self.rps = float(rps or 0)
+        self.burst = float(burst or max(1.0, self.rps))
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def allow(self, host):
+        if self.rps <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rps)
+            ok = tokens >= 1
+            self._buckets[host] = (tokens - 1 if ok else tokens, now)
+            return ok
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, recording, mode='replay', latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503,
+                 throttle_rps=0.0, throttle_burst=None, rewrite=True, seed=None):
+        super().__init__(address, ReplayHandler)
+        self.recording = recording
+        self.mode = mode
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle = Throttle(throttle_rps, throttle_burst)
+        self.rewrite = rewrite
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.stats = {'hit': 0, 'miss': 0, 'recorded': 0, 'error': 0, 'throttled': 0, 'not_modified': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def roll(self):
+        with self._rng_lock:
+            return self.rng.random()
+
+    def delay(self):
+        with self._rng_lock:
+            ms = self.latency_ms + (self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if ms > 0:
+            time.sleep(ms / 1000.0)
+
+    def fetch_upstream(self, method, url, headers, body):
+        import requests
+        r = requests.request(method, url, headers=headers, data=body, timeout=20, allow_redirects=False)
+        kept = {k: r.headers[k] for k in _KEEP_HEADERS if k in r.headers}
+        return r.status_code, kept, r.content
+
+    def rewrite_body(self, body, scheme, host):
+        base = self.base_url.encode('ascii')
+
+        def _abs(m):
+            sep = m.group(2)
+            netloc = m.group(3) + (m.group(4) or b'')
+            if netloc.decode('ascii', 'ignore') == base.split(b'//', 1)[1].decode('ascii'):
+                return m.group(0)
+            return base.replace(b'/', sep) + sep + b'_' + sep + m.group(1) + sep + netloc
+        body = _ABS_URL.sub(_abs, body)
+        body = _PROTO_REL.sub(lambda m: base + b'/_/https/' + m.group(1), body)
+        return _ROOT_REL.sub(lambda m: m.group(1) + base + b'/_/' + scheme.encode() + b'/' + host.encode() + b'/', body)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ReplayServer/1.0'
+
+    def do_GET(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, headers, body):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD' and body:
+            self.wfile.write(body)
+
+    def _handle(self):
+        srv = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        req_body = self.rfile.read(length) if length else None
+        if self.path == '/_stats':
+            return self._send(200, {'Content-Type': 'application/json'}, json.dumps(srv.stats).encode())
+        target = parse_target(self.path)
+        if target is None:
+            return self._send(404, {'Content-Type': 'text/plain'}, b'not a replay path')
+        scheme, host, path, query = target
+        if not srv.throttle.allow(host):
+            srv.count('throttled')
+            return self._send(429, {'Retry-After': '1', 'Content-Type': 'text/plain'}, b'too many requests')
+        srv.delay()
+        if srv.error_rate and srv.roll() < srv.error_rate:
+            srv.count('error')
+            return self._send(srv.error_status, {'Content-Type': 'text/plain'}, b'injected error')
+        # HEAD 与 GET 共用同一条录制
+        method = 'GET' if self.command == 'HEAD' else self.command
+        key = request_key(method, scheme, host, path, query)
+        entry = srv.recording.get(key)
+        if entry is None and srv.mode == 'record':
+            headers = {k: v for k, v in self.headers.items() if k.lower() not in _HOP_HEADERS}
+            url = f"{scheme}://{host}{path}" + (f"?{query}" if query else '')
+            try:
+                status, kept, body = srv.fetch_upstream(method, url, headers, req_body)
+            except Exception as e:
+                return self._send(502, {'Content-Type': 'text/plain'}, str(e).encode('utf-8'))
+            entry = srv.recording.put(key, status, kept, body)
+            srv.count('recorded')
+        if entry is None:
+            srv.count('miss')
+            return self._send(404, {'Content-Type': 'text/plain'}, ('no recording for ' + key).encode('utf-8'))
+        srv.count('hit')
+        headers = dict(entry.get('headers') or {})
+        etag = headers.get('ETag')
+        if etag and self.headers.get('If-None-Match') == etag:
+            srv.count('not_modified')
+            return self._send(304, {'ETag': etag}, b'')
+        body = srv.recording.body(entry)
+        if srv.rewrite:
+            if headers.get('Location'):
+                loc = headers['Location']
+                if loc.startswith('/'):
+                    loc = f"{scheme}://{host}{loc}"
+                headers['Location'] = to_replay_url(srv.base_url, loc)
+            if any(t in (headers.get('Content-Type') or '').lower() for t in _TEXT_TYPES):
+                body = srv.rewrite_body(body, scheme, host)
+        self._send(entry['status'], headers, body)
+
+
+def configure_sources(server, reset=False, rate=1000.0, app=None):
+    # 把各采集源 config_json 中的入口地址指向回放服务（原值保存在 replay_backup 中），reset 时恢复；
+    # 新华/新浪的站点搜索回退沿用 baidu 采集源的配置（或本来源的 search 配置），同样指向回放服务
+    from app import create_app, db
+    from app.crawler import BaiduCrawler, create_crawler
+    from app.models import CrawlerSource
+    app = app or create_app()
+    changed = []
+    limit = {'rate': rate, 'burst': rate, 'max_rate': rate}
+    with app.app_context():
+        if not reset:
+            existing = {r.key for r in CrawlerSource.query.all()}
+            for key, name, enabled in BUILTIN_SOURCES:
+                if key not in existing:
+                    db.session.add(CrawlerSource(name=name, key=key, enabled=enabled, config_json=json.dumps({'replay_created': True})))
+            db.session.flush()
+        for row in CrawlerSource.query.order_by(CrawlerSource.id.asc()).all():
+            try:
+                cfg = json.loads(row.config_json) if (row.config_json or '').strip() else {}
+            except Exception:
+                continue
+            if reset:
+                if cfg.get('replay_created'):
+                    db.session.delete(row)
+                    changed.append(row.key)
+                    continue
+                backup = cfg.pop('replay_backup', None)
+                if backup is None:
+                    continue
+                for k in ENTRY_FIELDS + ('rate_limit', 'search'):
+                    cfg.pop(k, None)
+                cfg.update({k: v for k, v in backup.items() if v is not None})
+            else:
+                try:
+                    crawler = create_crawler(row.key, config={k: v for k, v in cfg.items() if k != 'replay_created'})
+                except Exception:
+                    continue
+                fields = [f for f in ENTRY_FIELDS if getattr(crawler, f, None)]
+                if not fields:
+                    continue
+                backup = cfg.get('replay_backup') or {k: cfg.get(k) for k in fields + ['rate_limit', 'search']}
+                cfg['replay_backup'] = backup
+                for f in fields:
+                    original = backup.get(f) or getattr(crawler, f)
+                    cfg[f] = to_replay_url(server, original)
+                if isinstance(backup.get('search'), dict):
+                    search = dict(backup['search'])
+                    search['base_url'] = to_replay_url(server, BaiduCrawler(config=backup['search']).base_url)
+                    search['rate_limit'] = limit
+                    cfg['search'] = search
+                # 回放服务在本机，应用侧限速放宽，由服务端的 --throttle-rps 模拟站点限流
+                cfg['rate_limit'] = limit
+            row.config_json = json.dumps(cfg, ensure_ascii=False)
+            changed.append(row.key)
+        db.session.commit()
+    return changed
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='HTTP 录制/回放替身服务器')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    s = sub.add_parser('serve')
+    s.add_argument('--dir', required=True, help='录制目录')
+    s.add_argument('--mode', choices=['replay', 'record'], default='replay')
+    s.add_argument('--host', default='127.0.0.1')
+    s.add_argument('--port', type=int, default=DEFAULT_PORT)
+    s.add_argument('--latency-ms', type=float, default=0)
+    s.add_argument('--jitter-ms', type=float, default=0)
+    s.add_argument('--error-rate', type=float, default=0.0)
+    s.add_argument('--error-status', type=int, default=503)
+    s.add_argument('--throttle-rps', type=float, default=0.0)
+    s.add_argument('--throttle-burst', type=float, default=None)
+    s.add_argument('--no-rewrite', action='store_true', help='不改写正文中的链接')
+    s.add_argument('--seed', type=int, default=None)
+    c = sub.add_parser('configure')
+    c.add_argument('--server', default=f'http://127.0.0.1:{DEFAULT_PORT}')
+    c.add_argument('--reset', action='store_true')
+    c.add_argument('--rate', type=float, default=1000.0, help='应用侧对回放服务的限速（次/秒）')
+    args = ap.parse_args(argv)
+    if args.cmd == 'configure':
+        changed = configure_sources(args.server, reset=args.reset, rate=args.rate)
+        print(('restored: ' if args.reset else 'configured: ') + (', '.join(changed) or '(none)'))
+        return 0
+    srv = ReplayServer((args.host, args.port), Recording(args.dir), mode=args.mode, latency_ms=args.latency_ms,
+                       jitter_ms=args.jitter_ms, error_rate=args.error_rate, error_status=args.error_status,
+                       throttle_rps=args.throttle_rps, throttle_burst=args.throttle_burst,
+                       rewrite=not args.no_rewrite, seed=args.seed)
+    print(f"{args.mode} server on {srv.base_url} ({len(srv.recording.entries)} recorded responses)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        print(json.dumps(srv.stats))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
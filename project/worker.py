@@ -0,0 +1,19 @@
+import os
+import time
+
+from app import create_app
+from app.jobs import WorkerPool
+
+# 独立的采集任务工作进程：python worker.py（线程数由环境变量 CRAWL_WORKERS 指定，默认 4）
+# Web 进程可配置 CRAWL_JOB_WORKERS=0 只负责入队
+app = create_app({'CRAWL_SCHEDULER': False, 'CRAWL_JOB_WORKERS': 0})
+
+if __name__ == '__main__':
+    pool = WorkerPool(app, workers=int(os.environ.get('CRAWL_WORKERS') or 4))
+    pool.start()
+    print(f"crawl workers started: {pool.workers}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()